@@ -5,23 +5,26 @@ courses
 import base64
 import logging
 import os
+import Queue
 import re
 import shutil
 import tarfile
+import threading
 from path import Path as path
-from tempfile import mkdtemp
 
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import SuspiciousOperation, PermissionDenied
 from django.core.files.temp import NamedTemporaryFile
 from django.core.servers.basehttp import FileWrapper
-from django.http import HttpResponse, HttpResponseNotFound, Http404
+from django.db import connection
+from django.http import HttpResponse, HttpResponseNotFound, Http404, StreamingHttpResponse
 from django.utils.translation import ugettext as _
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.views.decorators.http import require_http_methods, require_GET
 
 import dogstats_wrapper as dog_stats_api
+from contentserver.caching import bump_course_asset_version
 from edxmako.shortcuts import render_to_response
 from xmodule.contentstore.django import contentstore
 from xmodule.exceptions import SerializationError
@@ -29,7 +32,7 @@ from xmodule.modulestore.django import modulestore
 from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locator import LibraryLocator
 from xmodule.modulestore.xml_importer import import_course_from_xml, import_library_from_xml
-from xmodule.modulestore.xml_exporter import export_course_to_xml, export_library_to_xml
+from xmodule.modulestore.xml_exporter import export_course_to_tarball, export_library_to_tarball
 from xmodule.modulestore import COURSE_ROOT, LIBRARY_ROOT
 
 from student.auth import has_course_author_access
@@ -54,6 +57,11 @@ __all__ = [
 
 log = logging.getLogger(__name__)
 
+# Size, in bytes, of the chunks in which export tarballs are streamed, and
+# number of chunks generated ahead of the response.
+EXPORT_STREAM_CHUNK_SIZE = 64 * 1024
+EXPORT_STREAM_MAX_CHUNKS = 16
+
 
 # Regex to capture Content-Range header ranges.
 CONTENT_RE = re.compile(r"(?P<start>\d{1,11})-(?P<stop>\d{1,11})/(?P<end>\d{1,11})")
@@ -285,8 +293,10 @@ def _import_handler(request, courselike_key, root_name, successful_url, context_
                         settings.GITHUB_REPO_ROOT, [dirpath],
                         load_error_modules=False,
                         static_content_store=contentstore(),
-                        target_id=courselike_key
+                        target_id=courselike_key,
+                        static_import_workers=settings.COURSE_IMPORT_STATIC_WORKERS,
                     )
+                bump_course_asset_version(courselike_key)
 
                 new_location = courselike_items[0].location
                 logging.debug('new course at %s', new_location)
@@ -395,17 +405,12 @@ def create_export_tarball(course_module, course_key, context):
     """
     name = course_module.url_name
     export_file = NamedTemporaryFile(prefix=name + '.', suffix=".tar.gz")
-    root_dir = path(mkdtemp())
 
     try:
-        if isinstance(course_key, LibraryLocator):
-            export_library_to_xml(modulestore(), contentstore(), course_key, root_dir, name)
-        else:
-            export_course_to_xml(modulestore(), contentstore(), course_module.id, root_dir, name)
-
         logging.debug(u'tar file being generated at %s', export_file.name)
-        with tarfile.open(name=export_file.name, mode='w:gz') as tar_file:
-            tar_file.add(root_dir / name, arcname=name)
+        _export_tarball(course_module, course_key, export_file)
+        export_file.flush()
+        export_file.seek(0)
 
     except SerializationError as exc:
         log.exception(u'There was an error exporting %s', course_key)
@@ -439,12 +444,151 @@ def create_export_tarball(course_module, course_key, context):
             'unit': None,
             'raw_err_msg': str(exc)})
         raise
-    finally:
-        shutil.rmtree(root_dir / name)
 
     return export_file
 
 
+def _export_tarball(course_module, course_key, fileobj):
+    """
+    Writes the export tarball into `fileobj`.
+    """
+    name = course_module.url_name
+    if isinstance(course_key, LibraryLocator):
+        export_library_to_tarball(modulestore(), contentstore(), course_key, fileobj, name)
+    else:
+        export_course_to_tarball(modulestore(), contentstore(), course_module.id, fileobj, name)
+
+
+class ExportCancelled(Exception):
+    """
+    Raised in the thread generating an export tarball once its response stops
+    being sent.
+    """
+    pass
+
+
+class _ExportStream(object):
+    """
+    A file object which the export tarball is written to, by a thread of its
+    own, and which the response iterates over as the tarball is generated.
+
+    Writes block once `EXPORT_STREAM_MAX_CHUNKS` chunks are waiting to be
+    sent, so that only those are held in memory.
+    """
+    _DONE = object()
+
+    def __init__(self):
+        self._chunks = Queue.Queue(EXPORT_STREAM_MAX_CHUNKS)
+        self._buffer = []
+        self._buffered = 0
+        self.cancelled = False
+
+    def write(self, data):
+        """
+        Adds `data` to the tarball.
+        """
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= EXPORT_STREAM_CHUNK_SIZE:
+            self._flush()
+
+    def _flush(self):
+        """
+        Queues the data written since the last chunk as a new chunk.
+        """
+        if self._buffer:
+            self._put(''.join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+
+    def _put(self, item):
+        """
+        Queues `item`, once there is room for it, unless the response has
+        stopped being sent.
+        """
+        while True:
+            if self.cancelled:
+                raise ExportCancelled()
+            try:
+                self._chunks.put(item, timeout=1)
+                return
+            except Queue.Full:
+                pass
+
+    def finish(self):
+        """
+        Ends the tarball.
+        """
+        self._flush()
+        self._put(self._DONE)
+
+    def fail(self, exc):
+        """
+        Ends the tarball, incomplete, because of `exc`.
+        """
+        self._put(exc)
+
+    def __iter__(self):
+        try:
+            while True:
+                item = self._chunks.get()
+                if item is self._DONE:
+                    return
+                if isinstance(item, Exception):
+                    # Abort the response, rather than let the incomplete
+                    # tarball look like it was complete.
+                    raise item
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Stops the generation of the tarball, once the response stops being
+        sent.  Called by the response when it's closed.
+        """
+        self.cancelled = True
+
+
+def stream_export_tarball(course_module, course_key):
+    """
+    Returns a response streaming the export tarball as it's being generated,
+    so that it's neither written to disk nor held in memory.
+
+    Errors can't be reported by the response, which is already being sent
+    when they happen: they are logged, and the response is aborted.
+    """
+    stream = _ExportStream()
+
+    def export():
+        """
+        Writes the tarball into the stream.
+        """
+        try:
+            _export_tarball(course_module, course_key, stream)
+            stream.finish()
+        except ExportCancelled:
+            log.info(u'Export of %s cancelled', course_key)
+        except Exception as exc:  # pylint: disable=broad-except
+            log.exception(u'There was an error exporting %s', course_key)
+            try:
+                stream.fail(exc)
+            except ExportCancelled:
+                pass
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=export, name=u'export {}'.format(course_key))
+    thread.daemon = True
+    thread.start()
+
+    response = StreamingHttpResponse(stream, content_type='application/x-tgz')
+    response['Content-Disposition'] = 'attachment; filename=%s' % (
+        course_module.url_name.encode('utf-8') + '.tar.gz'
+    )
+    return response
+
+
 def send_tarball(tarball):
     """
     Renders a tarball to response, for use when sending a tar.gz file to the user.
@@ -503,6 +647,8 @@ def export_handler(request, course_key_string):
     requested_format = request.GET.get('_accept', request.META.get('HTTP_ACCEPT', 'text/html'))
 
     if 'application/x-tgz' in requested_format:
+        if settings.COURSE_EXPORT_STREAMING:
+            return stream_export_tarball(courselike_module, course_key)
         try:
             tarball = create_export_tarball(courselike_module, course_key, context)
         except SerializationError:
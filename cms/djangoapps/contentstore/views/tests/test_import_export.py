@@ -3,6 +3,7 @@ Unit tests for course import and export
 """
 import copy
 import ddt
+import io
 import json
 import logging
 import lxml
@@ -556,6 +557,17 @@ class ExportTestCase(CourseTestCase):
         self.assertEquals(resp.status_code, 200)
         self.assertTrue(resp.get('Content-Disposition').startswith('attachment'))
 
+    @override_settings(COURSE_EXPORT_STREAMING=True)
+    def test_export_targz_streaming(self):
+        """
+        Get tar.gz file, streamed as it's generated.
+        """
+        resp = self.client.get(self.url, HTTP_ACCEPT='application/x-tgz')
+        self._verify_export_succeeded(resp)
+        self.assertTrue(resp.streaming)
+        tar_file = tarfile.open(fileobj=io.BytesIO(''.join(resp.streaming_content)))
+        self.assertIn(self.course.url_name + '/course.xml', tar_file.getnames())
+
     def test_export_failure_top_level(self):
         """
         Export failure.
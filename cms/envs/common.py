@@ -372,6 +372,7 @@ MIDDLEWARE_CLASSES = (
     'django.middleware.locale.LocaleMiddleware',
 
     'codejail.django_integration.ConfigureCodeJailMiddleware',
+    'util.sandboxing.ConfigureSandboxPoolMiddleware',
 
     # catches any uncaught RateLimitExceptions and returns a 403 instead of a 500
     'ratelimitbackend.middleware.RateLimitMiddleware',
@@ -452,6 +453,29 @@ MODULESTORE = {
 # require student context.
 MODULESTORE_FIELD_OVERRIDE_PROVIDERS = ()
 
+#################### Course structures ########################################
+
+# Codec used to serialize split course structures into the
+# "course_structure_cache": 'pickle' or 'marshal'.  Structures written by
+# either codec are read whichever is configured, so 'marshal' can be used once
+# every server sharing the cache can decode it.
+COURSE_STRUCTURE_CACHE_CODEC = 'pickle'
+
+#################### Course assets ############################################
+
+# On-disk cache of course assets too large for the "course_assets" cache.
+COURSE_ASSETS_FILE_CACHE = {
+    # Directory to store the files in.  None disables the cache.
+    'DIR': None,
+    # Maximum total size of the files, in bytes.
+    'MAX_SIZE': 1024 * 1024 * 1024,
+    # Header telling the web server to send the file itself: 'X-Sendfile'
+    # (Apache) or 'X-Accel-Redirect' (nginx).  None sends it from Django.
+    'SENDFILE_HEADER': None,
+    # For X-Accel-Redirect: the internal URL at which the web server serves DIR.
+    'SENDFILE_URL_PREFIX': None,
+}
+
 #################### Python sandbox ############################################
 
 CODE_JAIL = {
@@ -465,6 +489,17 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Pool of warm sandbox processes with the common modules already
+    # imported, used instead of starting a new sandbox for each execution.
+    'pool': {
+        # How many idle sandbox processes to keep?  0 disables the pool.
+        'size': 0,
+        # Replace a sandbox process after this many executions...
+        'max_executions': 100,
+        # ...or once it uses more than this many bytes of memory.
+        'max_memory': 256 * 1024 * 1024,
+    },
 }
 
 ############################ DJANGO_BUILTINS ################################
@@ -968,6 +1003,18 @@ TRACKING_BACKENDS = {
     }
 }
 
+# Send the events of the TRACKING_BACKENDS from a background thread, in
+# batches, rather than while handling requests.
+TRACKING_ASYNC = {
+    'ENABLED': False,
+    # Maximum number of events waiting to be sent, per backend.
+    'QUEUE_SIZE': 10000,
+    # Maximum number of events sent to a backend at once.
+    'BATCH_SIZE': 100,
+    # Seconds to wait for room in a full queue before dropping an event.
+    'PUT_TIMEOUT': 0.1,
+}
+
 # We're already logging events, and we don't want to capture user
 # names/passwords.  Heartbeat events are likely not interesting.
 TRACKING_IGNORE_URL_PATTERNS = [r'^/event', r'^/login', r'^/heartbeat']
@@ -1081,6 +1128,15 @@ MAX_ASSET_UPLOAD_FILE_SIZE_IN_MB = 10
 # a file that exceeds the above size
 MAX_ASSET_UPLOAD_FILE_SIZE_URL = ""
 
+### Number of threads importing the static files of imported courses, concurrently with
+### their blocks; 0 imports static files one at a time, before the blocks
+COURSE_IMPORT_STATIC_WORKERS = 0
+
+### Whether course exports are streamed to the browser as they're generated, rather than
+### generated into a temporary file first; errors then abort the download instead of being
+### reported on the export page
+COURSE_EXPORT_STREAMING = False
+
 ### Default value for entrance exam minimum score
 ENTRANCE_EXAM_MIN_SCORE_PCT = 50
 
@@ -1,11 +1,21 @@
 """
 Helper functions for caching course assets.
 """
+import errno
+import hashlib
+import logging
+import os
+import tempfile
+import uuid
+
+from django.conf import settings
 from django.core.cache import caches
 from django.core.cache.backends.base import InvalidCacheBackendError
 from opaque_keys import InvalidKeyError
 from xmodule.contentstore.content import STATIC_CONTENT_VERSION
 
+log = logging.getLogger(__name__)
+
 # See if there's a "course_assets" cache configured, and if not, fallback to the default cache.
 CONTENT_CACHE = caches['default']
 try:
@@ -47,3 +57,165 @@ def del_cached_content(location):
         pass
 
     CONTENT_CACHE.delete_many(locations, version=STATIC_CONTENT_VERSION)
+
+    bump_course_asset_version(location.course_key)
+
+
+def _course_asset_version_key(course_key):
+    """Returns the cache key of the asset version of the given course."""
+    return u"course_asset_version.{}".format(course_key).encode("utf-8")
+
+
+def get_course_asset_version(course_key):
+    """
+    Returns an opaque value which changes whenever any asset of the given
+    course changes, so that values derived from the assets can be cached
+    along with it.
+    """
+    key = _course_asset_version_key(course_key)
+    version = CONTENT_CACHE.get(key)
+    if version is None:
+        # Either nothing has been cached since the assets last changed, or
+        # the version has been evicted: either way, start a new version.
+        CONTENT_CACHE.add(key, uuid.uuid4().hex, None)
+        version = CONTENT_CACHE.get(key) or uuid.uuid4().hex
+    return version
+
+
+def bump_course_asset_version(course_key):
+    """
+    Changes the asset version of the given course, after any of its assets
+    changed.
+    """
+    CONTENT_CACHE.delete(_course_asset_version_key(course_key))
+
+
+class AssetFileCache(object):
+    """
+    On-disk cache of the contents of course assets, shared by all the
+    processes using the same directory.
+
+    Files are named after the location and content digest of the asset,
+    so a changed asset is never served from an old file.  The cache is
+    bounded by the total size of its files; the least recently used
+    (by modification time, which is touched on each use) are deleted
+    first.
+    """
+    def __init__(self, directory, max_size):
+        """
+        Arguments:
+            directory (str) - The directory to store files in.
+            max_size (int) - The maximum total size, in bytes, of the
+                files stored.
+        """
+        self.directory = directory
+        self.max_size = max_size
+        try:
+            os.makedirs(directory)
+        except OSError as exc:
+            if exc.errno != errno.EEXIST:
+                raise
+
+    def _prefix(self, location):
+        """
+        Returns the prefix of the names of the files of the given location.
+        """
+        return hashlib.sha1(unicode(location).encode("utf-8")).hexdigest() + "-"
+
+    def path(self, location, digest):
+        """
+        Returns the path of the file for the given location and digest.
+        """
+        return os.path.join(self.directory, self._prefix(location) + digest)
+
+    def get(self, location, digest):
+        """
+        Returns the file stored for the given location and digest, opened
+        for reading, or None if there isn't one.
+        """
+        path = self.path(location, digest)
+        try:
+            asset_file = open(path, "rb")
+        except IOError:
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            # The file was evicted meanwhile, but it's still ours to read.
+            pass
+        return asset_file
+
+    def set(self, location, digest, chunks):
+        """
+        Stores the content given as an iterable of chunks for the given
+        location and digest, replacing files of other digests of the same
+        location, and returns the new file opened for reading.
+        """
+        prefix = self._prefix(location)
+        path = os.path.join(self.directory, prefix + digest)
+        temp_fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(temp_fd, "wb") as temp_file:
+                for chunk in chunks:
+                    temp_file.write(chunk)
+            os.rename(temp_path, path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        asset_file = open(path, "rb")
+
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name != prefix + digest:
+                self._remove(os.path.join(self.directory, name))
+        self.evict()
+        return asset_file
+
+    def evict(self):
+        """
+        Deletes the least recently used files until the total size of the
+        files is within max_size.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.startswith("."):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for __, size, __ in entries)
+        for __, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            self._remove(path)
+            total_size -= size
+
+    def _remove(self, path):
+        """
+        Deletes the given file, unless another process already did.
+        """
+        try:
+            os.remove(path)
+        except OSError as exc:
+            if exc.errno != errno.ENOENT:
+                log.exception(u"Couldn't remove cached asset file %s", path)
+
+
+_ASSET_FILE_CACHE = None
+
+
+def get_asset_file_cache():
+    """
+    Returns the on-disk asset cache configured by settings.COURSE_ASSETS_FILE_CACHE,
+    or None if it is disabled.
+    """
+    global _ASSET_FILE_CACHE  # pylint: disable=global-statement
+    config = getattr(settings, 'COURSE_ASSETS_FILE_CACHE', {})
+    if not config.get('DIR'):
+        return None
+    if _ASSET_FILE_CACHE is None or _ASSET_FILE_CACHE.directory != config['DIR']:
+        _ASSET_FILE_CACHE = AssetFileCache(config['DIR'], config['MAX_SIZE'])
+    return _ASSET_FILE_CACHE
@@ -2,22 +2,26 @@
 Middleware to serve assets.
 """
 
+import calendar
 import logging
 import datetime
+import os
 import newrelic.agent
+from django.conf import settings
 from django.http import (
-    HttpResponse, HttpResponseNotModified, HttpResponseForbidden,
+    FileResponse, HttpResponse, HttpResponseNotModified, HttpResponseForbidden,
     HttpResponseBadRequest, HttpResponseNotFound, HttpResponsePermanentRedirect)
+from django.utils.http import parse_http_date_safe
 from student.models import CourseEnrollment
 from contentserver.models import CourseAssetCacheTtlConfig, CdnUserAgentsConfig
 
 from header_control import force_header_for_response
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
+from xmodule.contentstore.content import StaticContent, StaticContentStream, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
-from .caching import get_cached_content, set_cached_content
+from .caching import get_asset_file_cache, get_cached_content, set_cached_content
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.exceptions import NotFoundError
 
@@ -27,6 +31,12 @@ from xmodule.exceptions import NotFoundError
 log = logging.getLogger(__name__)
 HTTP_DATE_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
 
+# Assets smaller than this are cached in memory (memcached); larger ones, on disk.
+MAX_CACHED_CONTENT_SIZE = 1048576
+
+# Size of the chunks read from files in the on-disk cache.
+FILE_CHUNK_SIZE = 65536
+
 
 class StaticContentServer(object):
     """
@@ -101,12 +111,25 @@ class StaticContentServer(object):
                 return HttpResponseForbidden('Unauthorized')
 
             # Figure out if the client sent us a conditional request, and let them know
-            # if this asset has changed since then.
-            last_modified_at_str = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
-                if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
-                if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
+            # if this asset has changed since then.  This only needs the asset's
+            # metadata, so it's done before the asset's data is loaded.
+            if self.is_not_modified(request, content):
+                response = HttpResponseNotModified()
+                self.set_caching_headers(content, response)
+                return response
+
+            # A Range is only honored if the If-Range, if any, matches the asset.
+            range_header = request.META.get('HTTP_RANGE')
+            range_ignored = bool(range_header) and not self.is_range_current(request, content)
+            if range_ignored:
+                range_header = None
+
+            # Now that we know the data is needed, load it.
+            content = self.load_asset_data(content)
+
+            # Large assets are served from the on-disk cache, if it's enabled.
+            asset_file = self.load_asset_file(loc, content)
+            sendfile_header = settings.COURSE_ASSETS_FILE_CACHE.get('SENDFILE_HEADER')
 
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
@@ -115,12 +138,18 @@ class StaticContentServer(object):
             # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
-            if request.META.get('HTTP_RANGE'):
+            if asset_file is not None and sendfile_header and not range_ignored:
+                # Let the web server send the file, and handle any Range itself.
+                response = HttpResponse()
+                response[sendfile_header] = self.get_sendfile_value(asset_file.name)
+                asset_file.close()
+                newrelic.agent.add_custom_parameter('contentserver.sendfile', True)
+            elif range_header:
                 # If we have a StaticContent, get a StaticContentStream.  Can't manipulate the bytes otherwise.
-                if type(content) == StaticContent:
+                if asset_file is None and type(content) == StaticContent:
                     content = AssetManager.find(loc, as_stream=True)
 
-                header_value = request.META['HTTP_RANGE']
+                header_value = range_header
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
                 except ValueError as exception:
@@ -144,7 +173,10 @@ class StaticContentServer(object):
 
                         if 0 <= first <= last < content.length:
                             # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
+                            if asset_file is not None:
+                                response = HttpResponse(stream_file_in_range(asset_file, first, last))
+                            else:
+                                response = HttpResponse(content.stream_data_in_range(first, last))
                             response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
@@ -156,11 +188,17 @@ class StaticContentServer(object):
                             log.warning(
                                 u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
                             )
+                            if asset_file is not None:
+                                asset_file.close()
                             return HttpResponse(status=416)  # Requested Range Not Satisfiable
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                if asset_file is not None:
+                    asset_file.seek(0)
+                    response = FileResponse(asset_file)
+                else:
+                    response = HttpResponse(content.stream_data())
                 response['Content-Length'] = content.length
 
             newrelic.agent.add_custom_parameter('contentserver.content_len', content.length)
@@ -203,6 +241,10 @@ class StaticContentServer(object):
 
         response['Last-Modified'] = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
 
+        etag = self.get_etag(content)
+        if etag:
+            response['ETag'] = etag
+
         # Force the Vary header to only vary responses on Origin, so that XHR and browser requests get cached
         # separately and don't screw over one another. i.e. a browser request that doesn't send Origin, and
         # caches a version of the response without CORS headers, in turn breaking XHR requests.
@@ -230,6 +272,56 @@ class StaticContentServer(object):
         expire_dt = now + datetime.timedelta(seconds=cache_ttl)
         return expire_dt.strftime(HTTP_DATE_FORMAT)
 
+    @staticmethod
+    def get_etag(content):
+        """
+        Returns the strong ETag of the given content, made from its digest, or None
+        if the content has no digest.
+        """
+        digest = getattr(content, "content_digest", None)
+        return '"{}"'.format(digest) if digest else None
+
+    def is_not_modified(self, request, content):
+        """
+        Determines whether the conditional headers of the request (If-None-Match, or
+        If-Modified-Since in its absence) show that the client has the current
+        version of the given content.
+        """
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            etag = self.get_etag(content)
+            if etag is None:
+                return False
+            if if_none_match.strip() == '*':
+                return True
+            # If-None-Match uses the weak comparison: W/ prefixes are ignored.
+            etags = [tag.strip() for tag in if_none_match.split(',')]
+            return any((tag[2:] if tag.startswith('W/') else tag) == etag for tag in etags)
+
+        if_modified_since = request.META.get('HTTP_IF_MODIFIED_SINCE')
+        if if_modified_since is not None:
+            if_modified_since = parse_http_date_safe(if_modified_since)
+            if if_modified_since is None:
+                return False
+            return calendar.timegm(content.last_modified_at.utctimetuple()) <= if_modified_since
+
+        return False
+
+    def is_range_current(self, request, content):
+        """
+        Determines whether the If-Range header of the request, if any, matches the
+        given content, so that the requested range should be sent, rather than the
+        whole content.
+        """
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith('"') or if_range.startswith('W/'):
+            # If-Range uses the strong comparison: weak ETags never match.
+            return if_range == self.get_etag(content)
+        return if_range == content.last_modified_at.strftime(HTTP_DATE_FORMAT)
+
     def is_content_locked(self, content):
         """
         Determines whether or not the given content is locked.
@@ -259,6 +351,9 @@ class StaticContentServer(object):
         """
         Loads an asset based on its location, either retrieving it from a cache
         or loading it directly from the contentstore.
+
+        Assets loaded from the contentstore are returned as streams, whose
+        data hasn't been read yet; see `load_asset_data`.
         """
 
         # See if we can load this item from cache.
@@ -270,15 +365,72 @@ class StaticContentServer(object):
             except (ItemNotFoundError, NotFoundError):
                 raise
 
-            # Now that we fetched it, let's go ahead and try to cache it. We cap this at 1MB
-            # because it's the default for memcached and also we don't want to do too much
-            # buffering in memory when we're serving an actual request.
-            if content.length is not None and content.length < 1048576:
+        return content
+
+    def load_asset_data(self, content):
+        """
+        Loads the data of the given asset, as loaded by `load_asset_from_location`,
+        if it's small enough to be cached, and caches it.  Larger assets are left
+        as streams.
+        """
+        # Let's go ahead and try to cache it. We cap this at 1MB because it's the
+        # default for memcached and also we don't want to do too much buffering in
+        # memory when we're serving an actual request.
+        if isinstance(content, StaticContentStream):
+            if content.length is not None and content.length < MAX_CACHED_CONTENT_SIZE:
                 content = content.copy_to_in_mem()
                 set_cached_content(content)
 
         return content
 
+    def load_asset_file(self, location, content):
+        """
+        Returns the file holding the given (large) asset in the on-disk cache,
+        opened for reading, storing the asset there first if needed.  Returns
+        None if the on-disk cache is disabled or the asset isn't stored there.
+        """
+        asset_file_cache = get_asset_file_cache()
+        digest = getattr(content, "content_digest", None)
+        if asset_file_cache is None or not digest or not isinstance(content, StaticContentStream):
+            return None
+
+        asset_file = asset_file_cache.get(location, digest)
+        newrelic.agent.add_custom_parameter('contentserver.file_cache_hit', asset_file is not None)
+        if asset_file is None:
+            # If storing the asset fails, the content is still served: it's
+            # streamed from its start again.
+            try:
+                asset_file = asset_file_cache.set(location, digest, content.stream_data())
+            except (IOError, OSError):
+                log.exception(u"Couldn't store asset %s in the file cache", unicode(location))
+        return asset_file
+
+    def get_sendfile_value(self, path):
+        """
+        Returns the value of the sendfile header telling the web server to send
+        the file at the given path: the path itself, or, if a URL prefix is
+        configured (nginx's X-Accel-Redirect), the URL of the file.
+        """
+        url_prefix = settings.COURSE_ASSETS_FILE_CACHE.get('SENDFILE_URL_PREFIX')
+        if url_prefix:
+            return url_prefix.rstrip('/') + '/' + os.path.basename(path)
+        return path
+
+
+def stream_file_in_range(asset_file, first_byte, last_byte):
+    """
+    Stream the data of the file between first_byte and last_byte (included).
+    """
+    with asset_file:
+        asset_file.seek(first_byte)
+        remaining = last_byte - first_byte + 1
+        while remaining > 0:
+            chunk = asset_file.read(min(remaining, FILE_CHUNK_SIZE))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
 
 def parse_range_header(header_value, content_length):
     """
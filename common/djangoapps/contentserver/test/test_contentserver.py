@@ -6,6 +6,9 @@ import copy
 import datetime
 import ddt
 import logging
+import os
+import shutil
+import tempfile
 import unittest
 from uuid import uuid4
 
@@ -24,6 +27,7 @@ from xmodule.assetstore.assetmgr import AssetManager
 from opaque_keys import InvalidKeyError
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
+from contentserver.caching import AssetFileCache
 from contentserver.middleware import parse_range_header, HTTP_DATE_FORMAT, StaticContentServer
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory, AdminFactory
@@ -99,6 +103,7 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
         cls.url_unlocked_versioned = get_versioned_asset_url(cls.url_unlocked)
         cls.url_unlocked_versioned_old_style = get_old_style_versioned_asset_url(cls.url_unlocked)
         cls.length_unlocked = cls.contentstore.get_attr(cls.unlocked_asset, 'length')
+        cls.digest_unlocked = cls.contentstore.get_attr(cls.unlocked_asset, 'md5')
 
     def setUp(self):
         """
@@ -293,6 +298,149 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertEquals('Origin', resp['Vary'])
 
+    def test_etag(self):
+        """
+        Tests that assets are sent with an ETag made from their digest.
+        """
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp['ETag'], '"{}"'.format(self.digest_unlocked))
+
+    @ddt.data(
+        ('"{digest}"', 304),
+        ('W/"{digest}"', 304),
+        ('"other", "{digest}"', 304),
+        ('*', 304),
+        ('"other"', 200),
+    )
+    @ddt.unpack
+    def test_if_none_match(self, header_value, status_code):
+        """
+        Tests that If-None-Match is honored.
+        """
+        resp = self.client.get(
+            self.url_unlocked, HTTP_IF_NONE_MATCH=header_value.format(digest=self.digest_unlocked)
+        )
+        self.assertEqual(resp.status_code, status_code)
+        self.assertEqual(resp['ETag'], '"{}"'.format(self.digest_unlocked))
+
+    def test_if_modified_since(self):
+        """
+        Tests that If-Modified-Since is honored, unless there's an If-None-Match.
+        """
+        last_modified = self.client.get(self.url_unlocked)['Last-Modified']
+        resp = self.client.get(self.url_unlocked, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(resp.status_code, 304)
+        resp = self.client.get(self.url_unlocked, HTTP_IF_MODIFIED_SINCE='Sat, 01 Jan 2000 00:00:00 GMT')
+        self.assertEqual(resp.status_code, 200)
+        resp = self.client.get(self.url_unlocked, HTTP_IF_MODIFIED_SINCE=last_modified, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(resp.status_code, 200)
+
+    @patch('contentserver.middleware.AssetManager.find')
+    def test_not_modified_without_loading_data(self, mock_find):
+        """
+        Tests that checking whether an asset was modified doesn't read its data.
+        """
+        stream = AssetManager.find(self.unlocked_asset, as_stream=True)
+        mock_find.return_value = stream
+        with patch.object(stream, 'copy_to_in_mem') as mock_copy_to_in_mem:
+            with patch('contentserver.middleware.get_cached_content', return_value=None):
+                resp = self.client.get(
+                    self.url_unlocked, HTTP_IF_NONE_MATCH='"{}"'.format(self.digest_unlocked)
+                )
+        self.assertEqual(resp.status_code, 304)
+        self.assertFalse(mock_copy_to_in_mem.called)
+
+    @ddt.data(
+        ('"{digest}"', 206),
+        ('W/"{digest}"', 200),
+        ('"other"', 200),
+        ('Sat, 01 Jan 2000 00:00:00 GMT', 200),
+    )
+    @ddt.unpack
+    def test_if_range(self, header_value, status_code):
+        """
+        Tests that a Range is only honored if the If-Range matches the asset.
+        """
+        resp = self.client.get(
+            self.url_unlocked, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE=header_value.format(digest=self.digest_unlocked)
+        )
+        self.assertEqual(resp.status_code, status_code)
+
+    def test_if_range_last_modified(self):
+        """
+        Tests that a Range is honored if the If-Range is the asset's modification date.
+        """
+        last_modified = self.client.get(self.url_unlocked)['Last-Modified']
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE=last_modified)
+        self.assertEqual(resp.status_code, 206)
+
+    def _file_cache_settings(self, **kwargs):
+        """
+        Returns settings enabling the on-disk asset cache in a new directory.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        file_cache_settings = dict(settings.COURSE_ASSETS_FILE_CACHE, DIR=directory)
+        file_cache_settings.update(kwargs)
+        return file_cache_settings
+
+    @patch('contentserver.middleware.get_cached_content', return_value=None)
+    @patch('contentserver.middleware.MAX_CACHED_CONTENT_SIZE', 0)
+    def test_file_cache(self, __):
+        """
+        Tests that large assets are stored in, and served from, the on-disk cache.
+        """
+        file_cache_settings = self._file_cache_settings()
+        data = self.contentstore.find(self.unlocked_asset).data
+        with override_settings(COURSE_ASSETS_FILE_CACHE=file_cache_settings):
+            for __ in range(2):
+                resp = self.client.get(self.url_unlocked)
+                self.assertEqual(resp.status_code, 200)
+                self.assertEqual(''.join(resp.streaming_content), data)
+                self.assertEqual(len(os.listdir(file_cache_settings['DIR'])), 1)
+
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=2-5')
+            self.assertEqual(resp.status_code, 206)
+            self.assertEqual(resp.content, data[2:6])
+
+    @patch('contentserver.middleware.get_cached_content', return_value=None)
+    @patch('contentserver.middleware.MAX_CACHED_CONTENT_SIZE', 0)
+    def test_file_cache_store_failure(self, __):
+        """
+        Tests that an asset which couldn't be stored in the on-disk cache is served whole.
+        """
+        def failing_set(location, digest, chunks):  # pylint: disable=unused-argument
+            """
+            Reads part of the asset, and fails.
+            """
+            next(iter(chunks))
+            raise IOError()
+
+        file_cache_settings = self._file_cache_settings()
+        data = self.contentstore.find(self.unlocked_asset).data
+        with override_settings(COURSE_ASSETS_FILE_CACHE=file_cache_settings):
+            with patch('contentserver.caching.AssetFileCache.set', side_effect=failing_set):
+                resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(''.join(resp.streaming_content), data)
+
+    @patch('contentserver.middleware.get_cached_content', return_value=None)
+    @patch('contentserver.middleware.MAX_CACHED_CONTENT_SIZE', 0)
+    def test_file_cache_sendfile(self, __):
+        """
+        Tests that the web server is asked to send files of the on-disk cache, if configured.
+        """
+        file_cache_settings = self._file_cache_settings(
+            SENDFILE_HEADER='X-Accel-Redirect', SENDFILE_URL_PREFIX='/assets_cache/'
+        )
+        with override_settings(COURSE_ASSETS_FILE_CACHE=file_cache_settings):
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.content, '')
+        self.assertEqual(
+            resp['X-Accel-Redirect'], '/assets_cache/' + os.listdir(file_cache_settings['DIR'])[0]
+        )
+
     @patch('contentserver.models.CourseAssetCacheTtlConfig.get_cache_ttl')
     def test_cache_headers_with_ttl_unlocked(self, mock_get_cache_ttl):
         """
@@ -402,6 +550,37 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
         self.assertEqual(is_from_cdn, True)
 
 
+class AssetFileCacheTestCase(unittest.TestCase):
+    """
+    Tests for AssetFileCache.
+    """
+    def setUp(self):
+        super(AssetFileCacheTestCase, self).setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.cache = AssetFileCache(directory, 10)
+
+    def test_get_set(self):
+        self.assertIsNone(self.cache.get('a', 'digest1'))
+        self.assertEqual(self.cache.set('a', 'digest1', ['abc', 'def']).read(), 'abcdef')
+        self.assertEqual(self.cache.get('a', 'digest1').read(), 'abcdef')
+        # A new version replaces the old one.
+        self.cache.set('a', 'digest2', ['ghi'])
+        self.assertIsNone(self.cache.get('a', 'digest1'))
+        self.assertEqual(self.cache.get('a', 'digest2').read(), 'ghi')
+
+    def test_lru_eviction(self):
+        self.cache.set('a', 'digest', ['1234'])
+        self.cache.set('b', 'digest', ['1234'])
+        os.utime(self.cache.path('a', 'digest'), (0, 0))
+        os.utime(self.cache.path('b', 'digest'), (1, 1))
+        self.cache.get('a', 'digest')
+        self.cache.set('c', 'digest', ['1234'])
+        self.assertIsNone(self.cache.get('b', 'digest'))
+        self.assertIsNotNone(self.cache.get('a', 'digest'))
+        self.assertIsNotNone(self.cache.get('c', 'digest'))
+
+
 @ddt.ddt
 class ParseRangeHeaderTestCase(unittest.TestCase):
     """
@@ -1,10 +1,13 @@
 import logging
 import re
+from collections import OrderedDict
+from threading import RLock
 
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.contrib.staticfiles import finders
 from django.conf import settings
 
+from contentserver.caching import get_course_asset_version
 from static_replace.models import AssetBaseUrlConfig, AssetExcludedExtensionsConfig
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore import ModuleStoreEnum
@@ -15,6 +18,13 @@ from opaque_keys.edx.locator import AssetLocator
 log = logging.getLogger(__name__)
 XBLOCK_STATIC_RESOURCE_PREFIX = '/static/xblock'
 
+# Maximum number of compiled url patterns kept, one per data directory and
+# kind of urls replaced.
+MAX_COMPILED_URL_PATTERNS = 1000
+
+# Maximum number of canonicalized asset paths kept.
+MAX_CANONICALIZED_ASSET_PATHS = 10000
+
 
 def _url_replace_regex(prefix):
     """
@@ -68,12 +78,7 @@ def replace_jump_to_id_urls(text, course_id, jump_to_id_base_url):
     output: <text> after the link rewriting rules are applied
     """
 
-    def replace_jump_to_id_url(match):
-        quote = match.group('quote')
-        rest = match.group('rest')
-        return "".join([quote, jump_to_id_base_url + rest, quote])
-
-    return re.sub(_url_replace_regex('/jump_to_id/'), replace_jump_to_id_url, text)
+    return replace_urls(text, course_id, static_urls=False, jump_to_id_base_url=jump_to_id_base_url)
 
 
 def replace_course_urls(text, course_key):
@@ -86,14 +91,20 @@ def replace_course_urls(text, course_key):
     returns: text with the links replaced
     """
 
-    course_id = course_key.to_deprecated_string()
+    return replace_urls(text, course_key, static_urls=False, course_urls=True)
 
-    def replace_course_url(match):
-        quote = match.group('quote')
-        rest = match.group('rest')
-        return "".join([quote, '/courses/' + course_id + '/', rest, quote])
 
-    return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
+def _is_xblock_resource_url(full_url):
+    """
+    Returns whether a static url is an XBlock resource link, which mustn't be
+    rewritten.
+    """
+    # Probably wasn't a good idea that /static works for actual static assets
+    # and for magical course asset URLs....
+    starts_with_static_url = full_url.startswith(unicode(settings.STATIC_URL))
+    starts_with_prefix = full_url.startswith(XBLOCK_STATIC_RESOURCE_PREFIX)
+    contains_prefix = XBLOCK_STATIC_RESOURCE_PREFIX in full_url
+    return starts_with_prefix or (starts_with_static_url and contains_prefix)
 
 
 def process_static_urls(text, replacement_function, data_dir=None):
@@ -111,14 +122,7 @@ def process_static_urls(text, replacement_function, data_dir=None):
         quote = match.group('quote')
         rest = match.group('rest')
 
-        # Don't rewrite XBlock resource links.  Probably wasn't a good idea that /static
-        # works for actual static assets and for magical course asset URLs....
-        full_url = prefix + rest
-
-        starts_with_static_url = full_url.startswith(unicode(settings.STATIC_URL))
-        starts_with_prefix = full_url.startswith(XBLOCK_STATIC_RESOURCE_PREFIX)
-        contains_prefix = XBLOCK_STATIC_RESOURCE_PREFIX in full_url
-        if starts_with_prefix or (starts_with_static_url and contains_prefix):
+        if _is_xblock_resource_url(prefix + rest):
             return original
 
         return replacement_function(original, prefix, quote, rest)
@@ -162,8 +166,98 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
     course_id: The course identifier used to distinguish static content for this course in studio
     static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
     """
+    return replace_urls(text, course_id, data_directory=data_directory, static_asset_path=static_asset_path)
+
+
+def replace_urls(text, course_id, data_directory=None, static_asset_path='', static_urls=True, course_urls=False,
+                 jump_to_id_base_url=None):
+    """
+    Replace any of /static/, /course/ and /jump_to_id/ urls, as replace_static_urls,
+    replace_course_urls and replace_jump_to_id_urls do, in a single pass over the text.
 
-    def replace_static_url(original, prefix, quote, rest):
+    text: The source text to do the substitution in
+    course_id: The course in which this rewrite happens
+    data_directory, static_asset_path: As for replace_static_urls
+    static_urls: Whether to replace /static/ urls
+    course_urls: Whether to replace /course/ urls
+    jump_to_id_base_url: As for replace_jump_to_id_urls; /jump_to_id/ urls are replaced
+        if not None
+    """
+    regex = _compiled_url_regex(
+        static_urls, static_asset_path or data_directory, course_urls, jump_to_id_base_url is not None
+    )
+    if regex is None:
+        return text
+
+    replace_static_url = _StaticUrlReplacer(data_directory, course_id, static_asset_path)
+
+    def replace_url(match):
+        """
+        Replace a single matched url, according to its kind.
+        """
+        prefix = match.group('prefix')
+        quote = match.group('quote')
+        rest = match.group('rest')
+        if jump_to_id_base_url is not None and prefix == '/jump_to_id/':
+            return "".join([quote, jump_to_id_base_url + rest, quote])
+        if course_urls and prefix == '/course/':
+            return "".join([quote, '/courses/' + course_id.to_deprecated_string() + '/', rest, quote])
+
+        original = match.group(0)
+        if _is_xblock_resource_url(prefix + rest):
+            return original
+        return replace_static_url(original, prefix, quote, rest)
+
+    return regex.sub(replace_url, text)
+
+
+_COMPILED_URL_PATTERNS = {}
+
+
+def _compiled_url_regex(static_urls, data_dir, course_urls, jump_to_id_urls):
+    """
+    Returns the compiled regex matching all the kinds of urls to replace, or
+    None if there is nothing to replace.  The regexes are compiled once per
+    data directory and kinds of urls.
+    """
+    key = (settings.STATIC_URL, static_urls, data_dir, course_urls, jump_to_id_urls)
+    regex = _COMPILED_URL_PATTERNS.get(key)
+    if regex is not None:
+        return regex
+
+    prefixes = []
+    if static_urls:
+        prefixes.append(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
+            static_url=settings.STATIC_URL,
+            data_dir=data_dir
+        ))
+    if course_urls:
+        prefixes.append(u'/course/')
+    if jump_to_id_urls:
+        prefixes.append(u'/jump_to_id/')
+    if not prefixes:
+        return None
+
+    regex = re.compile(_url_replace_regex(u'|'.join(prefixes)))
+    if len(_COMPILED_URL_PATTERNS) >= MAX_COMPILED_URL_PATTERNS:
+        _COMPILED_URL_PATTERNS.clear()
+    _COMPILED_URL_PATTERNS[key] = regex
+    return regex
+
+
+class _StaticUrlReplacer(object):
+    """
+    Replaces single static urls for replace_static_urls.  The asset settings
+    and the course's asset version are only looked up once, for the first url
+    which needs them.
+    """
+    def __init__(self, data_directory, course_id, static_asset_path):
+        self.data_directory = data_directory
+        self.course_id = course_id
+        self.static_asset_path = static_asset_path
+        self._asset_settings = None
+
+    def __call__(self, original, prefix, quote, rest):
         """
         Replace a single matched url.
         """
@@ -175,7 +269,7 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
         if settings.DEBUG and finders.find(rest, True):
             return original
         # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) and course_id:
+        elif (not self.static_asset_path) and self.course_id:
             # first look in the static file pipeline and see if we are trying to reference
             # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
 
@@ -191,16 +285,14 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
             else:
                 # if not, then assume it's courseware specific content and then look in the
                 # Mongo-backed database
-                base_url = AssetBaseUrlConfig.get_base_url()
-                excluded_exts = AssetExcludedExtensionsConfig.get_excluded_extensions()
-                url = StaticContent.get_canonicalized_asset_path(course_id, rest, base_url, excluded_exts)
+                url = self._canonicalized_asset_path(rest)
 
                 if AssetLocator.CANONICAL_NAMESPACE in url:
                     url = url.replace('block@', 'block/', 1)
 
         # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
         else:
-            course_path = "/".join((static_asset_path or data_directory, rest))
+            course_path = "/".join((self.static_asset_path or self.data_directory, rest))
 
             try:
                 if staticfiles_storage.exists(rest):
@@ -215,4 +307,69 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
 
         return "".join([quote, url, quote])
 
-    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+    def _canonicalized_asset_path(self, path):
+        """
+        Returns the canonicalized path of the course asset at `path`, as
+        computed by StaticContent.get_canonicalized_asset_path.
+        """
+        if self._asset_settings is None:
+            self._asset_settings = (
+                get_course_asset_version(self.course_id),
+                AssetBaseUrlConfig.get_base_url(),
+                AssetExcludedExtensionsConfig.get_excluded_extensions(),
+            )
+        asset_version, base_url, excluded_exts = self._asset_settings
+
+        key = (self.course_id, asset_version, path, base_url, tuple(excluded_exts))
+        url = CANONICALIZED_ASSET_PATHS.get(key)
+        if url is None:
+            url = StaticContent.get_canonicalized_asset_path(self.course_id, path, base_url, excluded_exts)
+            CANONICALIZED_ASSET_PATHS.set(key, url)
+        return url
+
+
+class CanonicalizedAssetPathCache(object):
+    """
+    Process-wide LRU cache of canonicalized asset paths.  Paths are cached
+    along with the asset version of their course, so that they are no longer
+    used once any asset of the course changes.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, key):
+        """
+        Returns the path cached under `key`, or None.
+        """
+        with self._lock:
+            url = self._entries.pop(key, None)
+            if url is None:
+                self.misses += 1
+                return None
+            self._entries[key] = url
+            self.hits += 1
+            return url
+
+    def set(self, key, url):
+        """
+        Caches the path `url` under `key`.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = url
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all the cached paths.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+CANONICALIZED_ASSET_PATHS = CanonicalizedAssetPathCache(MAX_CANONICALIZED_ASSET_PATHS)
@@ -11,8 +11,10 @@ from PIL import Image
 from cStringIO import StringIO
 from nose.tools import assert_equals, assert_true, assert_false  # pylint: disable=no-name-in-module
 from static_replace import (
+    CANONICALIZED_ASSET_PATHS,
     replace_static_urls,
     replace_course_urls,
+    replace_urls,
     _url_replace_regex,
     process_static_urls,
     make_static_urls_absolute
@@ -136,6 +138,50 @@ def test_mongo_filestore(mock_get_excluded_extensions, mock_get_base_url, mock_m
     mock_static_content.get_canonicalized_asset_path.assert_called_once_with(COURSE_KEY, 'file.png', u'', ['foobar'])
 
 
+@patch('static_replace.staticfiles_storage', autospec=True)
+def test_replace_urls(mock_storage):
+    mock_storage.exists.return_value = False
+    mock_storage.url.return_value = '/static/data_dir/file.png'
+
+    text = '"/static/file.png" \'/course/file.png\' "/jump_to_id/block" "/static/data_dir/file.png"'
+    assert_equals(
+        '"/static/data_dir/file.png" \'/courses/org/course/run/file.png\' "/base/block" "/static/data_dir/file.png"',
+        replace_urls(text, COURSE_KEY, static_asset_path=DATA_DIRECTORY, course_urls=True, jump_to_id_base_url='/base/')
+    )
+
+    # Each kind of url is only replaced when asked for
+    assert_equals(
+        '"/static/file.png" \'/courses/org/course/run/file.png\' "/jump_to_id/block" "/static/data_dir/file.png"',
+        replace_urls(text, COURSE_KEY, DATA_DIRECTORY, static_urls=False, course_urls=True)
+    )
+    assert_equals(text, replace_urls(text, COURSE_KEY, DATA_DIRECTORY, static_urls=False))
+
+
+@patch('static_replace.StaticContent', autospec=True)
+@patch('static_replace.get_course_asset_version')
+@patch('static_replace.AssetBaseUrlConfig.get_base_url')
+@patch('static_replace.AssetExcludedExtensionsConfig.get_excluded_extensions')
+def test_canonicalized_asset_paths_are_cached(mock_get_excluded_extensions, mock_get_base_url,
+                                              mock_get_course_asset_version, mock_static_content):
+    CANONICALIZED_ASSET_PATHS.clear()
+    mock_static_content.get_canonicalized_asset_path.return_value = "/c4x/mock_url"
+    mock_get_base_url.return_value = u''
+    mock_get_excluded_extensions.return_value = ['foobar']
+    mock_get_course_asset_version.return_value = 'version1'
+
+    text = STATIC_SOURCE + STATIC_SOURCE
+    for __ in range(2):
+        assert_equals('"/c4x/mock_url""/c4x/mock_url"', replace_static_urls(text, DATA_DIRECTORY, course_id=COURSE_KEY))
+    mock_static_content.get_canonicalized_asset_path.assert_called_once_with(COURSE_KEY, 'file.png', u'', ['foobar'])
+    # The asset settings are looked up once per replacement
+    assert_equals(mock_get_course_asset_version.call_count, 2)
+
+    # A change to the course's assets means the path has to be computed again
+    mock_get_course_asset_version.return_value = 'version2'
+    replace_static_urls(text, DATA_DIRECTORY, course_id=COURSE_KEY)
+    assert_equals(mock_static_content.get_canonicalized_asset_path.call_count, 2)
+
+
 @patch('static_replace.settings', autospec=True)
 @patch('static_replace.modulestore', autospec=True)
 @patch('static_replace.staticfiles_storage', autospec=True)
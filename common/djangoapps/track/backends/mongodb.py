@@ -89,7 +89,7 @@ class MongoBackend(BaseBackend):
     def send(self, event):
         """Insert the event in to the Mongo collection"""
         try:
-            self.collection.insert(event, manipulate=False)
+            self._insert(event)
         except (PyMongoError, BSONError):
             # The event will be lost in case of a connection error or any error
             # that occurs when trying to insert the event into Mongo.
@@ -97,3 +97,17 @@ class MongoBackend(BaseBackend):
             # during the next event.
             msg = 'Error inserting to MongoDB event tracker backend'
             log.exception(msg)
+
+    def send_many(self, events):
+        """
+        Insert the events in to the Mongo collection, at once.  Unlike
+        `send`, errors are raised, so that the caller can account for the
+        lost events.
+        """
+        self._insert(events)
+
+    def _insert(self, doc_or_docs):
+        """Insert an event, or a list of events, in to the Mongo collection"""
+        # Unlike insert_many, insert(manipulate=False) doesn't add an _id
+        # to the events, which may be shared with other backends.
+        self.collection.insert(doc_or_docs, manipulate=False)
@@ -0,0 +1,151 @@
+"""
+Event tracker backend that sends events to another backend from a background
+thread, in batches.
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import threading
+import time
+from Queue import Queue, Empty, Full
+
+from django.db import close_old_connections
+from dogapi import dog_stats_api
+
+from track.backends import BaseBackend
+
+
+log = logging.getLogger(__name__)
+
+
+class QueuedBackend(BaseBackend):
+    """
+    Event tracker backend that queues events, and sends them to another
+    backend from a background thread.
+
+    The queue is bounded: when it's full, `send` waits up to `put_timeout`
+    seconds for room, and then drops the event.  The thread sends all the
+    events queued by the time it's done with the previous batch, up to
+    `batch_size` at once, using the backend's `send_many`.
+
+    The numbers of events sent, dropped, and lost to errors of the backend
+    are counted in `sent`, `dropped` and `failed`.
+    """
+
+    def __init__(self, backend, name='default', queue_size=10000, batch_size=100, put_timeout=0.1, **kwargs):
+        """
+        :Parameters:
+
+          - `backend`: the backend to send the events to
+          - `name`: the name of the backend, used in metrics
+          - `queue_size`: the maximum number of events queued
+          - `batch_size`: the maximum number of events sent at once
+          - `put_timeout`: the number of seconds `send` waits for room in
+            a full queue before dropping an event
+
+        """
+        super(QueuedBackend, self).__init__(**kwargs)
+        self.backend = backend
+        self.name = name
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+        atexit.register(self.flush, timeout=5)
+
+    def send(self, event):
+        """Queue the event to be sent by the background thread."""
+        queue = self._get_queue()
+        try:
+            if self.put_timeout:
+                queue.put(event, timeout=self.put_timeout)
+            else:
+                queue.put_nowait(event)
+        except Full:
+            self.dropped += 1
+            dog_stats_api.increment('track.send.dropped', tags=['backend:{}'.format(self.name)])
+
+    def flush(self, timeout=None):
+        """
+        Wait until all the queued events have been sent, or for `timeout`
+        seconds.  Returns whether all the events have been sent.
+        """
+        queue = self._queue
+        if queue is None or self._pid != os.getpid():
+            return True
+
+        deadline = time.time() + timeout if timeout is not None else None
+        with queue.all_tasks_done:
+            while queue.unfinished_tasks:
+                if deadline is None:
+                    queue.all_tasks_done.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return False
+                    queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _get_queue(self):
+        """
+        Returns the queue, starting the background thread if it isn't
+        running in this process.
+        """
+        if self._pid == os.getpid():
+            return self._queue
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # Any queue and thread we have belong to the process we've
+                # been forked from.
+                self._queue = Queue(self.queue_size)
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name='track-{}'.format(self.name)
+                )
+                self._thread.daemon = True
+                self._thread.start()
+                self._pid = os.getpid()
+        return self._queue
+
+    def _run(self, queue):
+        """Send the queued events, as long as the process runs."""
+        while True:
+            batch = [queue.get()]
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(queue.get_nowait())
+            except Empty:
+                pass
+
+            self._send_batch(batch)
+            for _ in batch:
+                queue.task_done()
+
+    def _send_batch(self, batch):
+        """Send a batch of events to the backend."""
+        dog_stats_api.histogram('track.send.batch_size', len(batch), tags=['backend:{}'.format(self.name)])
+        try:
+            # The thread lives as long as the process, so its database
+            # connection must be replaced once the server drops it, as it's
+            # done at the start of each request.
+            close_old_connections()
+            with dog_stats_api.timer('track.send.batch.{0}'.format(self.name)):
+                self.backend.send_many(batch)
+        except Exception:  # pylint: disable=broad-except
+            self.failed += len(batch)
+            dog_stats_api.increment('track.send.failed', len(batch), tags=['backend:{}'.format(self.name)])
+            log.exception('Error sending %d events to the %s event tracker backend', len(batch), self.name)
+        else:
+            self.sent += len(batch)
@@ -24,3 +24,14 @@ class TestDjangoBackend(TestCase):
 
         # Check if time is stored in UTC
         self.assertEqual(str(results[0].time), '2013-01-01 17:01:00+00:00')
+
+    def test_django_backend_send_many(self):
+        events = [
+            {'username': 'test{}'.format(index), 'time': '2013-01-01T12:01:00-05:00'}
+            for index in range(3)
+        ]
+        with self.assertNumQueries(1):
+            self.backend.send_many(events)
+
+        usernames = TrackingLog.objects.order_by('username').values_list('username', flat=True)
+        self.assertEqual(list(usernames), ['test0', 'test1', 'test2'])
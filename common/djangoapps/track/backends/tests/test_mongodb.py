@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 
 from mock import patch
+from pymongo.errors import PyMongoError
 
 from django.test import TestCase
 
@@ -37,3 +38,19 @@ class TestMongoBackend(TestCase):
 
         self.assertEqual(events[0], first_argument(calls[0]))
         self.assertEqual(events[1], first_argument(calls[1]))
+
+    def test_mongo_backend_send_many(self):
+        events = [{'test': 1}, {'test': 2}]
+
+        self.backend.send_many(events)
+
+        # The events are inserted at once, and left as they are
+        self.backend.collection.insert.assert_called_once_with(events, manipulate=False)
+
+    def test_mongo_backend_errors(self):
+        self.backend.collection.insert.side_effect = PyMongoError
+
+        # Single events are dropped, but batch errors are left to the caller
+        self.backend.send({'test': 1})
+        with self.assertRaises(PyMongoError):
+            self.backend.send_many([{'test': 1}, {'test': 2}])
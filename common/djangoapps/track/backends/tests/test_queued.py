@@ -0,0 +1,104 @@
+from __future__ import absolute_import
+
+import threading
+
+from django.test import TestCase
+from mock import patch
+
+from track.backends import BaseBackend
+from track.backends.queued import QueuedBackend
+
+
+class RecordingBackend(BaseBackend):
+    """Backend that records the batches of events it is sent."""
+    def __init__(self, **options):
+        super(RecordingBackend, self).__init__(**options)
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def send(self, event):
+        self.send_many([event])
+
+    def send_many(self, events):
+        self.release.wait()
+        if events == [{'fail': True}]:
+            raise ValueError
+        self.batches.append(list(events))
+
+
+class TestQueuedBackend(TestCase):
+    def setUp(self):
+        super(TestQueuedBackend, self).setUp()
+        self.target = RecordingBackend()
+
+    def test_events_are_sent(self):
+        backend = QueuedBackend(self.target, name='test')
+        events = [{'test': index} for index in range(10)]
+        for event in events:
+            backend.send(event)
+
+        self.assertTrue(backend.flush(timeout=5))
+        self.assertEqual(sum(self.target.batches, []), events)
+        self.assertEqual(backend.sent, 10)
+        self.assertEqual(backend.dropped, 0)
+
+    def test_events_are_batched(self):
+        backend = QueuedBackend(self.target, name='test', batch_size=3)
+
+        # Hold up the backend while events queue up
+        self.target.release.clear()
+        backend.send({'test': 0})
+        for index in range(1, 8):
+            backend.send({'test': index})
+        self.target.release.set()
+
+        self.assertTrue(backend.flush(timeout=5))
+        self.assertLessEqual(max(len(batch) for batch in self.target.batches), 3)
+        self.assertEqual(sum(self.target.batches, []), [{'test': index} for index in range(8)])
+        self.assertLess(len(self.target.batches), 8)
+
+    def test_full_queue_drops_events(self):
+        backend = QueuedBackend(self.target, name='test', queue_size=2, put_timeout=0)
+
+        self.target.release.clear()
+        for index in range(10):
+            backend.send({'test': index})
+        self.target.release.set()
+
+        self.assertTrue(backend.flush(timeout=5))
+        # At most one event is being sent while the queue fills up
+        self.assertGreaterEqual(backend.dropped, 7)
+        self.assertEqual(backend.sent + backend.dropped, 10)
+
+    def test_backend_errors_are_counted(self):
+        backend = QueuedBackend(self.target, name='test')
+        backend.send({'fail': True})
+        self.assertTrue(backend.flush(timeout=5))
+
+        backend.send({'test': 1})
+        self.assertTrue(backend.flush(timeout=5))
+
+        self.assertEqual(backend.failed, 1)
+        self.assertEqual(backend.sent, 1)
+        self.assertEqual(self.target.batches, [[{'test': 1}]])
+
+    @patch('track.backends.queued.close_old_connections')
+    def test_old_connections_closed(self, close_old_connections):
+        backend = QueuedBackend(self.target, name='test')
+        backend.send({'test': 1})
+        self.assertTrue(backend.flush(timeout=5))
+        backend.send({'test': 2})
+        self.assertTrue(backend.flush(timeout=5))
+
+        self.assertEqual(close_old_connections.call_count, 2)
+
+    def test_flush_timeout(self):
+        backend = QueuedBackend(self.target, name='test')
+
+        self.target.release.clear()
+        backend.send({'test': 1})
+        self.assertFalse(backend.flush(timeout=0.01))
+
+        self.target.release.set()
+        self.assertTrue(backend.flush(timeout=5))
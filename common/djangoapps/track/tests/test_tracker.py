@@ -4,6 +4,7 @@ from django.test.utils import override_settings
 
 import track.tracker as tracker
 from track.backends import BaseBackend
+from track.backends.queued import QueuedBackend
 
 
 SIMPLE_SETTINGS = {
@@ -98,6 +99,20 @@ class TestTrackerDjangoInstantiation(TestCase):
 
         self.assertEqual(len(backends), 1)
 
+    @override_settings(TRACKING_BACKENDS=SIMPLE_SETTINGS.copy(), TRACKING_ASYNC={'ENABLED': True})
+    def test_django_async_settings(self):
+        """Test if backends send their events in the background when asked to."""
+
+        backends = self._reload_backends()
+
+        self.assertIsInstance(backends['default'], QueuedBackend)
+        self.assertIsInstance(backends['default'].backend, DummyBackend)
+
+        tracker.send({})
+        self.assertTrue(backends['default'].flush(timeout=5))
+
+        self.assertEqual(backends['default'].backend.count, 1)
+
     def _reload_backends(self):
         # pylint: disable=protected-access
 
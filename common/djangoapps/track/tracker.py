@@ -16,6 +16,9 @@ below::
       }
   }
 
+Setting TRACKING_ASYNC['ENABLED'] makes each backend send its events from a
+background thread, in batches, so that sending them doesn't hold up requests.
+
 """
 
 import inspect
@@ -26,6 +29,7 @@ from dogapi import dog_stats_api
 from django.conf import settings
 
 from track.backends import BaseBackend
+from track.backends.queued import QueuedBackend
 
 
 __all__ = ['send']
@@ -43,6 +47,7 @@ def _initialize_backends_from_django_settings():
     backends.clear()
 
     config = getattr(settings, 'TRACKING_BACKENDS', {})
+    async_config = getattr(settings, 'TRACKING_ASYNC', {})
 
     for name, values in config.iteritems():
         # Ignore empty values to turn-off default tracker backends
@@ -51,6 +56,15 @@ def _initialize_backends_from_django_settings():
             options = values.get('OPTIONS', {})
             backends[name] = _instantiate_backend_from_name(engine, options)
 
+            if async_config.get('ENABLED'):
+                backends[name] = QueuedBackend(
+                    backends[name],
+                    name=name,
+                    queue_size=async_config.get('QUEUE_SIZE', 10000),
+                    batch_size=async_config.get('BATCH_SIZE', 100),
+                    put_timeout=async_config.get('PUT_TIMEOUT', 0.1),
+                )
+
 
 def _instantiate_backend_from_name(name, options):
     """
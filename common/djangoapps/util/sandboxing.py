@@ -1,5 +1,10 @@
 import re
+from contextlib import closing
+
+from capa.safe_exec import pool
+from capa.safe_exec.safe_exec import LRUDict
 from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 
 # We'll make assets named this be importable by Python code in the sandbox.
 PYTHON_LIB_ZIP = "python_lib.zip"
@@ -30,11 +35,40 @@ def can_execute_unsafe_code(course_id):
     return False
 
 
+# The python_lib.zip files most recently read, keyed by their asset key and
+# digest, so that each version of a course's library is only read once, and
+# is the same string each time (which makes safe_exec's digest of it cheap).
+PYTHON_LIB_ZIPS = LRUDict(32 * 1024 * 1024, sizeof=lambda key, data: len(data))
+
+
 def get_python_lib_zip(contentstore, course_id):
     """Return the bytes of the python_lib.zip file, if any."""
     asset_key = course_id.make_asset_key("asset", PYTHON_LIB_ZIP)
-    zip_lib = contentstore().find(asset_key, throw_on_not_found=False)
-    if zip_lib is not None:
-        return zip_lib.data
-    else:
+    zip_lib = contentstore().find(asset_key, throw_on_not_found=False, as_stream=True)
+    if zip_lib is None:
         return None
+
+    with closing(zip_lib):
+        key = (asset_key, zip_lib.content_digest)
+        data = PYTHON_LIB_ZIPS.get(key) if zip_lib.content_digest else None
+        if data is None:
+            data = zip_lib.copy_to_in_mem().data
+            if zip_lib.content_digest:
+                PYTHON_LIB_ZIPS.set(key, data)
+    return data
+
+
+class ConfigureSandboxPoolMiddleware(object):
+    """
+    Middleware to configure the pool of warm sandbox workers from
+    settings.CODE_JAIL['pool'], in each process when it starts up.
+    """
+    def __init__(self):
+        pool_settings = settings.CODE_JAIL.get('pool', {})
+        if pool_settings.get('size'):
+            pool.configure(
+                pool_settings['size'],
+                max_executions=pool_settings['max_executions'],
+                max_memory=pool_settings['max_memory'],
+            )
+        raise MiddlewareNotUsed
@@ -7,6 +7,9 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import operator
 import numbers
+from collections import OrderedDict
+from threading import RLock
+
 import numpy
 import scipy.constants
 import functions
@@ -73,6 +76,14 @@ SUFFIXES = {
 }
 
 
+# The maximum number of parsed expressions kept in `PARSE_CACHE`.
+PARSE_CACHE_SIZE = 1024
+
+# Numbers in the parse tree are either python numbers or, when evaluating many
+# samples at once, NumPy arrays holding a value for each sample.
+NUMBER_TYPES = (numbers.Number, numpy.ndarray)
+
+
 class UndefinedVariable(Exception):
     """
     Indicate when a student inputs a variable which was not expected.
@@ -122,7 +133,7 @@ def eval_atom(parse_result):
     In the case of parenthesis, ignore them.
     """
     # Find first number in the list
-    result = next(k for k in parse_result if isinstance(k, numbers.Number))
+    result = next(k for k in parse_result if isinstance(k, NUMBER_TYPES))
     return result
 
 
@@ -136,7 +147,7 @@ def eval_power(parse_result):
     # `reduce` will go from left to right; reverse the list.
     parse_result = reversed(
         [k for k in parse_result
-         if isinstance(k, numbers.Number)]  # Ignore the '^' marks.
+         if isinstance(k, NUMBER_TYPES)]  # Ignore the '^' marks.
     )
     # Having reversed it, raise `b` to the power of `a`.
     power = reduce(lambda a, b: b ** a, parse_result)
@@ -158,7 +169,7 @@ def eval_parallel(parse_result):
     if 0 in parse_result:
         return float('nan')
     reciprocals = [1. / e for e in parse_result
-                   if isinstance(e, numbers.Number)]
+                   if isinstance(e, NUMBER_TYPES)]
     return 1. / sum(reciprocals)
 
 
@@ -228,34 +239,298 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     if math_expr.strip() == "":
         return float('nan')
 
-    # Parse the tree.
+    return compile_expression(math_expr, case_sensitive).evaluate(variables, functions)
+
+
+def evaluate_samples(variables, functions, math_expr, num_samples, case_sensitive=False):
+    """
+    Evaluate an expression for many samples of its variables at once.
+
+    -Variables are passed as a dictionary from string to a sequence of
+     `num_samples` values, one for each sample, or to a single python number
+     used for every sample.
+    -Unary functions are passed as a dictionary from string to function.
+
+    Return a list of `num_samples` results, equal to what `evaluator` returns
+    for each of the samples.
+    """
+    # No need to go further.
+    if math_expr.strip() == "":
+        return [float('nan')] * num_samples
+
+    return compile_expression(math_expr, case_sensitive).evaluate_samples(variables, functions, num_samples)
+
+
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Parse an expression into a `CompiledExpression`, which can be evaluated
+    any number of times without parsing it again.
+    """
     math_interpreter = ParseAugmenter(math_expr, case_sensitive)
     math_interpreter.parse_algebra()
+    return CompiledExpression(math_interpreter)
 
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
+class CompiledExpression(object):
+    """
+    A parsed math expression, ready to be evaluated.
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
+    Create these with `compile_expression`.
+    """
+    def __init__(self, math_interpreter):
+        self.math_interpreter = math_interpreter
+        self.case_sensitive = math_interpreter.case_sensitive
+
+    def evaluate(self, variables, functions):
+        """
+        Evaluate the expression with the given variables and functions, in
+        the same way as `evaluator`.
+        """
+        # Get our variables together.
+        all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+
+        # ...and check them
+        self.math_interpreter.check_variables(all_variables, all_functions)
+
+        return self._reduce(all_variables, all_functions)
+
+    def evaluate_samples(self, variables, functions, num_samples):
+        """
+        Evaluate the expression for many samples of its variables, in the
+        same way as `evaluate_samples`.
+
+        All the samples are evaluated at once, using NumPy arrays of sample
+        values. If that fails for any reason (a function which doesn't accept
+        arrays, such as `fact`, or a floating point error in any sample), the
+        samples are evaluated one by one instead, so that the results and
+        errors are exactly the same as those of `evaluator`.
+        """
+        # Get our variables together.
+        all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+
+        # ...and check them
+        self.math_interpreter.check_variables(all_variables, all_functions)
+
+        sample_variables = {
+            name: value if isinstance(value, numbers.Number) else numpy.asarray(value)
+            for name, value in all_variables.iteritems()
+        }
+        try:
+            # Underflow silently goes to zero for python floats too.
+            with numpy.errstate(divide='raise', over='raise', invalid='raise', under='ignore'):
+                results = numpy.asarray(self._reduce(sample_variables, all_functions))
+            if results.ndim == 0:
+                # The result doesn't depend on any sampled variable.
+                results = numpy.repeat(results, num_samples)
+            if results.shape != (num_samples,):
+                raise ValueError(u"Unexpected shape of results: {}".format(results.shape))
+            return results.tolist()
+        except Exception:  # pylint: disable=broad-except
+            sample_lists = {
+                name: value.tolist()
+                for name, value in sample_variables.iteritems()
+                if isinstance(value, numpy.ndarray)
+            }
+            results = []
+            for index in range(num_samples):
+                all_variables.update((name, values[index]) for name, values in sample_lists.iteritems())
+                results.append(self._reduce(all_variables, all_functions))
+            return results
+
+    def _reduce(self, all_variables, all_functions):
+        """
+        Evaluate the parse tree with the given (checked) variables and
+        functions.
+        """
+        # Create a recursion to evaluate the tree.
+        if self.case_sensitive:
+            casify = lambda x: x
+        else:
+            casify = lambda x: x.lower()  # Lowercase for case insens.
 
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
+        evaluate_actions = {
+            'number': eval_number,
+            'variable': lambda x: all_variables[casify(x[0])],
+            'function': lambda x: all_functions[casify(x[0])](x[1]),
+            'atom': eval_atom,
+            'power': eval_power,
+            'parallel': eval_parallel,
+            'product': eval_product,
+            'sum': eval_sum
+        }
 
-    return math_interpreter.reduce_tree(evaluate_actions)
+        return self.math_interpreter.reduce_tree(evaluate_actions)
+
+
+class ParseCache(object):
+    """
+    Process-wide LRU cache of parsed math expressions, so that an expression
+    which is evaluated or previewed repeatedly is only parsed once.
+
+    Entries are keyed by the expression string. Parse trees are never
+    modified once created, so they can be shared by every `ParseAugmenter`
+    of the same expression.
+
+    The cache is bounded by the number of expressions stored in it; least
+    recently used entries are evicted first.
+    """
+    def __init__(self, max_size):
+        """
+        Arguments:
+            max_size (int) - The maximum number of expressions stored.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # Map of expression string to (tree, variables_used, functions_used),
+        # ordered from least to most recently used.
+        self._entries = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, math_expr):
+        """
+        Returns the (tree, variables_used, functions_used) stored for the
+        given expression, or None if not found.
+        """
+        with self._lock:
+            entry = self._entries.pop(math_expr, None)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries[math_expr] = entry
+            self.hits += 1
+            return entry
+
+    def set(self, math_expr, entry):
+        """
+        Stores the given (tree, variables_used, functions_used) for the
+        given expression.
+        """
+        with self._lock:
+            self._entries.pop(math_expr, None)
+            self._entries[math_expr] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Removes all entries from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+PARSE_CACHE = ParseCache(PARSE_CACHE_SIZE)
+
+
+def build_grammar():
+    """
+    Build the pyparsing grammar of math expressions.
+
+    Parsing an expression with it gives a `pyparsing.ParseResult` with proper
+    groupings to reflect parenthesis and order of operations. It leaves all
+    operators in the tree and does not parse any strings of numbers into their
+    float versions.
+    """
+    # 0.33 or 7 or .34 or 16.
+    number_part = Word(nums)
+    inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
+    # pyparsing allows spaces between tokens--`Combine` prevents that.
+    inner_number = Combine(inner_number)
+
+    # SI suffixes and percent.
+    number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
+
+    # 0.33k or 17
+    plus_minus = Literal('+') | Literal('-')
+    number = Group(
+        Optional(plus_minus) +
+        inner_number +
+        Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
+        Optional(number_suffix)
+    )
+    number = number("number")
+
+    # Predefine recursive variables.
+    expr = Forward()
+
+    # Handle variables passed in. They must start with letters/underscores
+    # and may contain numbers afterward.
+    inner_varname = Word(alphas + "_", alphanums + "_")
+    varname = Group(inner_varname)("variable")
+
+    # Same thing for functions.
+    function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
+
+    atom = number | function | varname | "(" + expr + ")"
+    atom = Group(atom)("atom")
+
+    # Do the following in the correct order to preserve order of operation.
+    pow_term = atom + ZeroOrMore("^" + atom)
+    pow_term = Group(pow_term)("power")
+
+    par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
+    par_term = Group(par_term)("parallel")
+
+    prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
+    prod_term = Group(prod_term)("product")
+
+    sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
+    sum_term = Group(sum_term)("sum")
+
+    # Finish the recursion.
+    expr << sum_term  # pylint: disable=pointless-statement
+    return expr + stringEnd
+
+
+# The grammar doesn't depend on the expression, its variables or functions,
+# so it is only built once, on first use.
+_GRAMMAR = None
+_GRAMMAR_LOCK = RLock()
+
+
+def parse(math_expr):
+    """
+    Parse an expression into a tree, using the shared grammar.
+    """
+    global _GRAMMAR  # pylint: disable=global-statement
+    # pyparsing grammars hold state while parsing, so share them one parse at a time.
+    with _GRAMMAR_LOCK:
+        if _GRAMMAR is None:
+            _GRAMMAR = build_grammar()
+        return _GRAMMAR.parseString(math_expr)[0]
+
+
+def names_used(tree):
+    """
+    Return the sets of the variable names and the function names used in the
+    given parse tree.
+    """
+    variables_used = set()
+    functions_used = set()
+
+    def visit(node):
+        """
+        Record the names used by the node and its children.
+        """
+        if not isinstance(node, ParseResults):
+            return
+        node_name = node.getName()
+        if node_name == 'variable':
+            variables_used.add(node[0])
+        elif node_name == 'function':
+            functions_used.add(node[0])
+        for child in node:
+            visit(child)
+
+    visit(tree)
+    return variables_used, functions_used
 
 
 class ParseAugmenter(object):
@@ -278,23 +553,6 @@ class ParseAugmenter(object):
         self.variables_used = set()
         self.functions_used = set()
 
-        def vpa(tokens):
-            """
-            When a variable is recognized, store it in `variables_used`.
-            """
-            varname = tokens[0][0]
-            self.variables_used.add(varname)
-
-        def fpa(tokens):
-            """
-            When a function is recognized, store it in `functions_used`.
-            """
-            varname = tokens[0][0]
-            self.functions_used.add(varname)
-
-        self.variable_parse_action = vpa
-        self.function_parse_action = fpa
-
     def parse_algebra(self):
         """
         Parse an algebraic expression into a tree.
@@ -303,61 +561,22 @@ class ParseAugmenter(object):
         reflect parenthesis and order of operations. Leave all operators in the
         tree and do not parse any strings of numbers into their float versions.
 
+        The parse of each expression is stored in `PARSE_CACHE` and reused.
+
         Adding the groups and result names makes the `repr()` of the result
         really gross. For debugging, use something like
           print OBJ.tree.asXML()
         """
-        # 0.33 or 7 or .34 or 16.
-        number_part = Word(nums)
-        inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
-        # pyparsing allows spaces between tokens--`Combine` prevents that.
-        inner_number = Combine(inner_number)
-
-        # SI suffixes and percent.
-        number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
-
-        # 0.33k or 17
-        plus_minus = Literal('+') | Literal('-')
-        number = Group(
-            Optional(plus_minus) +
-            inner_number +
-            Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
-            Optional(number_suffix)
-        )
-        number = number("number")
-
-        # Predefine recursive variables.
-        expr = Forward()
-
-        # Handle variables passed in. They must start with letters/underscores
-        # and may contain numbers afterward.
-        inner_varname = Word(alphas + "_", alphanums + "_")
-        varname = Group(inner_varname)("variable")
-        varname.setParseAction(self.variable_parse_action)
-
-        # Same thing for functions.
-        function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
-        function.setParseAction(self.function_parse_action)
-
-        atom = number | function | varname | "(" + expr + ")"
-        atom = Group(atom)("atom")
-
-        # Do the following in the correct order to preserve order of operation.
-        pow_term = atom + ZeroOrMore("^" + atom)
-        pow_term = Group(pow_term)("power")
-
-        par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
-        par_term = Group(par_term)("parallel")
-
-        prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
-        prod_term = Group(prod_term)("product")
-
-        sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
-        sum_term = Group(sum_term)("sum")
-
-        # Finish the recursion.
-        expr << sum_term  # pylint: disable=pointless-statement
-        self.tree = (expr + stringEnd).parseString(self.math_expr)[0]
+        entry = PARSE_CACHE.get(self.math_expr)
+        if entry is None:
+            tree = parse(self.math_expr)
+            variables_used, functions_used = names_used(tree)
+            entry = (tree, frozenset(variables_used), frozenset(functions_used))
+            PARSE_CACHE.set(self.math_expr, entry)
+
+        self.tree = entry[0]
+        self.variables_used = set(entry[1])
+        self.functions_used = set(entry[2])
 
     def reduce_tree(self, handle_actions, terminal_converter=None):
         """
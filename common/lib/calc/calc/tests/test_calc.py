@@ -559,3 +559,68 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+    def test_evaluate_samples(self):
+        """
+        Evaluating many samples at once should match evaluating each of them
+        """
+        samples = {'x': [0.5, 1.0, 2.0, 3.5], 'y': [1.0, -2.0, 0.0, 4.0]}
+        for expr in ('3*x-y', 'x^2 + sin(y)', 'x || y', 'y/x', '1/y', 'fact(x)', 'sqrt(y)', '13', 'x*i', ''):
+            try:
+                expected = [
+                    calc.evaluator({'x': x, 'y': y}, {}, expr)
+                    for x, y in zip(samples['x'], samples['y'])
+                ]
+            except Exception as err:  # pylint: disable=broad-except
+                with self.assertRaises(type(err)):
+                    calc.evaluate_samples(samples, {}, expr, 4)
+                continue
+
+            results = calc.evaluate_samples(samples, {}, expr, 4)
+            self.assertEqual(len(results), 4)
+            for result, expected_result in zip(results, expected):
+                if numpy.isnan(expected_result):
+                    self.assertTrue(numpy.isnan(result))
+                else:
+                    self.assertAlmostEqual(result, expected_result)
+
+    def test_compile_expression(self):
+        """
+        A compiled expression can be evaluated again with other variables
+        """
+        expression = calc.compile_expression('3*x-y')
+        self.assertEqual(expression.evaluate({'x': 1.0, 'y': 2.0}, {}), 1.0)
+        self.assertEqual(expression.evaluate({'x': 2.0, 'y': 1.0}, {}), 5.0)
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'y'):
+            expression.evaluate({'x': 1.0}, {})
+
+
+class ParseCacheTest(unittest.TestCase):
+    """
+    Run tests for calc.ParseCache
+    """
+    def test_parse_reused(self):
+        calc.PARSE_CACHE.clear()
+        hits, misses = calc.PARSE_CACHE.hits, calc.PARSE_CACHE.misses
+
+        self.assertEqual(calc.evaluator({'x': 2.0}, {}, 'sin(x)^2 + 1'), numpy.sin(2.0) ** 2 + 1)
+        self.assertEqual(calc.evaluator({'x': 3.0}, {}, 'sin(x)^2 + 1'), numpy.sin(3.0) ** 2 + 1)
+        self.assertEqual(calc.PARSE_CACHE.misses, misses + 1)
+        self.assertEqual(calc.PARSE_CACHE.hits, hits + 1)
+
+        # The names used are found in cached parses too.
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'x'):
+            calc.evaluator({}, {}, 'sin(x)^2 + 1')
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'f'):
+            calc.evaluator({'x': 1.0}, {}, 'f(x)')
+
+    def test_lru_eviction(self):
+        cache = calc.ParseCache(2)
+        cache.set('a', 'A')
+        cache.set('b', 'B')
+        self.assertEqual(cache.get('a'), 'A')
+        cache.set('c', 'C')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 'A')
+        self.assertEqual(cache.get('c'), 'C')
+        self.assertEqual((len(cache), cache.hits, cache.misses, cache.evictions), (2, 3, 1, 1))
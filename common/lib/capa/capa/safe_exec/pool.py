@@ -0,0 +1,418 @@
+"""
+A pool of warm sandbox worker processes for capa's safe_exec.
+
+Running code with codejail starts a fresh sandboxed Python process for every
+execution, which then has to import numpy, scipy and the rest of the modules
+problems use.  A pool worker is a sandboxed Python process, started with the
+same command line and as the same user as codejail's, which imports those
+modules once and then forks a child for each execution it is sent.  Each
+child runs its code with the same resource limits codejail would apply, so
+executions are as isolated from each other as before, but skip the process
+startup and imports.
+
+Workers are replaced after a number of executions, or once their memory use
+passes a ceiling.
+
+Use `configure` to enable the pool, after codejail itself is configured.
+"""
+import json
+import logging
+import os
+import select
+import shutil
+import signal
+import subprocess
+import threading
+import time
+
+from codejail import jail_code
+from codejail.safe_exec import json_safe, SafeExecException
+from codejail.util import temp_directory
+
+log = logging.getLogger(__name__)
+
+# The number of seconds, beyond codejail's REALTIME limit, after which a
+# worker which hasn't responded is killed.  Workers enforce REALTIME on the
+# code they run themselves, but run as the same user as that code.
+REALTIME_MARGIN = 5
+
+# Modules imported by each worker before it runs any code, so that the lazy
+# imports of the code prolog find them already loaded.
+PRELOAD_MODULES = [
+    "json",
+    "random",
+    "math",
+    "numpy",
+    "scipy",
+    "calc",
+    "eia",
+    "chem.chemcalc",
+    "chem.chemtools",
+    "chem.miller",
+    "verifiers.draganddrop",
+]
+
+# The program run by each worker.  It reads one JSON request per line on
+# stdin, runs it in a forked child, and writes one JSON response per line on
+# stdout.
+WORKER_CODE = r"""
+import json
+import os
+import resource
+import select
+import signal
+import sys
+import time
+import traceback
+
+for name in sys.argv[1:]:
+    try:
+        __import__(name)
+    except Exception:
+        pass
+
+requests = sys.stdin
+responses = os.fdopen(os.dup(1), "w")
+
+
+class DevNull(object):
+    def write(self, *args, **kwargs):
+        pass
+
+
+def run(request, write_fd):
+    os.setsid()
+    # Keep the code from reading requests or writing responses.
+    os.close(responses.fileno())
+    os.dup2(2, 0)
+    os.dup2(2, 1)
+    sys.stdout = DevNull()
+
+    limits = request["limits"]
+    # No subprocesses.
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    if limits.get("CPU"):
+        resource.setrlimit(resource.RLIMIT_CPU, (limits["CPU"], limits["CPU"]))
+    if limits.get("VMEM"):
+        resource.setrlimit(resource.RLIMIT_AS, (limits["VMEM"], limits["VMEM"]))
+    fsize = limits.get("FSIZE", 0)
+    resource.setrlimit(resource.RLIMIT_FSIZE, (fsize, fsize))
+
+    os.chdir(request["homedir"])
+    os.environ["TMPDIR"] = "tmp"
+    sys.path.extend(request["python_path"])
+
+    try:
+        g_dict = request["globals"]
+        exec request["code"] in g_dict
+        ok_types = (type(None), int, long, float, str, unicode, list, tuple, dict)
+        def jsonable(v):
+            if not isinstance(v, ok_types):
+                return False
+            try:
+                json.dumps(v)
+            except Exception:
+                return False
+            return True
+        result = {"globals": {k: v for k, v in g_dict.iteritems() if jsonable(v) and k != "__builtins__"}}
+        status = 0
+    except BaseException:
+        result = {"error": traceback.format_exc()}
+        status = 1
+
+    output = json.dumps(result)
+    while output:
+        output = output[os.write(write_fd, output):]
+    os._exit(status)
+
+
+for line in iter(requests.readline, ""):
+    # Forget the output of the previous execution before forking, so that
+    # this one can't read it.
+    chunks = None
+    request = json.loads(line)
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            run(request, write_fd)
+        finally:
+            os._exit(1)
+    os.close(write_fd)
+
+    realtime = request["limits"].get("REALTIME")
+    deadline = time.time() + realtime if realtime else None
+    chunks = []
+    while True:
+        timeout = max(deadline - time.time(), 0) if deadline else None
+        if not select.select([read_fd], [], [], timeout)[0]:
+            os.kill(pid, signal.SIGKILL)
+            break
+        chunk = os.read(read_fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(read_fd)
+
+    _, wait_status = os.waitpid(pid, 0)
+    if os.WIFSIGNALED(wait_status):
+        status = -os.WTERMSIG(wait_status)
+    else:
+        status = os.WEXITSTATUS(wait_status)
+
+    responses.write(json.dumps({
+        "status": status,
+        "output": "".join(chunks),
+        "maxrss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }) + "\n")
+    responses.flush()
+"""
+
+
+class WorkerError(Exception):
+    """
+    Raised when a worker stops responding as it should.
+    """
+    pass
+
+
+class SandboxWorker(object):
+    """
+    A warm sandboxed Python process which runs code sent to it.
+    """
+    def __init__(self):
+        command = jail_code.COMMANDS["python"]
+        cmd = []
+        if command["user"]:
+            # Run as the specified user
+            cmd.extend(["sudo", "-u", command["user"]])
+        cmd.extend(command["cmdline_start"])
+        cmd.extend(["-c", WORKER_CODE])
+        cmd.extend(PRELOAD_MODULES)
+
+        with open(os.devnull, "w") as devnull:
+            self.process = subprocess.Popen(
+                cmd, env={}, preexec_fn=os.setsid, close_fds=True,
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=devnull,
+            )
+        self.executions = 0
+        self.memory = 0
+
+    def execute(self, homedir, code, globals_dict, python_path):
+        """
+        Run `code` with `globals_dict` in the sandbox, in `homedir`, with
+        `python_path` added to the Python path.
+
+        Returns the exit status of the execution, and its output: the
+        JSON of the resulting globals, or of the traceback of the error.
+        """
+        request = {
+            "homedir": homedir,
+            "code": code,
+            "globals": globals_dict,
+            "python_path": python_path,
+            "limits": jail_code.LIMITS,
+        }
+        realtime = jail_code.LIMITS.get("REALTIME")
+        deadline = time.time() + realtime + REALTIME_MARGIN if realtime else None
+        try:
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+            line = self._read_line(deadline)
+        except (IOError, OSError) as exc:
+            raise WorkerError(u"Worker {} failed: {}".format(self.process.pid, exc))
+        if not line.endswith("\n"):
+            raise WorkerError(u"Worker {} exited with status {}".format(self.process.pid, self.process.poll()))
+
+        response = json.loads(line)
+        self.executions += 1
+        self.memory = response["maxrss"]
+        return response["status"], response["output"]
+
+    def _read_line(self, deadline):
+        """
+        Reads a line from the worker, or what it wrote before exiting.
+        Kills the worker and raises WorkerError if it doesn't respond by
+        `deadline`.
+        """
+        stdout = self.process.stdout.fileno()
+        chunks = []
+        while True:
+            timeout = max(deadline - time.time(), 0) if deadline else None
+            if not select.select([stdout], [], [], timeout)[0]:
+                self.kill()
+                raise WorkerError(u"Worker {} didn't respond in time".format(self.process.pid))
+            chunk = os.read(stdout, 65536)
+            chunks.append(chunk)
+            if not chunk or chunk.endswith("\n"):
+                return "".join(chunks)
+
+    def kill(self):
+        """
+        Kill the worker, and the execution it's running.
+        """
+        try:
+            # The worker leads its own process group.
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        self.process.poll()
+
+    def stop(self):
+        """
+        Stop the worker, once it has finished any execution in progress.
+        """
+        try:
+            # The worker exits when it reaches the end of its requests.
+            self.process.stdin.close()
+        except IOError:
+            self.process.terminate()
+
+
+class SandboxPool(object):
+    """
+    A pool of `SandboxWorker`s, shared by the threads of a process.
+    """
+    def __init__(self, size, max_executions, max_memory):
+        """
+        Arguments:
+            size (int) - The maximum number of idle workers kept.
+            max_executions (int) - The number of executions after which a
+                worker is replaced.
+            max_memory (int) - The memory use, in bytes, above which a worker
+                is replaced.
+        """
+        self.size = size
+        self.max_executions = max_executions
+        self.max_memory = max_memory
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def safe_exec(self, code, globals_dict, python_path=None, extra_files=None, slug=None):
+        """
+        Execute code as codejail's `safe_exec` does, in a pool worker.
+        """
+        python_path = python_path or ()
+        extra_files = extra_files or ()
+        extra_names = set(name for name, contents in extra_files)
+
+        with temp_directory() as homedir:
+            # Lay out the directory as codejail does.
+            # Make directory readable by other users ('sandbox' user needs to be
+            # able to read it).
+            os.chmod(homedir, 0775)
+            tmptmp = os.path.join(homedir, "tmp")
+            os.mkdir(tmptmp)
+            os.chmod(tmptmp, 0777)
+            sys_path = []
+            for pydir in python_path:
+                pybase = os.path.basename(pydir)
+                sys_path.append(pybase)
+                if pybase not in extra_names:
+                    if os.path.isdir(pydir):
+                        shutil.copytree(pydir, os.path.join(homedir, pybase))
+                    else:
+                        shutil.copyfile(pydir, os.path.join(homedir, pybase))
+            for name, contents in extra_files:
+                with open(os.path.join(homedir, name), "wb") as extra_file:
+                    extra_file.write(contents)
+
+            worker = self._acquire()
+            try:
+                status, output = worker.execute(homedir, code, json_safe(globals_dict), sys_path)
+            except WorkerError:
+                log.exception("Sandbox worker failed executing %s", slug)
+                worker.stop()
+                raise SafeExecException(u"Couldn't execute jailed code: the sandbox worker failed")
+            self._release(worker)
+
+        if slug:
+            log.info("Executed jailed code %s in a pooled worker, with status %s", slug, status)
+
+        if status != 0:
+            try:
+                error = json.loads(output)["error"]
+            except (ValueError, KeyError):
+                error = output
+            raise SafeExecException((
+                u"Couldn't execute jailed code: stderr: {error!r} with status code: {status}"
+            ).format(error=error, status=status))
+        globals_dict.update(json.loads(output)["globals"])
+
+    def _acquire(self):
+        """
+        Returns an idle worker, or a new one if there isn't any.
+        """
+        with self._lock:
+            if os.getpid() != self._pid:
+                # We've been forked: the idle workers belong to our parent.
+                self._idle = []
+                self._pid = os.getpid()
+            if self._idle:
+                return self._idle.pop()
+        return SandboxWorker()
+
+    def _release(self, worker):
+        """
+        Returns a worker to the pool, or stops it if it should be replaced
+        or the pool is full.
+        """
+        if worker.executions >= self.max_executions or worker.memory > self.max_memory:
+            worker.stop()
+            return
+        with self._lock:
+            if os.getpid() == self._pid and len(self._idle) < self.size:
+                self._idle.append(worker)
+                return
+        worker.stop()
+
+    def warm(self):
+        """
+        Starts workers until the pool holds `size` idle workers.
+        """
+        while True:
+            with self._lock:
+                if len(self._idle) >= self.size:
+                    return
+            self._release(SandboxWorker())
+
+    def close(self):
+        """
+        Stops all the idle workers.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+
+
+POOL = None
+
+
+def configure(size, max_executions=100, max_memory=256 * 1024 * 1024):
+    """
+    Use a pool of up to `size` warm workers to run sandboxed code, and start
+    them now if codejail is configured.  A `size` of 0 stops using the pool.
+    """
+    global POOL  # pylint: disable=global-statement
+    if POOL is not None:
+        POOL.close()
+    POOL = SandboxPool(size, max_executions, max_memory) if size else None
+    if is_configured():
+        POOL.warm()
+
+
+def is_configured():
+    """
+    Returns whether sandboxed code should be run by the pool.
+    """
+    return POOL is not None and jail_code.is_configured("python")
+
+
+def safe_exec(code, globals_dict, python_path=None, extra_files=None, slug=None):
+    """
+    Execute code as codejail's `safe_exec` does, in a worker of the pool.
+    """
+    POOL.safe_exec(code, globals_dict, python_path=python_path, extra_files=extra_files, slug=slug)
@@ -4,9 +4,13 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from . import pool
 from dogapi import dog_stats_api
 
+from collections import OrderedDict
 import hashlib
+import json
+from threading import RLock
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -47,6 +51,111 @@ for name, modname in ASSUMED_IMPORTS:
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
 
+# Strings at least this long are hashed by their memoized digests.
+LARGE_STRING_SIZE = 1024
+
+# Results whose JSON is larger than this aren't cached.
+MAX_CACHED_RESULT_SIZE = 1024 * 1024
+
+
+class LRUDict(object):
+    """
+    A thread-safe mapping which holds up to a total size of entries, evicting
+    the least recently used ones first, and counts its hits and misses.
+    """
+    def __init__(self, max_size, sizeof):
+        """
+        Arguments:
+            max_size (int) - The maximum total size of the entries held.
+            sizeof (function) - Returns the size of an entry, given its key
+                and value.
+        """
+        self.max_size = max_size
+        self.sizeof = sizeof
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, key):
+        """
+        Returns the value stored for `key`, or None if not found.
+        """
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries[key] = value
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Stores `value` for `key`.  Entries larger than max_size aren't stored.
+        """
+        size = self.sizeof(key, value)
+        with self._lock:
+            if key in self._entries:
+                self.size -= self.sizeof(key, self._entries.pop(key))
+            if size > self.max_size:
+                return
+            self._entries[key] = value
+            self.size += size
+            while self.size > self.max_size:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self.size -= self.sizeof(evicted_key, evicted)
+
+    def clear(self):
+        """
+        Removes all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Digests of large strings (code, python_lib.zip contents) used in cache keys,
+# so that hashing the same code or course library again is just a lookup.
+DIGESTS = LRUDict(32 * 1024 * 1024, sizeof=lambda text, text_digest: len(text))
+
+# The most recently used safe_exec results of this process, as JSON, in front
+# of the shared cache passed to safe_exec.
+LOCAL_RESULTS = LRUDict(16 * 1024 * 1024, sizeof=lambda key, result: len(result))
+
+
+def digest(text):
+    """
+    Returns the md5 hex digest of a string, memoized for large strings.
+    """
+    if len(text) < LARGE_STRING_SIZE:
+        return hashlib.md5(text.encode('utf8') if isinstance(text, unicode) else text).hexdigest()
+    text_digest = DIGESTS.get(text)
+    if text_digest is None:
+        text_digest = hashlib.md5(text.encode('utf8') if isinstance(text, unicode) else text).hexdigest()
+        DIGESTS.set(text, text_digest)
+    return text_digest
+
+
+def cache_metrics():
+    """
+    Returns the hit, miss and size counters of the in-process caches.
+    """
+    return {
+        'results.hits': LOCAL_RESULTS.hits,
+        'results.misses': LOCAL_RESULTS.misses,
+        'results.entries': len(LOCAL_RESULTS),
+        'results.size': LOCAL_RESULTS.size,
+        'digests.hits': DIGESTS.hits,
+        'digests.misses': DIGESTS.misses,
+        'digests.entries': len(DIGESTS),
+    }
+
+
 def update_hash(hasher, obj):
     """
     Update a `hashlib` hasher with a nested object.
@@ -56,10 +165,13 @@ def update_hash(hasher, obj):
 
     `hasher`'s `.update()` method is called a number of times, touching all of
     `obj` in the process.  Only primitive JSON-safe types are supported.
+    Large strings are hashed by their (memoized) digests.
 
     """
     hasher.update(str(type(obj)))
-    if isinstance(obj, (tuple, list)):
+    if isinstance(obj, basestring) and len(obj) >= LARGE_STRING_SIZE:
+        hasher.update(digest(obj))
+    elif isinstance(obj, (tuple, list)):
         for e in obj:
             update_hash(hasher, e)
     elif isinstance(obj, dict):
@@ -99,7 +211,8 @@ def safe_exec(
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
     to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    the random seed, and the Python path and extra files.  Recent results are also
+    cached in this process, in front of `cache`.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -109,12 +222,24 @@ def safe_exec(
     """
     # Check the cache for a previous result.
     if cache:
-        safe_globals = json_safe(globals_dict)
         md5er = hashlib.md5()
-        md5er.update(repr(code))
-        update_hash(md5er, safe_globals)
+        md5er.update(digest(code))
+        update_hash(md5er, python_path or [])
+        update_hash(md5er, [(name, digest(contents)) for name, contents in extra_files or []])
+        update_hash(md5er, json_safe(globals_dict))
         key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
-        cached = cache.get(key)
+
+        cached = LOCAL_RESULTS.get(key)
+        if cached is not None:
+            dog_stats_api.increment('capa.safe_exec.cache', tags=['result:local_hit'])
+            cached = json.loads(cached)
+        else:
+            cached = cache.get(key)
+            if cached is not None:
+                dog_stats_api.increment('capa.safe_exec.cache', tags=['result:hit'])
+                LOCAL_RESULTS.set(key, json.dumps(cached))
+            else:
+                dog_stats_api.increment('capa.safe_exec.cache', tags=['result:miss'])
         if cached is not None:
             # We have a cached result.  The result is a pair: the exception
             # message, if any, else None; and the resulting globals dictionary.
@@ -130,6 +255,8 @@ def safe_exec(
     # Decide which code executor to use.
     if unsafely:
         exec_fn = codejail_not_safe_exec
+    elif pool.is_configured():
+        exec_fn = pool.safe_exec
     else:
         exec_fn = codejail_safe_exec
 
@@ -148,7 +275,10 @@ def safe_exec(
     # the globals dict might not be entirely serializable.
     if cache:
         cleaned_results = json_safe(globals_dict)
-        cache.set(key, (emsg, cleaned_results))
+        cached = json.dumps((emsg, cleaned_results))
+        if len(cached) <= MAX_CACHED_RESULT_SIZE:
+            LOCAL_RESULTS.set(key, cached)
+            cache.set(key, (emsg, cleaned_results))
 
     # If an exception happened, raise it now.
     if emsg:
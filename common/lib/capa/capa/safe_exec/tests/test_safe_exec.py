@@ -4,13 +4,18 @@ import hashlib
 import os
 import os.path
 import random
+import sys
 import textwrap
+import time
 import unittest
 
+from mock import patch
 from nose.plugins.skip import SkipTest
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import pool, safe_exec, update_hash
+from capa.safe_exec.safe_exec import DIGESTS, LOCAL_RESULTS, MAX_CACHED_RESULT_SIZE
 from codejail.safe_exec import SafeExecException
+from codejail import jail_code
 from codejail.jail_code import is_configured
 
 
@@ -90,6 +95,91 @@ class TestSafeOrNot(unittest.TestCase):
         self.assertEqual(g['files'], os.listdir('/'))
 
 
+class TestSafeExecPool(unittest.TestCase):
+    def setUp(self):
+        super(TestSafeExecPool, self).setUp()
+        # The pool runs workers with CodeJail's configuration.
+        if not is_configured("python"):
+            raise SkipTest
+        pool.configure(1, max_executions=2)
+        self.addCleanup(pool.configure, 0)
+
+    def test_workers_reused_and_replaced(self):
+        g = {}
+        safe_exec("a = int(math.pi)", g)
+        worker = pool.POOL._idle[0]
+        safe_exec("b = a + 1", g)
+        self.assertEqual((g['a'], g['b']), (3, 4))
+        # The worker was replaced after its second execution.
+        self.assertEqual(worker.executions, 2)
+        self.assertEqual(pool.POOL._idle, [])
+
+    def test_executions_isolated(self):
+        g = {}
+        safe_exec("import math; math.pi = 3", g)
+        safe_exec("a = math.pi", g)
+        self.assertNotEqual(g['a'], 3)
+
+    def test_python_lib(self):
+        pylib = os.path.dirname(__file__) + "/test_files/pylib"
+        g = {}
+        safe_exec("import constant; a = constant.THE_CONST", g, python_path=[pylib])
+        self.assertEqual(g['a'], 23)
+
+    def test_raising_exceptions(self):
+        g = {}
+        with self.assertRaises(SafeExecException) as cm:
+            safe_exec("1/0", g)
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+
+
+class TestSandboxPoolWorkers(unittest.TestCase):
+    """
+    Tests of the pool's workers, run unsandboxed with this Python, so that
+    they don't need CodeJail to be configured.
+    """
+    def setUp(self):
+        super(TestSandboxPoolWorkers, self).setUp()
+        commands = {"python": {"cmdline_start": [sys.executable, "-E", "-B"], "user": None}}
+        patcher = patch.dict(jail_code.COMMANDS, commands)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.dict(jail_code.LIMITS, {"CPU": 1, "REALTIME": 1, "VMEM": 0})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = pool.SandboxPool(1, max_executions=10, max_memory=1024 * 1024 * 1024)
+        self.addCleanup(self.pool.close)
+
+    def test_execute(self):
+        self.pool.warm()
+        worker = self.pool._idle[0]
+        g = {"a": 1}
+        self.pool.safe_exec("b = a + 1", g)
+        self.assertEqual(g, {"a": 1, "b": 2})
+        self.assertEqual(self.pool._idle, [worker])
+        self.assertEqual(worker.executions, 1)
+
+    def test_previous_output_not_visible(self):
+        g = {"secret": "another student's answer"}
+        self.pool.safe_exec("a = 1", g)
+        g = {}
+        self.pool.safe_exec("import sys; leaked = repr(vars(sys.modules['__main__']))", g)
+        self.assertNotIn("another student", g["leaked"])
+
+    def test_raising_exceptions(self):
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("1/0", {})
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+
+    @patch.object(pool, "REALTIME_MARGIN", 1)
+    def test_stopped_worker(self):
+        start = time.time()
+        with self.assertRaises(SafeExecException):
+            self.pool.safe_exec("import os, signal; os.kill(os.getppid(), signal.SIGSTOP)", {})
+        self.assertLess(time.time() - start, 10)
+        self.assertEqual(self.pool._idle, [])
+
+
 class DictCache(object):
     """A cache implementation over a simple dict, for testing."""
 
@@ -110,6 +200,11 @@ class DictCache(object):
 class TestSafeExecCaching(unittest.TestCase):
     """Test that caching works on safe_exec."""
 
+    def setUp(self):
+        super(TestSafeExecCaching, self).setUp()
+        LOCAL_RESULTS.clear()
+        DIGESTS.clear()
+
     def test_cache_miss_then_hit(self):
         g = {}
         cache = {}
@@ -122,6 +217,7 @@ class TestSafeExecCaching(unittest.TestCase):
 
         # Fiddle with the cache, then try it again.
         cache[cache.keys()[0]] = (None, {'a': 17})
+        LOCAL_RESULTS.clear()
 
         g = {}
         safe_exec("a = int(math.pi)", g, cache=DictCache(cache))
@@ -153,6 +249,7 @@ class TestSafeExecCaching(unittest.TestCase):
 
         # Change the value stored in the cache, the result should change.
         cache[cache.keys()[0]] = ("Hey there!", {})
+        LOCAL_RESULTS.clear()
 
         with self.assertRaises(SafeExecException):
             safe_exec(code, g, cache=DictCache(cache))
@@ -163,9 +260,42 @@ class TestSafeExecCaching(unittest.TestCase):
 
         # Change it again, now no exception!
         cache[cache.keys()[0]] = (None, {'a': 17})
+        LOCAL_RESULTS.clear()
         safe_exec(code, g, cache=DictCache(cache))
         self.assertEqual(g['a'], 17)
 
+    def test_local_cache(self):
+        g = {}
+        cache = {}
+        safe_exec("a = [int(math.pi)]", g, cache=DictCache(cache))
+
+        # The result is served from this process before the shared cache.
+        cache[cache.keys()[0]] = (None, {'a': [17]})
+        g = {}
+        safe_exec("a = [int(math.pi)]", g, cache=DictCache(cache))
+        self.assertEqual(g['a'], [3])
+        self.assertEqual((LOCAL_RESULTS.hits, len(LOCAL_RESULTS)), (1, 1))
+
+        # Results are copies, not shared with the cache.
+        g['a'].append(4)
+        g = {}
+        safe_exec("a = [int(math.pi)]", g, cache=DictCache(cache))
+        self.assertEqual(g['a'], [3])
+
+    def test_cache_keyed_by_extra_files(self):
+        cache = {}
+        for contents in ["A" * 2000, "B" * 2000, "A" * 2000]:
+            safe_exec("a = 1", {}, python_path=["lib.txt"], extra_files=[("lib.txt", contents)], cache=DictCache(cache))
+        self.assertEqual(len(cache), 2)
+        # The digests of the large files were computed once.
+        self.assertEqual((DIGESTS.hits, DIGESTS.misses), (1, 2))
+
+    def test_large_results_not_cached(self):
+        cache = {}
+        safe_exec("a = 'x' * %d" % MAX_CACHED_RESULT_SIZE, {}, cache=DictCache(cache))
+        self.assertEqual(cache, {})
+        self.assertEqual(len(LOCAL_RESULTS), 0)
+
     def test_unicode_submission(self):
         # Check that using non-ASCII unicode does not raise an encoding error.
         # Try several non-ASCII unicode characters.
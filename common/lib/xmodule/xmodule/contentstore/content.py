@@ -312,6 +312,10 @@ class StaticContentStream(StaticContent):
         self._stream = stream
 
     def stream_data(self):
+        """
+        Stream all of the data, from its start
+        """
+        self._stream.seek(0)
         while True:
             chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
             if len(chunk) == 0:
@@ -3,6 +3,7 @@ MongoDB/GridFS-level code for the contentstore.
 """
 import os
 import json
+import logging
 import pymongo
 import gridfs
 from gridfs.errors import NoFile
@@ -18,6 +19,8 @@ from xmodule.util.misc import escape_invalid_characters
 from xmodule.mongo_utils import connect_to_mongodb, create_collection_index
 from .content import StaticContent, ContentStore, StaticContentStream
 
+log = logging.getLogger(__name__)
+
 
 class MongoContentStore(ContentStore):
     """
@@ -152,23 +155,50 @@ class MongoContentStore(ContentStore):
             else:
                 return None
 
-    def export(self, location, output_directory):
-        content = self.find(location)
-
-        filename = content.name
-        if content.import_path is not None:
-            output_directory = output_directory + '/' + os.path.dirname(content.import_path)
-
+    def export(self, location, output_directory, exported_paths=None):
         if not os.path.exists(output_directory):
             os.makedirs(output_directory)
 
-        # Escape invalid char from filename.
-        export_name = escape_invalid_characters(name=filename, invalid_char_list=['/', '\\'])
+        self.export_to_fs(location, OSFS(output_directory), exported_paths)
 
-        disk_fs = OSFS(output_directory)
+    def export_to_fs(self, location, export_fs, exported_paths=None):
+        """
+        Export the asset at `location` into `export_fs`, under the directory of
+        its import path.  The content is copied from GridFS in chunks, rather
+        than read whole.
+
+        If `exported_paths` is given, it's the set of paths already exported:
+        an asset whose path is among them is skipped with a warning, rather than
+        overwriting the earlier asset.
+        """
+        content_id, __ = self.asset_db_key(location)
+        try:
+            fp = self.fs.get(content_id)
+        except NoFile:
+            raise NotFoundError(content_id)
+
+        with fp:
+            directory = ''
+            import_path = getattr(fp, 'import_path', None)
+            if import_path is not None:
+                directory = os.path.dirname(import_path)
+
+            # Escape invalid char from filename.
+            export_name = escape_invalid_characters(name=fp.displayname, invalid_char_list=['/', '\\'])
+            export_path = os.path.join(directory, export_name)
+
+            if exported_paths is not None:
+                if export_path in exported_paths:
+                    log.warning(
+                        "Not exporting asset %s: another asset was already exported as %s",
+                        location, export_path,
+                    )
+                    return
+                exported_paths.add(export_path)
 
-        with disk_fs.open(export_name, 'wb') as asset_file:
-            asset_file.write(content.data)
+            if directory:
+                export_fs.makedir(directory, recursive=True, allow_recreate=True)
+            export_fs.setcontents(export_path, fp)
 
     def export_all_for_course(self, course_key, output_directory, assets_policy_file):
         """
@@ -181,6 +211,32 @@ class MongoContentStore(ContentStore):
             assets_policy_file: the filename for the policy file which should be in the same
                 directory as the other policy files.
         """
+        exported_paths = set()
+        policy = self._export_all_assets(
+            course_key, lambda asset_key: self.export(asset_key, output_directory, exported_paths)
+        )
+
+        with open(assets_policy_file, 'w') as f:
+            json.dump(policy, f, sort_keys=True, indent=4)
+
+    def export_all_for_course_to_fs(self, course_key, export_fs):
+        """
+        Export all of this course's assets to the 'static' directory of `export_fs`, and all of
+        the assets' attributes to the policy file 'policies/assets.json'.
+        """
+        static_fs = export_fs.makeopendir('static')
+        exported_paths = set()
+        policy = self._export_all_assets(
+            course_key, lambda asset_key: self.export_to_fs(asset_key, static_fs, exported_paths)
+        )
+
+        export_fs.makedir('policies', allow_recreate=True)
+        export_fs.setcontents('policies/assets.json', json.dumps(policy, sort_keys=True, indent=4))
+
+    def _export_all_assets(self, course_key, export):
+        """
+        Calls `export` with the key of each of this course's assets, and returns the assets' policy.
+        """
         policy = {}
         assets, __ = self.get_all_content_for_course(course_key)
 
@@ -193,13 +249,12 @@ class MongoContentStore(ContentStore):
             #
             # When debugging course exports, this might be a good place
             # to look. -- pmitros
-            self.export(asset['asset_key'], output_directory)
+            export(asset['asset_key'])
             for attr, value in asset.iteritems():
                 if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
                     policy.setdefault(asset['asset_key'].name, {})[attr] = value
 
-        with open(assets_policy_file, 'w') as f:
-            json.dump(policy, f, sort_keys=True, indent=4)
+        return policy
 
     def get_all_content_thumbnails_for_course(self, course_key):
         return self._get_all_content_for_course(course_key, get_thumbnails=True)[0]
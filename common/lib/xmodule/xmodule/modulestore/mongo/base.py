@@ -12,6 +12,7 @@ structure:
 }
 """
 
+from collections import OrderedDict
 import copy
 from datetime import datetime
 from importlib import import_module
@@ -19,7 +20,8 @@ import logging
 import pymongo
 import re
 import sys
-from uuid import uuid4
+from threading import RLock
+from uuid import uuid1, uuid4
 
 from bson.son import SON
 from contracts import contract, new_contract
@@ -470,10 +472,37 @@ def as_published(location):
 class MongoBulkOpsRecord(BulkOpsRecord):
     """
     Tracks whether there've been any writes per course and disables inheritance generation
+
+    As long as the only writes are updates of single items, the locations of the updated
+    items are kept in `updated_locations`, so that the inheritance tree need only be
+    recomputed below them; it's None once there's been any other write.
     """
     def __init__(self):
         super(MongoBulkOpsRecord, self).__init__()
-        self.dirty = False
+        self._dirty = False
+        self.updated_locations = set()
+
+    @property
+    def dirty(self):
+        """
+        Whether there've been any writes.  Setting it records a write which requires recomputing
+        the whole inheritance tree.
+        """
+        return self._dirty
+
+    @dirty.setter
+    def dirty(self, value):
+        self._dirty = value
+        self.updated_locations = None if value else set()
+
+    def record_item_update(self, location=None):
+        """
+        Records an update of a single item, which changed the inheritance tree, if at all, only
+        below the item at `location`.  No location means the update changed no inheritable data.
+        """
+        self._dirty = True
+        if location is not None and self.updated_locations is not None:
+            self.updated_locations.add(location)
 
 
 class MongoBulkOpsMixin(BulkOperationsMixin):
@@ -496,7 +525,9 @@ class MongoBulkOpsMixin(BulkOperationsMixin):
         """
         dirty = False
         if bulk_ops_record.dirty:
-            self.refresh_cached_metadata_inheritance_tree(structure_key)
+            self.refresh_cached_metadata_inheritance_tree(
+                structure_key, changed_locations=bulk_ops_record.updated_locations
+            )
             dirty = True
             bulk_ops_record.dirty = False  # brand spanking clean now
         return dirty
@@ -531,6 +562,71 @@ class ParentLocationCache(dict):
             del self[key]
 
 
+class MetadataInheritanceLocalCache(object):
+    """
+    Process-wide LRU cache of metadata inheritance trees, used as a tier in front of the
+    metadata_inheritance_cache_subsystem.
+
+    Entries are keyed by course id and the version of the tree, which changes whenever the
+    tree does, so they never need invalidating.  The trees stored must not be modified.
+
+    The cache is bounded by the number of trees stored in it; least recently used trees are
+    evicted first.
+    """
+    def __init__(self, max_entries):
+        """
+        Arguments:
+            max_entries (int) - The maximum number of trees stored in this cache.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        # Map of (course id, version) to tree, ordered from least to most
+        # recently used.
+        self._entries = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, key):
+        """
+        Returns the tree stored for the given (course id, version), or None.
+        """
+        with self._lock:
+            tree = self._entries.pop(key, None)
+            if tree is None:
+                self.misses += 1
+                return None
+            self._entries[key] = tree
+            self.hits += 1
+            return tree
+
+    def set(self, key, tree):
+        """
+        Stores the given tree for the given (course id, version).
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = tree
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all entries from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# The maximum number of trees kept in METADATA_INHERITANCE_LOCAL_CACHE.
+METADATA_INHERITANCE_LOCAL_CACHE_SIZE = 64
+
+METADATA_INHERITANCE_LOCAL_CACHE = MetadataInheritanceLocalCache(METADATA_INHERITANCE_LOCAL_CACHE_SIZE)
+
+
 class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, MongoBulkOpsMixin):
     """
     A Mongodb backed ModuleStore
@@ -684,18 +780,25 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         else:
             return ParentLocationCache()
 
-    def _compute_metadata_inheritance_tree(self, course_id):
+    def _query_metadata_inheritance_containers(self, course_id, urls=None):
         '''
-        Find all inheritable fields from all xblocks in the course which may define inheritable data
+        Find the inheritable metadata and children of the xblocks in the course which may define
+        inheritable data, or of those among them whose location urls are in `urls`.
+
+        Returns a dict of the results by location url, in which the draft and published revisions
+        of each xblock are merged, and the url of the course if it was found.
         '''
         # get all collections in the course, this query should not return any leaf nodes
-        course_id = self.fill_in_run(course_id)
         query = SON([
             ('_id.tag', 'i4x'),
             ('_id.org', course_id.org),
             ('_id.course', course_id.course),
             ('_id.category', {'$in': BLOCK_TYPES_WITH_CHILDREN})
         ])
+        if urls is not None:
+            locations = [course_id.make_usage_key_from_deprecated_string(url) for url in urls]
+            query['_id.category'] = {'$in': list(set(location.category for location in locations))}
+            query['_id.name'] = {'$in': list(set(location.name for location in locations))}
         # if we're only dealing in the published branch, then only get published containers
         if self.get_branch_setting() == ModuleStoreEnum.Branch.published_only:
             query['_id.revision'] = None
@@ -721,6 +824,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             location = as_published(Location._from_deprecated_son(result['_id'], course_id.run))
 
             location_url = unicode(location)
+            if urls is not None and location_url not in urls:
+                # another xblock with one of the names and categories asked for
+                continue
             if location_url in results_by_url:
                 # found either draft or live to complement the other revision
                 # FIXME this is wrong. If the child was moved in draft from one parent to the other, it will
@@ -735,39 +841,164 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             if location.category == 'course':
                 root = location_url
 
-        # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
+        return results_by_url, root
 
-        def _compute_inherited_metadata(url):
-            """
-            Helper method for computing inherited metadata for a specific location url
-            """
-            my_metadata = results_by_url[url].get('metadata', {})
-
-            # go through all the children and recurse, but only if we have
-            # in the result set. Remember results will not contain leaf nodes
-            for child in results_by_url[url].get('definition', {}).get('children', []):
-                if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
-                else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata.copy()
-                # WARNING: 'parent' is not part of inherited metadata, but
-                # we're piggybacking on this recursive traversal to grab
-                # and cache the child's parent, as a performance optimization.
-                # The 'parent' key will be popped out of the dictionary during
-                # CachingDescriptorSystem.load_item
-                metadata_to_inherit[child].setdefault('parent', {})[self.get_branch_setting()] = url
+    def _compute_inherited_metadata(self, results_by_url, url, metadata_to_inherit):
+        """
+        Helper method for computing inherited metadata for a specific location url
+        """
+        my_metadata = results_by_url[url].get('metadata', {})
+
+        # go through all the children and recurse, but only if we have
+        # in the result set. Remember results will not contain leaf nodes
+        for child in results_by_url[url].get('definition', {}).get('children', []):
+            if child in results_by_url:
+                new_child_metadata = copy.deepcopy(my_metadata)
+                new_child_metadata.update(results_by_url[child].get('metadata', {}))
+                results_by_url[child]['metadata'] = new_child_metadata
+                metadata_to_inherit[child] = new_child_metadata
+                self._compute_inherited_metadata(results_by_url, child, metadata_to_inherit)
+            else:
+                # this is likely a leaf node, so let's record what metadata we need to inherit
+                metadata_to_inherit[child] = my_metadata.copy()
+            # WARNING: 'parent' is not part of inherited metadata, but
+            # we're piggybacking on this recursive traversal to grab
+            # and cache the child's parent, as a performance optimization.
+            # The 'parent' key will be popped out of the dictionary during
+            # CachingDescriptorSystem.load_item
+            metadata_to_inherit[child].setdefault('parent', {})[self.get_branch_setting()] = url
+
+    def _compute_metadata_inheritance_tree(self, course_id):
+        '''
+        Find all inheritable fields from all xblocks in the course which may define inheritable data
+        '''
+        course_id = self.fill_in_run(course_id)
+        results_by_url, root = self._query_metadata_inheritance_containers(course_id)
 
+        # now traverse the tree and compute down the inherited metadata
+        metadata_to_inherit = {}
         if root is not None:
-            _compute_inherited_metadata(root)
+            self._compute_inherited_metadata(results_by_url, root, metadata_to_inherit)
 
         return metadata_to_inherit
 
+    def _update_metadata_inheritance_subtree(self, course_id, tree, location):
+        '''
+        Recompute, in place, the entries of the metadata inheritance `tree` for the xblock at
+        `location` and its descendants, after a change to its metadata or children, querying
+        only the xblocks below it which may define inheritable data.  An xblock which isn't in
+        the tree isn't below the course (yet), so there's nothing to recompute.
+
+        Returns False, leaving the tree unchanged, if the tree has no parent for the xblock.
+        '''
+        branch = self.get_branch_setting()
+        url = unicode(as_published(location))
+        entry = tree.get(url)
+        if entry is None:
+            return True
+        parent_url = entry.get('parent', {}).get(branch)
+        if parent_url is None:
+            return False
+
+        if parent_url in tree:
+            inherited_metadata = {key: value for key, value in tree[parent_url].iteritems() if key != 'parent'}
+        else:
+            # only the course, the root of the tree, has no entry of its own
+            results_by_url, root = self._query_metadata_inheritance_containers(course_id, {parent_url})
+            if root != parent_url:
+                return False
+            inherited_metadata = results_by_url[root].get('metadata', {})
+
+        # get the xblocks below this one which may define inheritable data, a level at a time
+        results_by_url = {}
+        urls = {url}
+        while urls:
+            level, __ = self._query_metadata_inheritance_containers(course_id, urls)
+            results_by_url.update(level)
+            urls = set(
+                child
+                for result in level.itervalues()
+                for child in result.get('definition', {}).get('children', [])
+                if child not in results_by_url and
+                course_id.make_usage_key_from_deprecated_string(child).category in BLOCK_TYPES_WITH_CHILDREN
+            )
+        if url not in results_by_url:
+            return False
+
+        # forget the children which were removed from this xblock
+        children = set(results_by_url[url].get('definition', {}).get('children', []))
+        for child, child_entry in tree.items():
+            if child_entry.get('parent', {}).get(branch) == url and child not in children:
+                del tree[child]
+
+        my_metadata = copy.deepcopy(inherited_metadata)
+        my_metadata.update(results_by_url[url].get('metadata', {}))
+        results_by_url[url]['metadata'] = my_metadata
+        self._compute_inherited_metadata(results_by_url, url, tree)
+        tree[url] = dict(my_metadata, parent=dict(entry['parent']))
+        return True
+
+    def _metadata_inheritance_cache_key(self, course_id, version=None):
+        '''
+        Return the key of the current version of the course's metadata inheritance tree in the
+        metadata_inheritance_cache_subsystem, or the key of the tree itself in the given version.
+        '''
+        if version is None:
+            return u'{}.version'.format(course_id)
+        return u'{}.{}'.format(course_id, version)
+
+    def _get_metadata_inheritance_tree_version(self, course_id):
+        '''
+        Return the current version of the course's metadata inheritance tree in the
+        metadata_inheritance_cache_subsystem, or None if it has none.
+        '''
+        if self.metadata_inheritance_cache_subsystem is None:
+            return None
+        return self.metadata_inheritance_cache_subsystem.get(self._metadata_inheritance_cache_key(course_id))
+
+    def _get_metadata_inheritance_tree_from_cache(self, course_id, version):
+        '''
+        Return the given version of the course's metadata inheritance tree, from
+        METADATA_INHERITANCE_LOCAL_CACHE or else from the metadata_inheritance_cache_subsystem, or
+        None if it isn't cached.
+        '''
+        tree = METADATA_INHERITANCE_LOCAL_CACHE.get((unicode(course_id), version))
+        if tree is None:
+            tree = self.metadata_inheritance_cache_subsystem.get(
+                self._metadata_inheritance_cache_key(course_id, version)
+            )
+            if tree is None:
+                return None
+            METADATA_INHERITANCE_LOCAL_CACHE.set((unicode(course_id), version), tree)
+        # callers may add entries to the tree they are given
+        return dict(tree)
+
+    def _cache_metadata_inheritance_tree(self, course_id, tree):
+        '''
+        Store the course's metadata inheritance tree, as its new current version, in the
+        metadata_inheritance_cache_subsystem and METADATA_INHERITANCE_LOCAL_CACHE.
+
+        Versions are time based, as the tree changes whenever the course is edited.  Former
+        versions are left to expire.
+        '''
+        if self.metadata_inheritance_cache_subsystem is None:
+            return
+        version = uuid1().hex
+        self.metadata_inheritance_cache_subsystem.set(self._metadata_inheritance_cache_key(course_id, version), tree)
+        self.metadata_inheritance_cache_subsystem.set(self._metadata_inheritance_cache_key(course_id), version)
+        METADATA_INHERITANCE_LOCAL_CACHE.set((unicode(course_id), version), dict(tree))
+
+    def _set_request_cached_metadata_inheritance_tree(self, course_id, tree):
+        '''
+        Store the course's metadata inheritance tree in the request cache, if available.
+        '''
+        if self.request_cache is not None:
+            # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
+            # defined
+            if 'metadata_inheritance' not in self.request_cache.data:
+                self.request_cache.data['metadata_inheritance'] = {}
+            self.request_cache.data['metadata_inheritance'][unicode(course_id)] = tree
+
     def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
         '''
         Compute the metadata inheritance for the course.
@@ -782,7 +1013,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
 
             # then look in any caching subsystem (e.g. memcached)
             if self.metadata_inheritance_cache_subsystem is not None:
-                tree = self.metadata_inheritance_cache_subsystem.get(unicode(course_id), {})
+                version = self._get_metadata_inheritance_tree_version(course_id)
+                if version is not None:
+                    tree = self._get_metadata_inheritance_tree_from_cache(course_id, version) or {}
             else:
                 logging.warning(
                     'Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is \
@@ -794,33 +1027,73 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             tree = self._compute_metadata_inheritance_tree(course_id)
 
             # now write out computed tree to caching subsystem (e.g. memcached), if available
-            if self.metadata_inheritance_cache_subsystem is not None:
-                self.metadata_inheritance_cache_subsystem.set(unicode(course_id), tree)
+            self._cache_metadata_inheritance_tree(course_id, tree)
 
         # now populate a request_cache, if available. NOTE, we are outside of the
         # scope of the above if: statement so that after a memcache hit, it'll get
         # put into the request_cache
-        if self.request_cache is not None:
-            # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
-            # defined
-            if 'metadata_inheritance' not in self.request_cache.data:
-                self.request_cache.data['metadata_inheritance'] = {}
-            self.request_cache.data['metadata_inheritance'][unicode(course_id)] = tree
+        self._set_request_cached_metadata_inheritance_tree(course_id, tree)
 
         return tree
 
-    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None):
+    def _update_cached_metadata_inheritance_tree(self, course_id, locations):
+        '''
+        Update the cached metadata inheritance tree of the course after changes to the metadata or
+        children of the xblocks at `locations` alone, recomputing only the tree below them.
+
+        Return the updated tree, or None if the whole tree has to be recomputed instead.
+        '''
+        course_id = self.fill_in_run(course_id)
+        # the inheritable metadata of leaf nodes isn't inherited, nor is it in the tree
+        locations = [location for location in locations if location.category in BLOCK_TYPES_WITH_CHILDREN]
+        if not locations:
+            return self._get_cached_metadata_inheritance_tree(course_id)
+        if any(location.category == 'course' for location in locations):
+            return None
+
+        version = self._get_metadata_inheritance_tree_version(course_id)
+        if version is None:
+            return None
+        tree = self._get_metadata_inheritance_tree_from_cache(course_id, version)
+        if not tree:
+            return None
+
+        for location in locations:
+            if not self._update_metadata_inheritance_subtree(course_id, tree, location):
+                return None
+
+        if self._get_metadata_inheritance_tree_version(course_id) != version:
+            # the tree was updated elsewhere meanwhile, so start over from the course
+            return None
+        self._cache_metadata_inheritance_tree(course_id, tree)
+        self._set_request_cached_metadata_inheritance_tree(course_id, tree)
+        return tree
+
+    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None, changed_locations=None):
         """
         Refresh the cached metadata inheritance tree for the org/course combination
         for location
 
         If given a runtime, it replaces the cached_metadata in that runtime. NOTE: failure to provide
         a runtime may mean that some objects report old values for inherited data.
+
+        If given the locations of the only xblocks whose metadata or children changed, only the
+        tree below them is recomputed, when possible.  During bulk operations, these are recorded
+        until the tree is refreshed at the end of the operation.
         """
         course_id = course_id.for_branch(None)
-        if not self._is_in_bulk_operation(course_id):
+        if self._is_in_bulk_operation(course_id):
+            if changed_locations is not None:
+                bulk_record = self._get_bulk_ops_record(course_id)
+                for location in changed_locations:
+                    bulk_record.record_item_update(location)
+        else:
             # below is done for side effects when runtime is None
-            cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+            cached_metadata = None
+            if changed_locations is not None:
+                cached_metadata = self._update_cached_metadata_inheritance_tree(course_id, changed_locations)
+            if cached_metadata is None:
+                cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
             if runtime:
                 runtime.cached_metadata = cached_metadata
 
@@ -1456,7 +1729,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         if the location doesn't exist
         """
         bulk_record = self._get_bulk_ops_record(location.course_key)
-        bulk_record.dirty = True
+        bulk_record.record_item_update()
         # See http://www.mongodb.org/display/DOCS/Updating for
         # atomic update syntax
         result = self.collection.update(
@@ -1540,7 +1813,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             xblock._edit_info = payload['edit_info']
 
             # recompute (and update) the metadata inheritance tree which is cached
-            self.refresh_cached_metadata_inheritance_tree(xblock.scope_ids.usage_id.course_key, xblock.runtime)
+            self.refresh_cached_metadata_inheritance_tree(
+                xblock.scope_ids.usage_id.course_key, xblock.runtime, changed_locations=[xblock.scope_ids.usage_id]
+            )
             # fire signal that we've written to DB
         except ItemNotFoundError:
             if not allow_not_found:
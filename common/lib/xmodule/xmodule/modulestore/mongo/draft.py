@@ -432,7 +432,8 @@ class DraftModuleStore(MongoModuleStore):
             # ensure keys are in fixed and right order before inserting
             item['_id'] = self._id_dict_to_son(item['_id'])
             bulk_record = self._get_bulk_ops_record(location.course_key)
-            bulk_record.dirty = True
+            # a draft copy leaves the inheritance tree unchanged
+            bulk_record.record_item_update()
             try:
                 self.collection.insert(item)
             except pymongo.errors.DuplicateKeyError:
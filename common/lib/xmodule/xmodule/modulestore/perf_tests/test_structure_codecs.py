@@ -0,0 +1,140 @@
+"""
+Performance test for the codecs serializing split course structures into the
+course structure cache.
+"""
+import datetime
+import itertools
+import timeit
+import unittest
+import zlib
+
+import ddt
+from bson.objectid import ObjectId
+from pytz import UTC
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_codecs import CODECS, decode_structure
+
+# Number of (chapters, sequentials per chapter, verticals per sequential,
+# components per vertical) of the courses tested: from a small course to one
+# of the largest courses we run, of about 12000 blocks.
+COURSE_SHAPES = (
+    (5, 4, 3, 2),
+    (15, 6, 5, 3),
+    (30, 10, 8, 4),
+)
+
+# Number of times each encoding and decoding is repeated; the fastest is kept.
+REPEAT = 5
+
+
+def make_structure(num_chapters, num_sequentials, num_verticals, num_components):
+    """
+    Returns a structure, as returned by `structure_from_mongo`, of a course of
+    the given shape, with fields and edit info like those of imported courses.
+    """
+    structure_id = ObjectId()
+    edited_on = datetime.datetime.now(UTC)
+    blocks = {}
+
+    def add_block(block_type, block_id, fields, children=()):
+        """
+        Adds a block to the structure, and returns its key.
+        """
+        block_key = BlockKey(block_type, block_id)
+        fields = dict(fields, display_name=u"{} {}".format(block_type.title(), block_id))
+        if children:
+            fields['children'] = list(children)
+        blocks[block_key] = BlockData(
+            fields=fields,
+            block_type=block_type,
+            definition=ObjectId(),
+            defaults={},
+            edit_info={
+                'previous_version': None,
+                'update_version': structure_id,
+                'source_version': None,
+                'edited_on': edited_on,
+                'edited_by': 12345,
+            },
+        )
+        return block_key
+
+    counter = itertools.count()
+    chapters = []
+    for _ in xrange(num_chapters):
+        sequentials = []
+        for _ in xrange(num_sequentials):
+            verticals = []
+            for _ in xrange(num_verticals):
+                components = [
+                    add_block(block_type, '{:032x}'.format(next(counter)), fields)
+                    for block_type, fields in itertools.islice(itertools.cycle((
+                        ('html', {'xml_attributes': {'filename': ['html/intro.xml', 'html/intro.xml']}}),
+                        ('problem', {'weight': 1.0, 'max_attempts': 3, 'rerandomize': u'never'}),
+                        ('video', {'youtube_id_1_0': u'3_yD_cEKoCk', 'download_video': True}),
+                    )), num_components)
+                ]
+                verticals.append(add_block('vertical', '{:032x}'.format(next(counter)), {}, components))
+            sequentials.append(add_block(
+                'sequential', '{:032x}'.format(next(counter)),
+                {'format': u'Homework', 'graded': True, 'due': u'2016-09-01T00:00:00Z'}, verticals
+            ))
+        chapters.append(add_block(
+            'chapter', '{:032x}'.format(next(counter)), {'start': u'2016-01-01T00:00:00Z'}, sequentials
+        ))
+    root = add_block('course', 'course', {'tabs': [{'type': 'courseware'}, {'type': 'progress'}]}, chapters)
+
+    return {
+        '_id': structure_id,
+        'root': root,
+        'blocks': blocks,
+        'previous_version': ObjectId(),
+        'original_version': ObjectId(),
+        'edited_on': edited_on,
+        'edited_by': 12345,
+        'schema_version': 1,
+    }
+
+
+@ddt.ddt
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class StructureCodecTimings(unittest.TestCase):
+    """
+    This class exists to time the encoding and decoding of course structures of
+    different sizes, and to measure their serialized size, with each codec.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    test_run_time = datetime.datetime.now()
+
+    @ddt.data(*itertools.product(sorted(CODECS), COURSE_SHAPES))
+    @ddt.unpack
+    def test_codec_timings(self, codec_name, course_shape):
+        """
+        Generate timings and sizes of structures of different sizes, for each codec.
+        """
+        codec = CODECS[codec_name]
+        structure = make_structure(*course_shape)
+
+        data = codec.encode(structure)
+        self.assertEqual(decode_structure(data), structure)
+
+        encode_time = min(timeit.repeat(lambda: codec.encode(structure), number=1, repeat=REPEAT))
+        decode_time = min(timeit.repeat(lambda: decode_structure(data), number=1, repeat=REPEAT))
+
+        result_str = (
+            "{} - Codec: {:<8} - Blocks: {:>6} - Size: {:>9} - Compressed size: {:>9} - "
+            "Encode: {:.4f}s - Decode: {:.4f}s\n"
+        ).format(
+            self.test_run_time, codec_name, len(structure['blocks']), len(data), len(zlib.compress(data, 1)),
+            encode_time, decode_time,
+        )
+        with open("structure_codec_timings.txt", "a") as f:
+            f.write(result_str)
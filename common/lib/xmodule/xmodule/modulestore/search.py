@@ -6,7 +6,11 @@ from .exceptions import (ItemNotFoundError, NoPathToItem)
 LOGGER = getLogger(__name__)
 
 
-def path_to_location(modulestore, usage_key, full_path=False):
+# Categories of the blocks whose children are navigated to by position.
+POSITIONAL_CATEGORIES = ('sequential', 'videosequence')
+
+
+def path_to_location(modulestore, usage_key, full_path=False, path_index=None):
     '''
     Try to find a course_id/chapter/section[/position] path to location in
     modulestore.  The courseware insists that the first level in the course is
@@ -16,6 +20,8 @@ def path_to_location(modulestore, usage_key, full_path=False):
         modulestore: which store holds the relevant objects
         usage_key: :class:`UsageKey` the id of the location to which to generate the path
         full_path: :class:`Bool` if True, return the full path to location. Default is False.
+        path_index: an optional mapping of usage keys to (path, position) tuples, as built
+            by `build_path_index`, looked up before searching the modulestore.
 
     Raises
         ItemNotFoundError if the location doesn't exist.
@@ -74,49 +80,129 @@ def path_to_location(modulestore, usage_key, full_path=False):
             newpath = (next_usage, path)
             queue.append((parent, newpath))
 
-    with modulestore.bulk_operations(usage_key.course_key):
-        if not modulestore.has_item(usage_key):
-            raise ItemNotFoundError(usage_key)
-
-        path = find_path_to_course()
-        if path is None:
-            raise NoPathToItem(usage_key)
-
-        if full_path:
-            return path
-
-        n = len(path)
-        course_id = path[0].course_key
-        # pull out the location names
-        chapter = path[1].name if n > 1 else None
-        section = path[2].name if n > 2 else None
-        vertical = path[3].name if n > 3 else None
-        # Figure out the position
-        position = None
-
-        # This block of code will find the position of a module within a nested tree
-        # of modules. If a problem is on tab 2 of a sequence that's on tab 3 of a
-        # sequence, the resulting position is 3_2. However, no positional modules
-        # (e.g. sequential and videosequence) currently deal with this form of
-        # representing nested positions. This needs to happen before jumping to a
-        # module nested in more than one positional module will work.
-        if n > 3:
-            position_list = []
-            for path_index in range(2, n - 1):
-                category = path[path_index].block_type
-                if category == 'sequential' or category == 'videosequence':
-                    section_desc = modulestore.get_item(path[path_index])
-                    # this calls get_children rather than just children b/c old mongo includes private children
-                    # in children but not in get_children
-                    child_locs = [c.location for c in section_desc.get_children()]
-                    # positions are 1-indexed, and should be strings to be consistent with
-                    # url parsing.
-                    position_list.append(str(child_locs.index(path[path_index + 1]) + 1))
-            position = "_".join(position_list)
+    indexed = path_index.get(usage_key) if path_index is not None else None
+    if indexed is not None:
+        path, position = indexed
+        path = list(path)
+    else:
+        with modulestore.bulk_operations(usage_key.course_key):
+            if not modulestore.has_item(usage_key):
+                raise ItemNotFoundError(usage_key)
+
+            path = find_path_to_course()
+            if path is None:
+                raise NoPathToItem(usage_key)
+
+            if full_path:
+                return path
+
+            # this calls get_children rather than just children b/c old mongo includes private children
+            # in children but not in get_children
+            position = _path_position(
+                path, lambda location: [c.location for c in modulestore.get_item(location).get_children()]
+            )
+
+    if full_path:
+        return path
+
+    n = len(path)
+    course_id = path[0].course_key
+    # pull out the location names
+    chapter = path[1].name if n > 1 else None
+    section = path[2].name if n > 2 else None
+    vertical = path[3].name if n > 3 else None
 
     return (course_id, chapter, section, vertical, position, path[-1])
 
 
+def _path_position(path, get_child_locations):
+    '''
+    Returns the position of the last block of `path` (a list of usage keys
+    from the course root), as returned by path_to_location.
+    `get_child_locations` returns the usage keys of a block's children.
+    '''
+    # This block of code will find the position of a module within a nested tree
+    # of modules. If a problem is on tab 2 of a sequence that's on tab 3 of a
+    # sequence, the resulting position is 3_2. However, no positional modules
+    # (e.g. sequential and videosequence) currently deal with this form of
+    # representing nested positions. This needs to happen before jumping to a
+    # module nested in more than one positional module will work.
+    n = len(path)
+    if n <= 3:
+        return None
+    position_list = []
+    for path_index in range(2, n - 1):
+        if path[path_index].block_type in POSITIONAL_CATEGORIES:
+            child_locs = get_child_locations(path[path_index])
+            # positions are 1-indexed, and should be strings to be consistent with
+            # url parsing.
+            position_list.append(str(child_locs.index(path[path_index + 1]) + 1))
+    return "_".join(position_list)
+
+
+def build_path_index(modulestore, course_key):
+    '''
+    Finds the paths from the root of a course to each of its blocks, walking
+    the course once rather than searching up from each block as
+    path_to_location does.
+
+    Blocks with more than one parent, and their descendants, are left out:
+    which of their paths path_to_location finds depends on the modulestore.
+
+    Raises
+        ItemNotFoundError if the course doesn't exist.
+
+    Returns:
+        a dict mapping the usage key of each block to a (path, position) tuple,
+        the path being the tuple of usage keys from the course root to the
+        block, and the position being as returned by path_to_location, which
+        accepts the dict as its `path_index`.
+    '''
+    with modulestore.bulk_operations(course_key):
+        course = modulestore.get_course(course_key, depth=None)
+        if course is None:
+            raise ItemNotFoundError(course_key)
+
+        # Map of each block's usage key to those of its children, and of each
+        # block's usage key to its number of parents.
+        root = _unversioned(course.location)
+        children = {}
+        parent_counts = {root: 0}
+        stack = [course]
+        while stack:
+            block = stack.pop()
+            child_locations = children[_unversioned(block.location)] = []
+            for child in block.get_children():
+                child_location = _unversioned(child.location)
+                child_locations.append(child_location)
+                if child_location not in parent_counts:
+                    parent_counts[child_location] = 0
+                    stack.append(child)
+                parent_counts[child_location] += 1
+
+    index = {}
+    stack = [(root,)]
+    while stack:
+        path = stack.pop()
+        index[path[-1]] = (path, _path_position(path, children.__getitem__))
+        for child_location in children[path[-1]]:
+            if parent_counts[child_location] == 1:
+                stack.append(path + (child_location,))
+    return index
+
+
+def _unversioned(usage_key):
+    '''
+    Returns `usage_key` without the version and branch some modulestores give
+    the locations of their blocks.
+    '''
+    if hasattr(usage_key, 'version_agnostic'):
+        usage_key = usage_key.version_agnostic()
+    if hasattr(usage_key, 'for_branch'):
+        usage_key = usage_key.for_branch(None)
+    return usage_key
+
+
 def navigation_index(position):
     """
     Get the navigation index from the position argument (where the position argument was recieved from a call to
@@ -2,19 +2,21 @@
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
 import datetime
-import cPickle as pickle
 import math
 import zlib
 import pymongo
 import pytz
 import re
+from collections import OrderedDict
 from contextlib import contextmanager
+from threading import RLock
 from time import time
 
 # Import this just to export it
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
 try:
+    from django.conf import settings
     from django.core.cache import caches, InvalidCacheBackendError
     DJANGO_AVAILABLE = True
 except ImportError:
@@ -27,6 +29,7 @@ from mongodb_proxy import autoretry_read
 from xmodule.exceptions import HeartbeatFailure
 from xmodule.modulestore import BlockData
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_codecs import decode_structure, get_codec
 from xmodule.mongo_utils import connect_to_mongodb, create_collection_index
 
 
@@ -223,58 +226,150 @@ def structure_to_mongo(structure, course_context=None):
         return new_structure
 
 
+class StructureLocalCache(object):
+    """
+    Process-wide LRU cache of uncompressed, serialized course structures, used
+    as a tier in front of the 'course_structure_cache'.
+
+    Structures are immutable, so entries are keyed by structure id alone and
+    never need invalidating.  Serialized data (and not structures) is stored,
+    since callers may modify the structures they are given.
+
+    The cache is bounded by the total number of bytes stored in it; least
+    recently used entries are evicted first.
+    """
+    def __init__(self, max_size):
+        """
+        Arguments:
+            max_size (int) - The maximum total size, in bytes, of the data
+                stored in this cache.
+        """
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+        # Map of structure id to serialized structure, ordered from least to
+        # most recently used.
+        self._entries = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, key):
+        """
+        Returns the serialized structure stored for the given id, or None.
+        """
+        with self._lock:
+            data = self._entries.pop(key, None)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries[key] = data
+            self.hits += 1
+            return data
+
+    def set(self, key, data):
+        """
+        Stores the given serialized structure for the given id.  Data larger
+        than max_size is not stored.
+        """
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key))
+            if len(data) > self.max_size:
+                return
+            self._entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_size:
+                _, evicted_data = self._entries.popitem(last=False)
+                self.size -= len(evicted_data)
+
+    def clear(self):
+        """
+        Removes all entries from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# The maximum total size of the structures kept in STRUCTURE_LOCAL_CACHE.
+STRUCTURE_LOCAL_CACHE_SIZE = 128 * 1024 * 1024
+
+STRUCTURE_LOCAL_CACHE = StructureLocalCache(STRUCTURE_LOCAL_CACHE_SIZE)
+
+
 class CourseStructureCache(object):
     """
     Wrapper around django cache object to cache course structure objects.
-    The course structures are pickled and compressed when cached.
+    The course structures are serialized, with the codec named by the
+    COURSE_STRUCTURE_CACHE_CODEC setting, and compressed when cached.
+
+    Structures read from the cache are also kept, uncompressed, in
+    STRUCTURE_LOCAL_CACHE, which is checked first.
 
     If the 'course_structure_cache' doesn't exist, then don't do anything for
     for set and get.
     """
     def __init__(self):
         self.cache = None
+        self.codec = get_codec('pickle')
         if DJANGO_AVAILABLE:
             try:
                 self.cache = get_cache('course_structure_cache')
             except InvalidCacheBackendError:
                 pass
+            self.codec = get_codec(getattr(settings, 'COURSE_STRUCTURE_CACHE_CODEC', 'pickle'))
 
     def get(self, key, course_context=None):
-        """Pull the compressed, pickled struct data from cache and deserialize."""
+        """Pull the compressed, serialized struct data from cache and deserialize."""
         if self.cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
-            compressed_pickled_data = self.cache.get(key)
-            tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
+            data = STRUCTURE_LOCAL_CACHE.get(key)
+            if data is not None:
+                tagger.tag(from_cache='true', cache_tier='local')
+                tagger.measure('uncompressed_size', len(data))
+                return decode_structure(data)
+
+            compressed_data = self.cache.get(key)
+            tagger.tag(from_cache=str(compressed_data is not None).lower())
 
-            if compressed_pickled_data is None:
+            if compressed_data is None:
                 # Always log cache misses, because they are unexpected
                 tagger.sample_rate = 1
+                tagger.tag(cache_tier='none')
                 return None
 
-            tagger.measure('compressed_size', len(compressed_pickled_data))
+            tagger.tag(cache_tier='shared')
+            tagger.measure('compressed_size', len(compressed_data))
 
-            pickled_data = zlib.decompress(compressed_pickled_data)
-            tagger.measure('uncompressed_size', len(pickled_data))
+            data = zlib.decompress(compressed_data)
+            tagger.measure('uncompressed_size', len(data))
+            STRUCTURE_LOCAL_CACHE.set(key, data)
 
-            return pickle.loads(pickled_data)
+            # Structures may have been written with any codec.
+            return decode_structure(data)
 
     def set(self, key, structure, course_context=None):
-        """Given a structure, will pickle, compress, and write to cache."""
+        """Given a structure, will serialize, compress, and write to cache."""
         if self.cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.set", course_context) as tagger:
-            pickled_data = pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
-            tagger.measure('uncompressed_size', len(pickled_data))
+            tagger.tag(codec=self.codec.name)
+            data = self.codec.encode(structure)
+            tagger.measure('uncompressed_size', len(data))
 
             # 1 = Fastest (slightly larger results)
-            compressed_pickled_data = zlib.compress(pickled_data, 1)
-            tagger.measure('compressed_size', len(compressed_pickled_data))
+            compressed_data = zlib.compress(data, 1)
+            tagger.measure('compressed_size', len(compressed_data))
 
             # Stuctures are immutable, so we set a timeout of "never"
-            self.cache.set(key, compressed_pickled_data, None)
+            self.cache.set(key, compressed_data, None)
 
 
 class MongoConnection(object):
@@ -538,6 +633,17 @@ class MongoConnection(object):
             tagger.tag(block_type=definition['block_type'])
             self.definitions.insert(definition)
 
+    def insert_definitions(self, definitions, course_context=None):
+        """
+        Create the definitions in the db, in as few round trips as possible.
+
+        Raises DuplicateKeyError if any of the definitions already exists,
+        once all of the others have been created.
+        """
+        with TIMER.timer("insert_definitions", course_context) as tagger:
+            tagger.measure('definitions', len(definitions))
+            self.definitions.insert(definitions, continue_on_error=True)
+
     def ensure_indexes(self):
         """
         Ensure that all appropriate indexes are created that are needed by this modulestore, or raise
@@ -0,0 +1,318 @@
+"""
+Serialization of split course structures for the course structure cache.
+
+Each codec turns a structure, in the form returned by `structure_from_mongo`
+(its 'blocks' a map of BlockKey to BlockData), into a string, and back.  The
+strings are self-describing: `decode_structure` reads any of them, whichever
+codec wrote it, so the codec used for writing can be changed while the cache
+holds structures written by another.
+"""
+import cPickle as pickle
+import datetime
+import gc
+import marshal
+from contextlib import contextmanager
+
+import pytz
+from bson.objectid import ObjectId
+
+from xmodule.modulestore import BlockData, EditInfo
+from xmodule.modulestore.split_mongo import BlockKey
+
+
+class PickleStructureCodec(object):
+    """
+    Serializes structures with pickle.
+    """
+    name = 'pickle'
+
+    # Pickles of protocol 2 and above start with the PROTO opcode.
+    tag = '\x80'
+
+    def encode(self, structure):
+        """
+        Returns the serialized `structure`.
+        """
+        return pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, data):
+        """
+        Returns the structure serialized in `data`.
+        """
+        return pickle.loads(data)
+
+
+class MarshalStructureCodec(object):
+    """
+    Serializes structures with marshal, after flattening them into tuples of
+    builtin types.
+
+    Blocks are stored as tuples of their attributes, and children as tuples of
+    (block_type, block_id), so that decoding only has to create the BlockKeys
+    and BlockDatas, instead of reconstructing every object as unpickling does.
+
+    Structures holding values which marshal can't serialize are pickled
+    instead.
+    """
+    name = 'marshal'
+    tag = 'M'
+
+    # The version of marshal's format used, and of the layout of the tuples.
+    marshal_version = 2
+    layout_version = 1
+
+    def __init__(self, fallback=None):
+        self.fallback = fallback or PickleStructureCodec()
+
+    def encode(self, structure):
+        """
+        Returns the serialized `structure`.
+        """
+        try:
+            return self.tag + marshal.dumps(self._flatten(structure), self.marshal_version)
+        except (ValueError, TypeError, AttributeError):
+            # The structure holds something other than the types _flatten
+            # expects.
+            return self.fallback.encode(structure)
+
+    def decode(self, data):
+        """
+        Returns the structure serialized in `data`.
+        """
+        layout_version, root, blocks, other = marshal.loads(buffer(data, len(self.tag)))
+        if layout_version != self.layout_version:
+            raise ValueError(u"Unknown structure layout version {}".format(layout_version))
+
+        # Children are given the BlockKeys of the blocks they refer to, rather
+        # than keys of their own.
+        block_keys = {block[0]: _block_key(block[0]) for block in blocks}
+        block_keys[root] = root = block_keys.get(root) or _block_key(root)
+
+        # Blocks mostly share their versions and edit times, so each is only
+        # decoded once, and the blocks share the resulting objects as they do
+        # once unpickled.
+        object_ids = _Memo(_decode_object_id)
+        values = _Memo(_decode_value)
+
+        structure = {_decode_value(key): _decode_value(value) for key, value in other}
+        structure['root'] = root
+        structure['blocks'] = new_blocks = {}
+        for (
+            block_key, fields, children, block_type, definition, defaults, asides,
+            previous_version, update_version, source_version, edited_on, edited_by,
+            original_usage, original_usage_version,
+        ) in blocks:
+            if children is not None:
+                fields['children'] = [block_keys.get(child) or _block_key(child) for child in children]
+            new_blocks[block_keys[block_key]] = _block_data(
+                fields, block_type, _decode_object_id(definition), defaults, asides, _edit_info(
+                    object_ids[previous_version],
+                    object_ids[update_version],
+                    object_ids[source_version],
+                    values[edited_on],
+                    edited_by,
+                    original_usage,
+                    object_ids[original_usage_version],
+                )
+            )
+        return structure
+
+    def _flatten(self, structure):
+        """
+        Returns `structure` as a tuple of values marshal can serialize.
+        """
+        blocks = []
+        for block_key, block in structure['blocks'].iteritems():
+            fields = block.fields
+            children = fields.get('children')
+            if children is not None:
+                fields = dict(fields)
+                children = tuple(tuple(child) for child in fields.pop('children'))
+            edit_info = block.edit_info
+            blocks.append((
+                tuple(block_key),
+                fields,
+                children,
+                block.block_type,
+                _encode_object_id(block.definition),
+                block.defaults,
+                block.get_asides(),
+                _encode_object_id(edit_info.previous_version),
+                _encode_object_id(edit_info.update_version),
+                _encode_object_id(edit_info.source_version),
+                _encode_value(edit_info.edited_on),
+                edit_info.edited_by,
+                edit_info.original_usage,
+                _encode_object_id(edit_info.original_usage_version),
+            ))
+        other = tuple(
+            (_encode_value(key), _encode_value(value))
+            for key, value in structure.iteritems()
+            if key not in ('root', 'blocks')
+        )
+        return (self.layout_version, tuple(structure['root']), blocks, other)
+
+
+class _Memo(dict):
+    """
+    Map of encoded values to the values `decode` decodes them to, decoding
+    each when it's first looked up.
+    """
+    def __init__(self, decode):
+        super(_Memo, self).__init__()
+        self.decode = decode
+
+    def __missing__(self, key):
+        value = self[key] = self.decode(key)
+        return value
+
+
+def _block_key(pair):
+    """
+    Returns the BlockKey for a (block_type, block_id) pair, skipping the
+    contract checks of BlockKey's constructor.
+    """
+    return tuple.__new__(BlockKey, pair)
+
+
+def _block_data(fields, block_type, definition, defaults, asides, edit_info):
+    """
+    Returns a BlockData with the given attributes.  Sets them directly, rather
+    than through BlockData.from_storable, which is measurably slower for the
+    thousands of blocks of a course; keep the two in step.
+    """
+    block = BlockData.__new__(BlockData)
+    block.definition_loaded = False
+    block.fields = fields
+    block.block_type = block_type
+    block.definition = definition
+    block.defaults = defaults
+    block.asides = asides
+    block.edit_info = edit_info
+    return block
+
+
+def _edit_info(
+    previous_version, update_version, source_version, edited_on, edited_by, original_usage, original_usage_version
+):
+    """
+    Returns an EditInfo with the given attributes, set as `_block_data` does.
+    """
+    edit_info = EditInfo.__new__(EditInfo)
+    edit_info.previous_version = previous_version
+    edit_info.update_version = update_version
+    edit_info.source_version = source_version
+    edit_info.edited_on = edited_on
+    edit_info.edited_by = edited_by
+    edit_info.original_usage = original_usage
+    edit_info.original_usage_version = original_usage_version
+    edit_info._subtree_edited_on = None  # pylint: disable=protected-access
+    edit_info._subtree_edited_by = None  # pylint: disable=protected-access
+    return edit_info
+
+
+def _encode_object_id(value):
+    """
+    Returns the bytes of an ObjectId, or None.
+    """
+    if value is None:
+        return None
+    return value.binary
+
+
+def _decode_object_id(value):
+    """
+    Reverses `_encode_object_id`.
+    """
+    if value is None:
+        return None
+    return ObjectId(value)
+
+
+# Markers for the values `_encode_value` has to convert.
+_OBJECT_ID = 'o'
+_NAIVE_DATETIME = 'n'
+_AWARE_DATETIME = 'a'
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def _encode_value(value):
+    """
+    Returns `value` as something marshal can serialize.  ObjectIds and
+    datetimes are converted to tuples; other values are wrapped in a tuple.
+    """
+    if isinstance(value, ObjectId):
+        return (_OBJECT_ID, value.binary)
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            return (_NAIVE_DATETIME, _microseconds(value))
+        return (_AWARE_DATETIME, _microseconds(value.astimezone(pytz.utc).replace(tzinfo=None)))
+    return (value,)
+
+
+def _decode_value(value):
+    """
+    Reverses `_encode_value`.
+    """
+    if len(value) == 1:
+        return value[0]
+    kind, encoded = value
+    if kind == _OBJECT_ID:
+        return ObjectId(encoded)
+    decoded = _EPOCH + datetime.timedelta(microseconds=encoded)
+    if kind == _AWARE_DATETIME:
+        decoded = decoded.replace(tzinfo=pytz.utc)
+    return decoded
+
+
+def _microseconds(value):
+    """
+    Returns the number of microseconds between the epoch and a naive datetime.
+    """
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+CODECS = {codec.name: codec for codec in (PickleStructureCodec(), MarshalStructureCodec())}
+_CODECS_BY_TAG = {codec.tag: codec for codec in CODECS.itervalues()}
+
+
+def get_codec(name):
+    """
+    Returns the codec with the given name.
+    """
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(u"Unknown course structure codec {!r}".format(name))
+
+
+def decode_structure(data):
+    """
+    Returns the structure serialized in `data`, by any of the codecs.
+    """
+    try:
+        codec = _CODECS_BY_TAG[data[:1]]
+    except KeyError:
+        raise ValueError(u"Unknown course structure encoding")
+    with _gc_paused():
+        return codec.decode(data)
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Disables the garbage collector for the duration of the block.
+
+    Decoding a structure creates tens of thousands of objects, none of them
+    garbage, which would otherwise trigger several pointless collections.
+    """
+    if not gc.isenabled():
+        yield
+        return
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
@@ -0,0 +1,192 @@
+"""
+A write-only filesystem which exports into a tar archive as it's written.
+
+`TarExportFS` implements the part of the pyfilesystem API that exports use
+(`makedir`, `makeopendir`, `opendir`, `open` for writing, `setcontents`,
+`exists`, `isdir` and `isfile`), so that a course can be exported straight
+into a compressed stream, such as an HTTP response, without first being
+written out to disk.
+
+Each file is added to the archive once it's closed, so that only the files
+currently open are held in memory; files written with `setcontents` from a
+file object are copied into the archive in chunks.
+
+Members of a tar stream can't be rewritten, so a file written again is
+added to the archive again: as when writing to disk, the last write wins,
+since extracting an archive keeps the last of the members with a name.
+"""
+import io
+import os
+import posixpath
+import tarfile
+import time
+
+from fs.errors import (
+    DestinationExistsError, ParentDirectoryMissingError, ResourceInvalidError, ResourceNotFoundError,
+    UnsupportedError,
+)
+
+
+class _TarArchive(object):
+    """
+    The archive shared by a `TarExportFS` and the directories opened from it,
+    and the paths written into it.
+    """
+    def __init__(self, fileobj, mode):
+        self.tar = tarfile.open(fileobj=fileobj, mode=mode, encoding='utf-8')
+        self.dirs = {''}
+        self.files = set()
+        self.mtime = time.time()
+
+    def add_dir(self, path):
+        """
+        Adds the directory `path` to the archive.
+        """
+        info = tarfile.TarInfo(path)
+        info.type = tarfile.DIRTYPE
+        info.mode = 0755
+        info.mtime = self.mtime
+        self.tar.addfile(info)
+        self.dirs.add(path)
+
+    def add_file(self, path, fileobj, size):
+        """
+        Adds the file `path` to the archive, with `size` bytes read from
+        `fileobj`.
+        """
+        info = tarfile.TarInfo(path)
+        info.size = size
+        info.mode = 0644
+        info.mtime = self.mtime
+        self.tar.addfile(info, fileobj)
+        self.files.add(path)
+
+
+class _TarMemberFile(io.BytesIO):
+    """
+    A file being written into the archive, which is added to it when closed.
+    """
+    def __init__(self, archive, path):
+        super(_TarMemberFile, self).__init__()
+        self.archive = archive
+        self.path = path
+
+    def close(self):
+        if not self.closed:
+            size = self.tell()
+            self.seek(0)
+            self.archive.add_file(self.path, self, size)
+        super(_TarMemberFile, self).close()
+
+
+class TarExportFS(object):
+    """
+    A filesystem writing everything written to it into the tar archive
+    `fileobj`, compressed with `compression`.  `fileobj` needn't be seekable.
+
+    Close the filesystem once the export is done, to finish the archive.
+    """
+    def __init__(self, fileobj, compression='gz'):
+        self._archive = _TarArchive(fileobj, 'w|' + compression)
+        self._root = ''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Finishes the archive.  Closing the directories opened from the
+        filesystem does nothing.
+        """
+        if not self._root:
+            self._archive.tar.close()
+
+    def _path(self, path):
+        """
+        Returns the path in the archive of `path`.
+        """
+        path = posixpath.normpath(posixpath.join(self._root, path.lstrip('/')))
+        if path == '.':
+            return ''
+        if path == '..' or path.startswith('../'):
+            raise ValueError(u"{} is outside of the filesystem".format(path))
+        return path
+
+    def exists(self, path):
+        path = self._path(path)
+        return path in self._archive.dirs or path in self._archive.files
+
+    def isdir(self, path):
+        return self._path(path) in self._archive.dirs
+
+    def isfile(self, path):
+        return self._path(path) in self._archive.files
+
+    def makedir(self, path, recursive=False, allow_recreate=False):
+        self._makedir(self._path(path), path, recursive, allow_recreate)
+
+    def _makedir(self, full_path, path, recursive, allow_recreate):
+        """
+        Adds the directory `full_path` of the archive, for `makedir(path)`.
+        """
+        if full_path in self._archive.files:
+            raise ResourceInvalidError(path)
+        if full_path in self._archive.dirs:
+            if not allow_recreate:
+                raise DestinationExistsError(path)
+            return
+        parent = posixpath.dirname(full_path)
+        if parent not in self._archive.dirs:
+            if not recursive:
+                raise ParentDirectoryMissingError(path)
+            self._makedir(parent, path, recursive, True)
+        self._archive.add_dir(full_path)
+
+    def opendir(self, path):
+        full_path = self._path(path)
+        if full_path not in self._archive.dirs:
+            raise ResourceNotFoundError(path)
+        directory = TarExportFS.__new__(TarExportFS)
+        directory._archive = self._archive  # pylint: disable=protected-access
+        directory._root = full_path  # pylint: disable=protected-access
+        return directory
+
+    def makeopendir(self, path, recursive=False):
+        self.makedir(path, recursive=recursive, allow_recreate=True)
+        return self.opendir(path)
+
+    def _check_new_file(self, path):
+        """
+        Returns the path in the archive of the file `path`, which mustn't be
+        a directory, in an existing directory.
+        """
+        full_path = self._path(path)
+        if full_path in self._archive.dirs:
+            raise ResourceInvalidError(path)
+        if posixpath.dirname(full_path) not in self._archive.dirs:
+            raise ParentDirectoryMissingError(path)
+        return full_path
+
+    def open(self, path, mode='r', **kwargs):  # pylint: disable=unused-argument
+        if 'w' not in mode or '+' in mode:
+            raise UnsupportedError(u"open {} with mode {}".format(path, mode))
+        return _TarMemberFile(self._archive, self._check_new_file(path))
+
+    def setcontents(self, path, data=b'', chunk_size=64 * 1024):  # pylint: disable=unused-argument
+        """
+        Writes the file `path` with `data`, a string or a seekable file object.
+        """
+        full_path = self._check_new_file(path)
+        if isinstance(data, basestring):
+            if isinstance(data, unicode):
+                data = data.encode('utf-8')
+            self._archive.add_file(full_path, io.BytesIO(data), len(data))
+        else:
+            start = data.tell()
+            data.seek(0, os.SEEK_END)
+            size = data.tell() - start
+            data.seek(start)
+            self._archive.add_file(full_path, data, size)
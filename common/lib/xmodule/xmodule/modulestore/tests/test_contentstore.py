@@ -1,7 +1,10 @@
 """
  Test contentstore.mongo functionality
 """
+import io
+import json
 import logging
+import tarfile
 from uuid import uuid4
 import unittest
 import mimetypes
@@ -15,6 +18,7 @@ from xmodule.tests import DATA_DIR
 from xmodule.contentstore.mongo import MongoContentStore
 from xmodule.contentstore.content import StaticContent
 from xmodule.exceptions import NotFoundError
+from xmodule.modulestore.tarfs import TarExportFS
 import ddt
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 
@@ -145,6 +149,52 @@ class TestContentstore(unittest.TestCase):
         finally:
             shutil.rmtree(root_dir)
 
+    @ddt.data(True, False)
+    def test_export_for_course_to_fs(self, deprecated):
+        """
+        Test export into a tar archive
+        """
+        self.set_up_assets(deprecated)
+        tarball = io.BytesIO()
+        with TarExportFS(tarball) as export_fs:
+            self.contentstore.export_all_for_course_to_fs(self.course1_key, export_fs)
+        tarball.seek(0)
+        tar_file = tarfile.open(fileobj=tarball)
+        names = tar_file.getnames()
+        for filename in self.course1_files:
+            self.assertIn('static/' + filename, names)
+            self.assertEqual(
+                tar_file.extractfile('static/' + filename).read(),
+                self.contentstore.find(self.course1_key.make_asset_key('asset', filename)).data,
+            )
+        for filename in self.course2_files:
+            if filename not in self.course1_files:
+                self.assertNotIn('static/' + filename, names)
+        policy = json.load(tar_file.extractfile('policies/assets.json'))
+        self.assertItemsEqual(policy.keys(), self.course1_files)
+
+    @ddt.data(True, False)
+    def test_export_colliding_assets_to_fs(self, deprecated):
+        """
+        Test that of two assets exported to the same path, only one is exported
+        """
+        self.set_up_assets(deprecated)
+        # picture2.jpg is displayed with the same name as picture1.jpg
+        self.save_asset(
+            'picture2.jpg', self.course1_key.make_asset_key('asset', 'picture2.jpg'), 'picture1.jpg', False
+        )
+        tarball = io.BytesIO()
+        with TarExportFS(tarball) as export_fs:
+            self.contentstore.export_all_for_course_to_fs(self.course1_key, export_fs)
+        tarball.seek(0)
+        tar_file = tarfile.open(fileobj=tarball)
+        names = tar_file.getnames()
+        self.assertEqual(names.count('static/picture1.jpg'), 1)
+        self.assertNotIn('static/picture2.jpg', names)
+        self.assertIn('static/contains.sh', names)
+        policy = json.load(tar_file.extractfile('policies/assets.json'))
+        self.assertItemsEqual(policy.keys(), self.course1_files)
+
     @ddt.data(True, False)
     def test_get_all_content(self, deprecated):
         """
@@ -47,7 +47,7 @@ from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.draft_and_published import UnsupportedRevisionError, DIRECT_ONLY_CATEGORIES
 from xmodule.modulestore.exceptions import ItemNotFoundError, DuplicateCourseError, ReferentialIntegrityError, NoPathToItem
 from xmodule.modulestore.mixed import MixedModuleStore
-from xmodule.modulestore.search import path_to_location, navigation_index
+from xmodule.modulestore.search import build_path_index, path_to_location, navigation_index
 from xmodule.modulestore.store_utilities import DETACHED_XBLOCK_TYPES
 from xmodule.modulestore.tests.factories import check_mongo_calls, check_exact_number_of_calls, \
     mongo_uses_error_check
@@ -1309,6 +1309,29 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
         with self.assertRaises(NoPathToItem):
             path_to_location(self.store, orphan)
 
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_path_to_location_with_path_index(self, default_ms):
+        """
+        Make sure that path_to_location finds the same paths in an index built
+        by build_path_index, without searching the modulestore
+        """
+        self.initdb(default_ms)
+
+        course_key = self.course_locations[self.MONGO_COURSEID].course_key
+        with self.store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+            self._create_block_hierarchy()
+            path_index = build_path_index(self.store, course_key)
+
+            for location in (self.problem_x1a_2, self.vertical_x1b, self.sequential_x2, self.chapter_y):
+                expected = path_to_location(self.store, location)
+                expected_full_path = path_to_location(self.store, location, full_path=True)
+                with check_mongo_calls(0):
+                    self.assertEqual(path_to_location(self.store, location, path_index=path_index), expected)
+                    self.assertEqual(
+                        path_to_location(self.store, location, full_path=True, path_index=path_index),
+                        expected_full_path
+                    )
+
     def test_navigation_index(self):
         """
         Make sure that navigation_index correctly parses the various position values that we might get from calls to
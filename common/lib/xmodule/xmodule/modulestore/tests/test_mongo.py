@@ -40,9 +40,12 @@ from nose.tools import assert_in
 from xmodule.exceptions import NotFoundError
 from git.test.lib.asserts import assert_not_none
 from xmodule.x_module import XModuleMixin
-from xmodule.modulestore.mongo.base import as_draft
+from xmodule.modulestore.mongo.base import (
+    as_draft, as_published, MetadataInheritanceLocalCache, METADATA_INHERITANCE_LOCAL_CACHE
+)
+from xmodule.modulestore.tests.factories import check_exact_number_of_calls, check_mongo_calls
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
-from xmodule.modulestore.tests.utils import LocationMixin, mock_tab_from_json
+from xmodule.modulestore.tests.utils import LocationMixin, MemoryCache, mock_tab_from_json
 from xmodule.modulestore.edit_info import EditInfoMixin
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.inheritance import InheritanceMixin
@@ -739,6 +742,106 @@ class TestMongoModuleStoreWithNoAssetCollection(TestMongoModuleStore):
         self.assertRaises(ItemNotFoundError, lambda: self.draft_store.get_all_asset_metadata(course_key, 'asset')[:1])
 
 
+class TestMongoMetadataInheritanceCache(TestMongoModuleStoreBase):
+    """
+    Tests for the caching of metadata inheritance trees by the Mongo modulestore.
+    """
+    courses = ['toy']
+
+    def setUp(self):
+        super(TestMongoMetadataInheritanceCache, self).setUp()
+        self.store = self.draft_store
+        patcher = patch.object(self.store, 'metadata_inheritance_cache_subsystem', MemoryCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        course = self.store.create_course('TestX', 'Inheritance', uuid4().hex[:5], self.dummy_user)
+        self.addCleanup(self.store.delete_course, course.id, self.dummy_user)
+        self.course_key = course.id
+        self.chapter = self.store.create_child(self.dummy_user, course.location, 'chapter')
+        self.sequential = self.store.create_child(self.dummy_user, self.chapter.location, 'sequential')
+        self.vertical = self.store.create_child(self.dummy_user, self.sequential.location, 'vertical')
+        self.html = self.store.create_child(self.dummy_user, self.vertical.location, 'html')
+
+    def get_tree(self):
+        """
+        Returns the cached metadata inheritance tree of the course.
+        """
+        return self.store._get_cached_metadata_inheritance_tree(self.course_key)
+
+    def get_version(self):
+        """
+        Returns the current version of the cached metadata inheritance tree of the course.
+        """
+        return self.store._get_metadata_inheritance_tree_version(self.course_key)
+
+    def assert_tree_is_current(self):
+        """
+        Asserts that the cached metadata inheritance tree of the course is the one computed from scratch.
+        """
+        self.assertEqual(self.get_tree(), self.store._compute_metadata_inheritance_tree(self.course_key))
+
+    def test_cached(self):
+        self.assertIsNotNone(self.get_version())
+        self.assert_tree_is_current()
+
+        hits = METADATA_INHERITANCE_LOCAL_CACHE.hits
+        with check_mongo_calls(0):
+            self.get_tree()
+        self.assertEqual(METADATA_INHERITANCE_LOCAL_CACHE.hits, hits + 1)
+
+    def test_update_leaf(self):
+        version = self.get_version()
+        html = self.store.get_item(self.html.location)
+        html.visible_to_staff_only = True
+        with check_exact_number_of_calls(self.store, '_compute_metadata_inheritance_tree', 0):
+            self.store.update_item(html, self.dummy_user)
+        self.assertEqual(self.get_version(), version)
+
+    def test_update_container(self):
+        version = self.get_version()
+        sequential = self.store.get_item(self.sequential.location)
+        sequential.visible_to_staff_only = True
+        with check_exact_number_of_calls(self.store, '_compute_metadata_inheritance_tree', 0):
+            self.store.update_item(sequential, self.dummy_user)
+        self.assertNotEqual(self.get_version(), version)
+        self.assertTrue(self.get_tree()[unicode(as_published(self.html.location))]['visible_to_staff_only'])
+        self.assert_tree_is_current()
+
+    def test_update_in_bulk_operation(self):
+        with check_exact_number_of_calls(self.store, '_compute_metadata_inheritance_tree', 0):
+            with self.store.bulk_operations(self.course_key):
+                vertical = self.store.get_item(self.vertical.location)
+                vertical.visible_to_staff_only = True
+                self.store.update_item(vertical, self.dummy_user)
+                new_vertical = self.store.create_child(self.dummy_user, self.sequential.location, 'vertical')
+                new_html = self.store.create_child(self.dummy_user, new_vertical.location, 'html')
+        self.assertIn(unicode(as_published(new_html.location)), self.get_tree())
+        self.assert_tree_is_current()
+
+    def test_delete_in_bulk_operation(self):
+        with check_exact_number_of_calls(self.store, '_compute_metadata_inheritance_tree', 1):
+            with self.store.bulk_operations(self.course_key):
+                self.store.delete_item(self.vertical.location, self.dummy_user)
+        self.assertNotIn(unicode(as_published(self.html.location)), self.get_tree())
+
+
+class TestMetadataInheritanceLocalCache(unittest.TestCase):
+    """
+    Tests for MetadataInheritanceLocalCache.
+    """
+    def test_evicts_least_recently_used(self):
+        cache = MetadataInheritanceLocalCache(2)
+        cache.set(('course', 'v1'), {'a': {}})
+        cache.set(('course', 'v2'), {'b': {}})
+        self.assertEqual(cache.get(('course', 'v1')), {'a': {}})
+        cache.set(('course', 'v3'), {'c': {}})
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(('course', 'v2')))
+        self.assertEqual(cache.get(('course', 'v1')), {'a': {}})
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+
 class TestMongoKeyValueStore(unittest.TestCase):
     """
     Tests for MongoKeyValueStore.
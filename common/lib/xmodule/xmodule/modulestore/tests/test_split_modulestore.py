@@ -32,6 +32,7 @@ from xmodule.fields import Date, Timedelta
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.modulestore.tests.test_modulestore import check_has_course_method
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import StructureLocalCache, STRUCTURE_LOCAL_CACHE
 from xmodule.modulestore.tests.factories import check_mongo_calls
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from xmodule.modulestore.tests.utils import mock_tab_from_json
@@ -936,8 +937,10 @@ class TestCourseStructureCache(SplitModuleTest):
 
         # make sure we clear the cache before every test...
         self.cache.clear()
+        STRUCTURE_LOCAL_CACHE.clear()
         # ... and after
         self.addCleanup(self.cache.clear)
+        self.addCleanup(STRUCTURE_LOCAL_CACHE.clear)
 
         # make a new course:
         self.user = random.getrandbits(32)
@@ -963,6 +966,48 @@ class TestCourseStructureCache(SplitModuleTest):
         # now make sure that you get the same structure
         self.assertEqual(cached_structure, not_cached_structure)
 
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_course_structure_local_cache(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+
+        with check_mongo_calls(1):
+            not_cached_structure = self._get_structure(self.new_course)
+        self.assertEqual(len(STRUCTURE_LOCAL_CACHE), 0)
+
+        # reading the structure from the shared cache keeps it in the local one
+        with check_mongo_calls(0):
+            self._get_structure(self.new_course)
+        self.assertEqual(len(STRUCTURE_LOCAL_CACHE), 1)
+
+        # so it's still available once the shared cache has lost it
+        self.cache.clear()
+        hits = STRUCTURE_LOCAL_CACHE.hits
+        with check_mongo_calls(0):
+            cached_structure = self._get_structure(self.new_course)
+        self.assertEqual(STRUCTURE_LOCAL_CACHE.hits, hits + 1)
+        self.assertEqual(cached_structure, not_cached_structure)
+
+        # and callers get their own copy of it
+        cached_structure['blocks'].clear()
+        self.assertEqual(self._get_structure(self.new_course), not_cached_structure)
+
+    def test_structure_local_cache_eviction(self):
+        cache = StructureLocalCache(10)
+        cache.set('a', '12345')
+        cache.set('b', '12345')
+        self.assertEqual(cache.get('a'), '12345')
+
+        # 'b' is now the least recently used entry
+        cache.set('c', '123')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), '12345')
+        self.assertEqual(cache.size, 8)
+
+        # too large to be cached at all
+        cache.set('d', '12345678901')
+        self.assertIsNone(cache.get('d'))
+        self.assertEqual(len(cache), 2)
+
     @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
     def test_course_structure_cache_no_cache_configured(self, mock_get_cache):
         mock_get_cache.side_effect = InvalidCacheBackendError
@@ -0,0 +1,60 @@
+""" Test the serialization of split course structures by split_mongo/structure_codecs """
+import cPickle as pickle
+import datetime
+import gc
+import unittest
+
+import ddt
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.perf_tests.test_structure_codecs import make_structure
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_codecs import CODECS, decode_structure, get_codec
+
+
+@ddt.ddt
+class TestStructureCodecs(unittest.TestCase):
+    """ Test that structures survive the round trip through each codec """
+    def setUp(self):
+        super(TestStructureCodecs, self).setUp()
+        self.structure = make_structure(2, 2, 2, 3)
+
+    @ddt.data(*sorted(CODECS))
+    def test_round_trip(self, codec_name):
+        data = get_codec(codec_name).encode(self.structure)
+        structure = decode_structure(data)
+
+        self.assertEqual(structure, self.structure)
+        self.assertIsInstance(structure['root'], BlockKey)
+        for block in structure['blocks'].itervalues():
+            for child in block.fields.get('children', []):
+                self.assertIsInstance(child, BlockKey)
+                self.assertIn(child, structure['blocks'])
+        self.assertTrue(gc.isenabled())
+
+    def test_marshal_is_tagged(self):
+        data = get_codec('marshal').encode(self.structure)
+        self.assertEqual(data[:1], 'M')
+
+    def test_marshal_falls_back_to_pickle(self):
+        # marshal can't serialize dates
+        self.structure['blocks'][BlockKey('html', 'dated')] = BlockData(
+            fields={'date': datetime.date(2016, 1, 1)}, block_type='html',
+        )
+        data = get_codec('marshal').encode(self.structure)
+
+        self.assertEqual(data[:1], get_codec('pickle').tag)
+        self.assertEqual(decode_structure(data), self.structure)
+
+    def test_decode_pickled_structure(self):
+        # structures cached before codecs existed
+        data = pickle.dumps(self.structure, pickle.HIGHEST_PROTOCOL)
+        self.assertEqual(decode_structure(data), self.structure)
+
+    def test_unknown_encoding(self):
+        with self.assertRaises(ValueError):
+            decode_structure('X')
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            get_codec('yaml')
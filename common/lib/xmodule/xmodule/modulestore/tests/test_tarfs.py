@@ -0,0 +1,102 @@
+"""
+Tests for the tar archive export filesystem.
+"""
+import io
+import tarfile
+import unittest
+
+from fs.errors import DestinationExistsError, ParentDirectoryMissingError, ResourceInvalidError, UnsupportedError
+
+from xmodule.modulestore.tarfs import TarExportFS
+
+
+class UnseekableFile(object):
+    """
+    A file which can only be written to, as an HTTP response.
+    """
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+
+    def getvalue(self):
+        return ''.join(self.chunks)
+
+
+class TestTarExportFS(unittest.TestCase):
+    """
+    Test that files written to a TarExportFS make up its archive.
+    """
+    def setUp(self):
+        super(TestTarExportFS, self).setUp()
+        self.output = UnseekableFile()
+        self.export_fs = TarExportFS(self.output)
+
+    def get_tar_file(self):
+        """
+        Returns the archive written, once the filesystem is closed.
+        """
+        self.export_fs.close()
+        return tarfile.open(fileobj=io.BytesIO(self.output.getvalue()), mode='r:gz')
+
+    def test_write_files(self):
+        course_fs = self.export_fs.makeopendir('course')
+        with course_fs.open('course.xml', 'w') as course_xml:
+            course_xml.write('<course/>')
+        course_fs.makedir('html/intro', recursive=True, allow_recreate=True)
+        with course_fs.open('html/intro/page.html', 'w') as html_file:
+            html_file.write(u'caf\xe9'.encode('utf-8'))
+        course_fs.makeopendir('static').setcontents('data.bin', io.BytesIO('x' * 100000))
+
+        self.assertTrue(course_fs.isfile('course.xml'))
+        self.assertTrue(course_fs.isdir('html/intro'))
+        self.assertFalse(self.export_fs.exists('course.xml'))
+
+        tar_file = self.get_tar_file()
+        self.assertEqual(
+            tar_file.getnames(),
+            [
+                'course', 'course/course.xml', 'course/html', 'course/html/intro', 'course/html/intro/page.html',
+                'course/static', 'course/static/data.bin',
+            ]
+        )
+        self.assertTrue(tar_file.getmember('course/html').isdir())
+        self.assertEqual(tar_file.extractfile('course/course.xml').read(), '<course/>')
+        self.assertEqual(tar_file.extractfile('course/html/intro/page.html').read(), u'caf\xe9'.encode('utf-8'))
+        self.assertEqual(tar_file.extractfile('course/static/data.bin').read(), 'x' * 100000)
+
+    def test_missing_parent_directory(self):
+        with self.assertRaises(ParentDirectoryMissingError):
+            self.export_fs.open('html/page.html', 'w')
+        with self.assertRaises(ParentDirectoryMissingError):
+            self.export_fs.makedir('html/intro')
+
+    def test_existing_directory(self):
+        self.export_fs.makedir('html')
+        with self.assertRaises(DestinationExistsError):
+            self.export_fs.makedir('html')
+        self.export_fs.makedir('html', allow_recreate=True)
+
+    def test_overwrite(self):
+        self.export_fs.setcontents('course.xml', '<course/>')
+        with self.export_fs.open('course.xml', 'w') as course_file:
+            course_file.write('<course url_name="2016"/>')
+        self.assertTrue(self.export_fs.isfile('course.xml'))
+
+        tar_file = self.get_tar_file()
+        self.assertEqual(tar_file.extractfile('course.xml').read(), '<course url_name="2016"/>')
+
+    def test_overwrite_directory(self):
+        self.export_fs.makedir('html')
+        with self.assertRaises(ResourceInvalidError):
+            self.export_fs.setcontents('html', '<html/>')
+
+    def test_read(self):
+        with self.assertRaises(UnsupportedError):
+            self.export_fs.open('course.xml')
+
+    def test_outside_filesystem(self):
+        course_fs = self.export_fs.makeopendir('course')
+        with self.assertRaises(ValueError):
+            course_fs.open('../../course.xml', 'w')
@@ -20,8 +20,11 @@ Modulestore virtual   |          XML physical (draft, published)
              (a, a)   |  (a, a) | (x, a) | (x, x) | (x, y) | (a, x)
              (a, b)   |  (a, b) | (x, b) | (x, x) | (x, y) | (a, x)
 """
+import functools
+import itertools
 import logging
 from abc import abstractmethod
+from multiprocessing.pool import ThreadPool
 from opaque_keys.edx.locator import LibraryLocator
 import os
 import mimetypes
@@ -56,10 +59,16 @@ log = logging.getLogger(__name__)
 
 def import_static_content(
         course_data_path, static_content_store,
-        target_id, subpath='static', verbose=False):
+        target_id, subpath='static', verbose=False, pool=None):
+    """
+    Import the files under `subpath` of `course_data_path` into
+    `static_content_store`, with their thumbnails.
 
-    remap_dict = {}
+    If `pool` is given, a `multiprocessing.pool.ThreadPool`, the files are
+    read, thumbnailed and saved by its workers, concurrently.
 
+    Returns a map of the path of each file imported to its asset key.
+    """
     # now import all static assets
     static_dir = course_data_path / subpath
     try:
@@ -76,6 +85,7 @@ def import_static_content(
     mimetypes.add_type('application/octet-stream', '.srt')
     mimetypes_list = mimetypes.types_map.values()
 
+    content_paths = []
     for dirname, _, filenames in os.walk(static_dir):
         for filename in filenames:
 
@@ -86,63 +96,82 @@ def import_static_content(
                     log.debug('skipping static content %s...', content_path)
                 continue
 
-            if verbose:
-                log.debug('importing static content %s...', content_path)
+            content_paths.append(content_path)
 
-            try:
-                with open(content_path, 'rb') as f:
-                    data = f.read()
-            except IOError:
-                if filename.startswith('._'):
-                    # OS X "companion files". See
-                    # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
-                    continue
-                # Not a 'hidden file', then re-raise exception
-                raise
+    import_file = functools.partial(
+        _import_static_file, static_dir, static_content_store, target_id, policy, mimetypes_list, verbose
+    )
+    if pool is None:
+        imported = itertools.imap(import_file, content_paths)
+    else:
+        imported = pool.imap_unordered(import_file, content_paths)
 
-            # strip away leading path from the name
-            fullname_with_subpath = content_path.replace(static_dir, '')
-            if fullname_with_subpath.startswith('/'):
-                fullname_with_subpath = fullname_with_subpath[1:]
-            asset_key = StaticContent.compute_location(target_id, fullname_with_subpath)
+    # store the remapping information which will be needed
+    # to subsitute in the module data
+    return dict(asset for asset in imported if asset is not None)
 
-            policy_ele = policy.get(asset_key.path, {})
 
-            # During export display name is used to create files, strip away slashes from name
-            displayname = escape_invalid_characters(
-                name=policy_ele.get('displayname', filename),
-                invalid_char_list=['/', '\\']
-            )
-            locked = policy_ele.get('locked', False)
-            mime_type = policy_ele.get('contentType')
-
-            # Check extracted contentType in list of all valid mimetypes
-            if not mime_type or mime_type not in mimetypes_list:
-                mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
-            content = StaticContent(
-                asset_key, displayname, mime_type, data,
-                import_path=fullname_with_subpath, locked=locked
-            )
+def _import_static_file(static_dir, static_content_store, target_id, policy, mimetypes_list, verbose, content_path):
+    """
+    Import the file at `content_path` into `static_content_store`, and return
+    its path relative to `static_dir` and its asset key, or None if the file
+    should be skipped.
+    """
+    filename = os.path.basename(content_path)
 
-            # first let's save a thumbnail so we can get back a thumbnail location
-            thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
+    if verbose:
+        log.debug('importing static content %s...', content_path)
 
-            if thumbnail_content is not None:
-                content.thumbnail_location = thumbnail_location
+    try:
+        with open(content_path, 'rb') as f:
+            data = f.read()
+    except IOError:
+        if filename.startswith('._'):
+            # OS X "companion files". See
+            # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
+            return None
+        # Not a 'hidden file', then re-raise exception
+        raise
+
+    # strip away leading path from the name
+    fullname_with_subpath = content_path.replace(static_dir, '')
+    if fullname_with_subpath.startswith('/'):
+        fullname_with_subpath = fullname_with_subpath[1:]
+    asset_key = StaticContent.compute_location(target_id, fullname_with_subpath)
+
+    policy_ele = policy.get(asset_key.path, {})
+
+    # During export display name is used to create files, strip away slashes from name
+    displayname = escape_invalid_characters(
+        name=policy_ele.get('displayname', filename),
+        invalid_char_list=['/', '\\']
+    )
+    locked = policy_ele.get('locked', False)
+    mime_type = policy_ele.get('contentType')
+
+    # Check extracted contentType in list of all valid mimetypes
+    if not mime_type or mime_type not in mimetypes_list:
+        mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
+    content = StaticContent(
+        asset_key, displayname, mime_type, data,
+        import_path=fullname_with_subpath, locked=locked
+    )
 
-            # then commit the content
-            try:
-                static_content_store.save(content)
-            except Exception as err:
-                log.exception(u'Error importing {0}, error={1}'.format(
-                    fullname_with_subpath, err
-                ))
+    # first let's save a thumbnail so we can get back a thumbnail location
+    thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
 
-            # store the remapping information which will be needed
-            # to subsitute in the module data
-            remap_dict[fullname_with_subpath] = asset_key
+    if thumbnail_content is not None:
+        content.thumbnail_location = thumbnail_location
 
-    return remap_dict
+    # then commit the content
+    try:
+        static_content_store.save(content)
+    except Exception as err:
+        log.exception(u'Error importing {0}, error={1}'.format(
+            fullname_with_subpath, err
+        ))
+
+    return fullname_with_subpath, asset_key
 
 
 class ImportManager(object):
@@ -177,6 +206,10 @@ class ImportManager(object):
             Otherwise, it throws an InvalidLocationError if the courselike does not exist.
 
         default_class, load_error_modules: are arguments for constructing the XMLModuleStore (see its doc)
+
+        static_import_workers: If not 0, the number of threads importing static files, each reading a file,
+            generating its thumbnail and saving both into static_content_store; static files are then
+            imported while the courselike's blocks are, rather than before.
     """
     store_class = XMLModuleStore
 
@@ -186,7 +219,7 @@ class ImportManager(object):
             load_error_modules=True, static_content_store=None,
             target_id=None, verbose=False,
             do_import_static=True, create_if_not_present=False,
-            raise_on_failure=False
+            raise_on_failure=False, static_import_workers=0
     ):
         self.store = store
         self.user_id = user_id
@@ -199,6 +232,7 @@ class ImportManager(object):
         self.do_import_static = do_import_static
         self.create_if_not_present = create_if_not_present
         self.raise_on_failure = raise_on_failure
+        self.static_import_workers = static_import_workers
         self.xml_module_store = self.store_class(
             data_dir,
             default_class=default_class,
@@ -219,15 +253,16 @@ class ImportManager(object):
         if self.target_id:
             assert len(self.xml_module_store.modules) == 1
 
-    def import_static(self, data_path, dest_id):
+    def import_static(self, data_path, dest_id, pool=None):
         """
-        Import all static items into the content store.
+        Import all static items into the content store, with the workers of
+        `pool` if given.
         """
         if self.static_content_store is not None and self.do_import_static:
             # first pass to find everything in /static/
             import_static_content(
                 data_path, self.static_content_store,
-                dest_id, subpath='static', verbose=self.verbose
+                dest_id, subpath='static', verbose=self.verbose, pool=pool
             )
 
         elif self.verbose and not self.do_import_static:
@@ -250,7 +285,7 @@ class ImportManager(object):
         if os.path.exists(data_path / simport):
             import_static_content(
                 data_path, self.static_content_store,
-                dest_id, subpath=simport, verbose=self.verbose
+                dest_id, subpath=simport, verbose=self.verbose, pool=pool
             )
 
     def import_asset_metadata(self, data_dir, course_id):
@@ -427,36 +462,50 @@ class ImportManager(object):
         Iterate over the given directories and yield courses.
         """
         self.preflight()
-        for courselike_key in self.xml_module_store.modules.keys():
-            try:
-                dest_id, runtime = self.get_dest_id(courselike_key)
-            except DuplicateCourseError:
-                continue
-
-            # This bulk operation wraps all the operations to populate the published branch.
-            with self.store.bulk_operations(dest_id):
-                # Retrieve the course itself.
-                source_courselike, courselike, data_path = self.get_courselike(courselike_key, runtime, dest_id)
-
-                # Import all static pieces.
-                self.import_static(data_path, dest_id)
-
-                # Import asset metadata stored in XML.
-                self.import_asset_metadata(data_path, dest_id)
-
-                # Import all children
-                self.import_children(source_courselike, courselike, courselike_key, dest_id)
+        # One more thread than there are workers, to wait for them while the
+        # blocks are being imported.
+        pool = ThreadPool(self.static_import_workers + 1) if self.static_import_workers else None
+        try:
+            for courselike_key in self.xml_module_store.modules.keys():
+                try:
+                    dest_id, runtime = self.get_dest_id(courselike_key)
+                except DuplicateCourseError:
+                    continue
 
-            # This bulk operation wraps all the operations to populate the draft branch with any items
-            # from the /drafts subdirectory.
-            # Drafts must be imported in a separate bulk operation from published items to import properly,
-            # due to the recursive_build() above creating a draft item for each course block
-            # and then publishing it.
-            with self.store.bulk_operations(dest_id):
-                # Import all draft items into the courselike.
-                courselike = self.import_drafts(courselike, courselike_key, data_path, dest_id)
+                # This bulk operation wraps all the operations to populate the published branch.
+                with self.store.bulk_operations(dest_id):
+                    # Retrieve the course itself.
+                    source_courselike, courselike, data_path = self.get_courselike(courselike_key, runtime, dest_id)
 
-            yield courselike
+                    # Import all static pieces, in the background if there are workers for it.
+                    if pool is None:
+                        static_import = None
+                        self.import_static(data_path, dest_id)
+                    else:
+                        static_import = pool.apply_async(self.import_static, (data_path, dest_id, pool))
+
+                    # Import asset metadata stored in XML.
+                    self.import_asset_metadata(data_path, dest_id)
+
+                    # Import all children
+                    self.import_children(source_courselike, courselike, courselike_key, dest_id)
+
+                    if static_import is not None:
+                        static_import.get()
+
+                # This bulk operation wraps all the operations to populate the draft branch with any items
+                # from the /drafts subdirectory.
+                # Drafts must be imported in a separate bulk operation from published items to import properly,
+                # due to the recursive_build() above creating a draft item for each course block
+                # and then publishing it.
+                with self.store.bulk_operations(dest_id):
+                    # Import all draft items into the courselike.
+                    courselike = self.import_drafts(courselike, courselike_key, data_path, dest_id)
+
+                yield courselike
+        finally:
+            if pool is not None:
+                pool.terminate()
 
 
 class CourseImportManager(ImportManager):
@@ -2,6 +2,8 @@
 Tests that check that we ignore the appropriate files when importing courses.
 """
 import unittest
+from multiprocessing.pool import ThreadPool
+
 from mock import Mock
 from xmodule.modulestore.xml_importer import import_static_content
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
@@ -39,3 +41,24 @@ class IgnoredFilesTestCase(unittest.TestCase):
         self.assertNotIn(".DS_Store", name_val)
         self.assertIn("GREEN", name_val["example.txt"])
         self.assertIn("BLUE", name_val[".example.txt"])
+
+    def test_import_with_pool(self):
+        """
+        Test that static files imported by a pool of workers are the same as
+        those imported one at a time.
+        """
+        course_dir = DATA_DIR / "dot-underscore"
+        course_id = SlashSeparatedCourseKey("edX", "dot-underscore", "2014_Fall")
+        content_store = Mock()
+        content_store.generate_thumbnail.return_value = ("content", "location")
+        remap = import_static_content(course_dir, content_store, course_id)
+
+        pool = ThreadPool(2)
+        self.addCleanup(pool.terminate)
+        pooled_content_store = Mock()
+        pooled_content_store.generate_thumbnail.return_value = ("content", "location")
+        self.assertEqual(import_static_content(course_dir, pooled_content_store, course_id, pool=pool), remap)
+        self.assertItemsEqual(
+            [(call[0][0].name, call[0][0].data) for call in pooled_content_store.save.call_args_list],
+            [(call[0][0].name, call[0][0].data) for call in content_store.save.call_args_list],
+        )
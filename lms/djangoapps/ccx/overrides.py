@@ -4,12 +4,14 @@ by the individual custom courses feature.
 """
 import json
 import logging
+import time
 
+from django.core.cache import cache
 from django.db import transaction
 
 import request_cache
 
-from courseware.field_overrides import FieldOverrideProvider
+from courseware.field_overrides import FieldOverrideProvider, clear_override_cache
 from opaque_keys.edx.keys import CourseKey, UsageKey
 from ccx_keys.locator import CCXLocator, CCXBlockUsageLocator
 
@@ -18,6 +20,15 @@ from lms.djangoapps.ccx.models import CcxFieldOverride, CustomCourseForEdX
 
 log = logging.getLogger(__name__)
 
+CCX_OVERRIDES_VERSION_KEY = u'ccx.overrides.version.{ccx_id}'
+CCX_OVERRIDES_MAP_KEY = u'ccx.overrides.map.{ccx_id}.{version}'
+
+# How long, in seconds, compiled override maps are kept in the shared cache.
+# Maps are invalidated by bumping their version whenever an override is
+# written, so this only bounds how long a map compiled by a request which
+# raced with the transaction of a write stays stale.
+CCX_OVERRIDES_CACHE_TIMEOUT = 5 * 60
+
 
 class CustomCoursesForEdxOverrideProvider(FieldOverrideProvider):
     """
@@ -29,6 +40,26 @@ class CustomCoursesForEdxOverrideProvider(FieldOverrideProvider):
         """
         Just call the get_override_for_ccx method if there is a ccx
         """
+        ccx = self._get_ccx(block)
+        if ccx:
+            return get_override_for_ccx(ccx, block, name, default)
+        return default
+
+    def has_overrides(self, block):
+        """
+        Returns whether the ccx, if there is one, overrides any field of the
+        block.
+        """
+        ccx = self._get_ccx(block)
+        if ccx:
+            return bool(_get_overrides_for_ccx(ccx).get(_clean_ccx_key(block.location)))
+        return False
+
+    @staticmethod
+    def _get_ccx(block):
+        """
+        Returns the ccx the block belongs to, or None.
+        """
         # The incoming block might be a CourseKey instance of some type, a
         # UsageKey instance of some type, or it might be something that has a
         # location attribute.  That location attribute will be a UsageKey
@@ -45,9 +76,7 @@ class CustomCoursesForEdxOverrideProvider(FieldOverrideProvider):
             log.error(msg, type(block))
         if course_key is not None:
             ccx = get_current_ccx(course_key)
-        if ccx:
-            return get_override_for_ccx(ccx, block, name, default)
-        return default
+        return ccx
 
     @classmethod
     def enabled_for(cls, block):
@@ -121,21 +150,60 @@ def _get_overrides_for_ccx(ccx):
 
     if ccx not in overrides_cache:
         overrides = {}
-        query = CcxFieldOverride.objects.filter(
-            ccx=ccx,
-        )
-
-        for override in query:
-            block_overrides = overrides.setdefault(override.location, {})
-            block_overrides[override.field] = json.loads(override.value)
-            block_overrides[override.field + "_id"] = override.id
-            block_overrides[override.field + "_instance"] = override
+        for location, block_overrides in _get_compiled_overrides_for_ccx(ccx):
+            overrides[UsageKey.from_string(location)] = block_dict = {}
+            for field, override_id, value in block_overrides:
+                block_dict[field] = json.loads(value)
+                block_dict[field + "_id"] = override_id
 
         overrides_cache[ccx] = overrides
 
     return overrides_cache[ccx]
 
 
+def _get_compiled_overrides_for_ccx(ccx):
+    """
+    Returns all of the overrides of this CCX, as a tuple of
+    (location, ((field, override id, serialized value), ...)) pairs.
+
+    The tuple is kept in the shared cache, under the current version of the
+    CCX's overrides, so that it is read from the database once per write
+    rather than once per request.
+    """
+    version = cache.get(CCX_OVERRIDES_VERSION_KEY.format(ccx_id=ccx.id))
+    if version is None:
+        version = _bump_overrides_version(ccx)
+    map_key = CCX_OVERRIDES_MAP_KEY.format(ccx_id=ccx.id, version=version)
+
+    compiled = cache.get(map_key)
+    if compiled is None:
+        overrides = {}
+        query = CcxFieldOverride.objects.filter(ccx=ccx).values_list('location', 'field', 'id', 'value')
+        for location, field, override_id, value in query:
+            overrides.setdefault(unicode(location), []).append((field, override_id, value))
+        compiled = tuple(
+            (location, tuple(block_overrides)) for location, block_overrides in overrides.iteritems()
+        )
+        cache.set(map_key, compiled, CCX_OVERRIDES_CACHE_TIMEOUT)
+    return compiled
+
+
+def _bump_overrides_version(ccx):
+    """
+    Invalidates the compiled overrides of this CCX in the shared cache, and
+    returns their new version.
+    """
+    version_key = CCX_OVERRIDES_VERSION_KEY.format(ccx_id=ccx.id)
+    try:
+        return cache.incr(version_key)
+    except ValueError:
+        # There is no version yet, or it was evicted: start from the time, so
+        # as not to reuse the version of a map that may still be cached.
+        version = int(time.time() * 1000)
+        cache.set(version_key, version, None)
+        return version
+
+
 @transaction.atomic
 def override_field_for_ccx(ccx, block, name, value):
     """
@@ -146,7 +214,7 @@ def override_field_for_ccx(ccx, block, name, value):
     field = block.fields[name]
     value_json = field.to_json(value)
     serialized_value = json.dumps(value_json)
-    override_has_changes = False
+    override_has_changes = created = False
     clean_ccx_key = _clean_ccx_key(block.location)
 
     override = get_override_for_ccx(ccx, block, name + "_instance")
@@ -171,6 +239,9 @@ def override_field_for_ccx(ccx, block, name, value):
 
     _get_overrides_for_ccx(ccx).setdefault(clean_ccx_key, {})[name] = value_json
     _get_overrides_for_ccx(ccx).setdefault(clean_ccx_key, {})[name + "_instance"] = override
+    if created or override_has_changes:
+        _bump_overrides_version(ccx)
+    clear_override_cache()
 
 
 def clear_override_for_ccx(ccx, block, name):
@@ -204,6 +275,8 @@ def clear_ccx_field_info_from_ccx_map(ccx, block, name):  # pylint: disable=inva
         ccx_override_map.pop(name + "_instance")
     except KeyError:
         pass
+    _bump_overrides_version(ccx)
+    clear_override_cache()
 
 
 def bulk_delete_ccx_override_fields(ccx, ids):
@@ -214,3 +287,5 @@ def bulk_delete_ccx_override_fields(ccx, ids):
     ids = list(set(ids))
     if ids:
         CcxFieldOverride.objects.filter(ccx=ccx, id__in=ids).delete()
+        _bump_overrides_version(ccx)
+        clear_override_cache()
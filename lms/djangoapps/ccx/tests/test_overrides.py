@@ -11,6 +11,7 @@ from ccx_keys.locator import CCXLocator
 from courseware.courses import get_course_by_id
 from courseware.field_overrides import OverrideFieldData
 from courseware.testutils import FieldOverrideTestMixin
+from django.core.cache.backends.locmem import LocMemCache
 from django.test.utils import override_settings
 from lms.djangoapps.courseware.tests.test_field_overrides import inject_field_overrides
 from request_cache.middleware import RequestCache
@@ -21,7 +22,7 @@ from xmodule.modulestore.tests.django_utils import (
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 
 from lms.djangoapps.ccx.models import CustomCourseForEdX
-from lms.djangoapps.ccx.overrides import override_field_for_ccx
+from lms.djangoapps.ccx.overrides import get_override_for_ccx, override_field_for_ccx
 
 from lms.djangoapps.ccx.tests.utils import flatten, iter_blocks
 
@@ -173,3 +174,35 @@ class TestFieldOverrides(FieldOverrideTestMixin, SharedModuleStoreTestCase):
         override_field_for_ccx(self.ccx, chapter, 'due', ccx_due)
         vertical = chapter.get_children()[0].get_children()[0]
         self.assertEqual(vertical.due, ccx_due)
+
+    @mock.patch('lms.djangoapps.ccx.overrides.cache', LocMemCache('ccx-overrides', {}))
+    def test_overrides_shared_between_requests(self):
+        """
+        Test that overrides are read from the database once, and then from the
+        shared cache.
+        """
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        chapter = self.ccx_course.get_children()[0]
+        override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
+        RequestCache.clear_request_cache()
+        with self.assertNumQueries(1):
+            get_override_for_ccx(self.ccx, chapter, 'start')
+        RequestCache.clear_request_cache()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_override_for_ccx(self.ccx, chapter, 'start'), ccx_start)
+
+    @mock.patch('lms.djangoapps.ccx.overrides.cache', LocMemCache('ccx-overrides', {}))
+    def test_shared_overrides_invalidated_by_writes(self):
+        """
+        Test that writing an override invalidates the overrides in the shared
+        cache.
+        """
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        new_ccx_start = datetime.datetime(2015, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        chapter = self.ccx_course.get_children()[0]
+        override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
+        RequestCache.clear_request_cache()
+        self.assertEqual(get_override_for_ccx(self.ccx, chapter, 'start'), ccx_start)
+        override_field_for_ccx(self.ccx, chapter, 'start', new_ccx_start)
+        RequestCache.clear_request_cache()
+        self.assertEqual(get_override_for_ccx(self.ccx, chapter, 'start'), new_ccx_start)
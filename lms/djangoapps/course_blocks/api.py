@@ -28,6 +28,7 @@ def get_course_blocks(
         user,
         starting_block_usage_key,
         transformers=None,
+        collected_block_structure=None,
 ):
     """
     A higher order function implemented on top of the
@@ -45,6 +46,11 @@ def get_course_blocks(
             transformers whose transform methods are to be called.
             If None, COURSE_BLOCK_ACCESS_TRANSFORMERS is used.
 
+        collected_block_structure (BlockStructureBlockData) - The
+            collected block structure of the course, if it was already
+            retrieved; for example, when getting course blocks for many
+            users.  See BlockStructureManager.get_transformed.
+
     Returns:
         BlockStructureBlockData - A transformed block structure,
             starting at starting_block_usage_key, that has undergone the
@@ -61,4 +67,5 @@ def get_course_blocks(
     return get_block_structure_manager(starting_block_usage_key.course_key).get_transformed(
         transformers,
         starting_block_usage_key,
+        collected_block_structure,
     )
@@ -16,6 +16,7 @@ by `authored_data`, e.g. course content and settings stored in Mongo.
 """
 from abc import ABCMeta, abstractmethod
 from contextlib import contextmanager
+import itertools
 import threading
 
 from django.conf import settings
@@ -28,6 +29,11 @@ from xmodule.modulestore.inheritance import InheritanceMixin
 NOTSET = object()
 ENABLED_OVERRIDE_PROVIDERS_KEY = u'courseware.field_overrides.enabled_providers.{course_id}'
 ENABLED_MODULESTORE_OVERRIDE_PROVIDERS_KEY = u'courseware.modulestore_field_overrides.enabled_providers.{course_id}'
+OVERRIDES_GENERATION_KEY = u'courseware.field_overrides.generation'
+
+# Generations of resolved overrides: each request, and each call to
+# `clear_override_cache` within it, starts a new one.
+_OVERRIDES_GENERATIONS = itertools.count()
 
 
 def resolve_dotted(name):
@@ -49,15 +55,34 @@ def resolve_dotted(name):
     return target
 
 
-def _lineage(block):
+def clear_override_cache():
+    """
+    Forgets the overrides resolved during this request.  Must be called after
+    changing the overrides of any provider.
+    """
+    RequestCache.get_request_cache().data[OVERRIDES_GENERATION_KEY] = next(_OVERRIDES_GENERATIONS)
+
+
+def _overrides_generation():
     """
-    Returns an iterator over all ancestors of the given block, starting with
-    its immediate parent and ending at the root of the block tree.
+    Returns the current generation of resolved overrides.  Overrides resolved
+    in an earlier generation are out of date.
     """
-    parent = block.get_parent()
-    while parent:
-        yield parent
-        parent = parent.get_parent()
+    data = RequestCache.get_request_cache().data
+    generation = data.get(OVERRIDES_GENERATION_KEY)
+    if generation is None:
+        generation = data[OVERRIDES_GENERATION_KEY] = next(_OVERRIDES_GENERATIONS)
+    return generation
+
+
+def _block_key(block):
+    """
+    Returns the key identifying `block` among resolved overrides.
+    """
+    scope_ids = getattr(block, 'scope_ids', None)
+    if scope_ids is None:
+        return block
+    return scope_ids.usage_id
 
 
 class _OverridesDisabled(threading.local):
@@ -114,6 +139,16 @@ class FieldOverrideProvider(object):
         """
         raise NotImplementedError
 
+    def has_overrides(self, block):
+        """
+        Returns False if no field of `block` is overridden, so that none of
+        them need to be looked up, and True otherwise.
+
+        Concrete implementations may implement this method; by default,
+        every field is looked up.
+        """
+        return True
+
     @abstractmethod
     def enabled_for(self, course):  # pragma no cover
         """
@@ -143,6 +178,11 @@ class OverrideFieldData(FieldData):
     is important for this setting.  Override providers will tried in the order
     configured in the setting.  The first provider to find an override 'wins'
     for a particular field lookup.
+
+    Overrides are looked up once per request for each block and field, and
+    not at all for blocks for which no provider has overrides.  The number of
+    overrides looked up from providers, and found among those already resolved
+    instead, are counted in `provider_lookups` and `cache_hits`.
     """
     provider_classes = None
 
@@ -156,12 +196,7 @@ class OverrideFieldData(FieldData):
         any performance impact of this feature if no override providers are
         configured.
         """
-        if cls.provider_classes is None:
-            cls.provider_classes = tuple(
-                (resolve_dotted(name) for name in
-                 settings.FIELD_OVERRIDE_PROVIDERS))
-
-        enabled_providers = cls._providers_for_course(course)
+        enabled_providers = cls.enabled_providers(course)
         if enabled_providers:
             # TODO: we might not actually want to return here.  Might be better
             # to check for instance.providers after the instance is built. This
@@ -171,6 +206,20 @@ class OverrideFieldData(FieldData):
 
         return wrapped
 
+    @classmethod
+    def enabled_providers(cls, course):
+        """
+        Returns the classes of the override providers configured with the
+        Django setting, `FIELD_OVERRIDE_PROVIDERS`, which are enabled for the
+        given course.
+        """
+        if cls.provider_classes is None:
+            cls.provider_classes = tuple(
+                (resolve_dotted(name) for name in
+                 settings.FIELD_OVERRIDE_PROVIDERS))
+
+        return cls._providers_for_course(course)
+
     @classmethod
     def _providers_for_course(cls, course):
         """
@@ -198,18 +247,71 @@ class OverrideFieldData(FieldData):
     def __init__(self, user, fallback, providers):
         self.fallback = fallback
         self.providers = tuple(provider(user) for provider in providers)
+        self.provider_lookups = 0
+        self.cache_hits = 0
+        self._resolved = {}
+        self._resolved_generation = None
+
+    def _resolved_overrides(self):
+        """
+        Returns the overrides resolved by this field data, as a dictionary,
+        forgetting them first if they're out of date.
+        """
+        generation = _overrides_generation()
+        if generation != self._resolved_generation:
+            self._resolved = {}
+            self._resolved_generation = generation
+        return self._resolved
 
     def get_override(self, block, name):
         """
         Checks for an override for the field identified by `name` in `block`.
         Returns the overridden value or `NOTSET` if no override is found.
         """
-        if not overrides_disabled():
+        if overrides_disabled():
+            return NOTSET
+
+        resolved = self._resolved_overrides()
+        key = (_block_key(block), name)
+        if key in resolved:
+            self.cache_hits += 1
+            return resolved[key]
+
+        value = NOTSET
+        if self._has_overrides(block, resolved):
+            self.provider_lookups += 1
             for provider in self.providers:
                 value = provider.get(block, name, NOTSET)
                 if value is not NOTSET:
-                    return value
-        return NOTSET
+                    break
+        resolved[key] = value
+        return value
+
+    def _has_overrides(self, block, resolved):
+        """
+        Returns whether any provider has overrides for `block`.
+        """
+        key = _block_key(block)
+        if key not in resolved:
+            resolved[key] = any(provider.has_overrides(block) for provider in self.providers)
+        return resolved[key]
+
+    def _get_inherited_override(self, block, name):
+        """
+        Returns the override of the field identified by `name` in the
+        closest ancestor of `block` which overrides it, or `NOTSET`.
+        """
+        resolved = self._resolved_overrides()
+        key = (_block_key(block), name, 'inherited')
+        if key not in resolved:
+            value = NOTSET
+            parent = block.get_parent()
+            if parent:
+                value = self.get_override(parent, name)
+                if value is NOTSET:
+                    value = self._get_inherited_override(parent, name)
+            resolved[key] = value
+        return resolved[key]
 
     def get(self, block, name):
         value = self.get_override(block, name)
@@ -228,15 +330,13 @@ class OverrideFieldData(FieldData):
             return self.fallback.has(block, name)
 
         has = self.get_override(block, name)
-        if has is NOTSET:
+        if has is NOTSET and not overrides_disabled():
             # If this is an inheritable field and an override is set above,
             # then we want to return False here, so the field_data uses the
             # override and not the original value for this block.
-            inheritable = InheritanceMixin.fields.keys()
-            if name in inheritable:
-                for ancestor in _lineage(block):
-                    if self.get_override(ancestor, name) is not NOTSET:
-                        return False
+            if name in InheritanceMixin.fields:
+                if self._get_inherited_override(block, name) is not NOTSET:
+                    return False
 
         return has is not NOTSET or self.fallback.has(block, name)
 
@@ -247,12 +347,10 @@ class OverrideFieldData(FieldData):
         # The `default` method is overloaded by the field storage system to
         # also handle inheritance.
         if self.providers and not overrides_disabled():
-            inheritable = InheritanceMixin.fields.keys()
-            if name in inheritable:
-                for ancestor in _lineage(block):
-                    value = self.get_override(ancestor, name)
-                    if value is not NOTSET:
-                        return value
+            if name in InheritanceMixin.fields:
+                value = self._get_inherited_override(block, name)
+                if value is not NOTSET:
+                    return value
         return self.fallback.default(block, name)
 
 
@@ -9,6 +9,9 @@ Classes to provide the LMS runtime data storage to XBlocks.
 :class:`FieldDataCache`: A object which provides a read-through prefetch cache
     of data to support XBlock fields within a limited set of scopes.
 
+:class:`MultiUserFieldDataCache`: A object which prefetches the data of many users
+    at once, and provides a :class:`FieldDataCache` for each of them.
+
 The remaining classes in this module provide read-through prefetch cache implementations
 for specific scopes. The individual classes provide the knowledge of what are the essential
 pieces of information for each scope, and thus how to cache, prefetch, and create new field data
@@ -28,7 +31,8 @@ from .models import (
     StudentModule,
     XModuleUserStateSummaryField,
     XModuleStudentPrefsField,
-    XModuleStudentInfoField
+    XModuleStudentInfoField,
+    chunks,
 )
 import logging
 from opaque_keys.edx.keys import CourseKey, UsageKey
@@ -176,7 +180,17 @@ class DjangoOrmFieldCache(object):
             xblocks (list of :class:`XBlock`): XBlocks to cache fields for.
             aside_types (list of str): Aside types to cache fields for.
         """
-        for field_object in self._read_objects(fields, xblocks, aside_types):
+        self.cache_field_objects(self._read_objects(fields, xblocks, aside_types))
+
+    def cache_field_objects(self, field_objects):
+        """
+        Add the supplied ``field_objects``, which were already read from the
+        underlying datastore, to this cache.
+
+        Arguments:
+            field_objects (iterable of Django model instances): The objects to cache.
+        """
+        for field_object in field_objects:
             self._cache[self._cache_key_for_field_object(field_object)] = field_object
 
     @contract(kvs_key=DjangoKeyValueStore.Key)
@@ -369,8 +383,18 @@ class UserStateCache(object):
             self.user.username,
             _all_usage_keys(xblocks, aside_types),
         )
-        for user_state in block_field_state:
-            self._cache[user_state.block_key] = user_state.state
+        self.cache_states({user_state.block_key: user_state.state for user_state in block_field_state})
+
+    def cache_states(self, block_states):
+        """
+        Add the supplied user state, which was already read from the
+        underlying datastore, to this cache.
+
+        Arguments:
+            block_states (dict): A dict mapping usage keys to dicts of field
+                names to values.
+        """
+        self._cache.update(block_states)
 
     @contract(kvs_key=DjangoKeyValueStore.Key)
     def set(self, kvs_key, value):
@@ -797,7 +821,8 @@ class FieldDataCache(object):
         cache.add_descriptor_descendents(descriptor, depth, descriptor_filter)
         return cache
 
-    def _fields_to_cache(self, descriptors):
+    @staticmethod
+    def _fields_to_cache(descriptors):
         """
         Returns a map of scopes to fields in that scope that should be cached
         """
@@ -930,6 +955,129 @@ class FieldDataCache(object):
         return sum(len(cache) for cache in self.cache.values())
 
 
+class MultiUserFieldDataCache(object):
+    """
+    A cache of django model objects needed to supply the data for a set
+    of modules for many users.
+
+    The data of all users is prefetched together, with queries whose
+    number depends on the number of users and modules in chunks, rather
+    than a set of queries for each user. A :class:`FieldDataCache` for
+    each user, which makes no further queries to read the prefetched
+    data, is returned by `for_user`.
+    """
+    # The number of users whose data is loaded by each query.
+    USER_CHUNK_SIZE = 100
+
+    def __init__(self, descriptors, course_id, users, asides=None):
+        """
+        Arguments
+        descriptors: A list of XModuleDescriptors.
+        course_id: The id of the current course
+        users: The users for which to cache data. Anonymous users are ignored.
+        asides: The list of aside types to load, or None to prefetch no asides.
+        """
+        assert isinstance(course_id, CourseKey)
+        self.course_id = course_id
+        self.asides = asides
+
+        # Scope.user_state_summary data isn't specific to a user, so is
+        # cached once and shared by the caches of all users.
+        self.user_state_summary_cache = UserStateSummaryCache(self.course_id)
+        self._field_data_caches = {}
+        for user in users:
+            if user.is_authenticated():
+                field_data_cache = FieldDataCache([], self.course_id, user, asides=asides)
+                field_data_cache.cache[Scope.user_state_summary] = self.user_state_summary_cache
+                self._field_data_caches[user.id] = field_data_cache
+
+        self.add_descriptors_to_cache(descriptors)
+
+    def for_user(self, user):
+        """
+        Returns the :class:`FieldDataCache` for the given user.
+
+        Raises: KeyError if the user's data isn't cached
+        """
+        return self._field_data_caches[user.id]
+
+    def add_descriptors_to_cache(self, descriptors):
+        """
+        Add all `descriptors` to the caches of all users.
+        """
+        if not self._field_data_caches:
+            return
+
+        aside_types = self.asides or []
+        scorable_locations = set(desc.location for desc in descriptors if desc.has_score)
+        for field_data_cache in self._field_data_caches.itervalues():
+            field_data_cache.scorable_locations.update(scorable_locations)
+
+        fields_to_cache = FieldDataCache._fields_to_cache(descriptors)  # pylint: disable=protected-access
+        if Scope.user_state_summary in fields_to_cache:
+            self.user_state_summary_cache.cache_fields(
+                fields_to_cache[Scope.user_state_summary], descriptors, aside_types
+            )
+
+        for user_ids in chunks(list(self._field_data_caches), self.USER_CHUNK_SIZE):
+            if Scope.user_state in fields_to_cache:
+                self._cache_user_states(user_ids, _all_usage_keys(descriptors, aside_types))
+
+            if Scope.preferences in fields_to_cache:
+                self._cache_field_objects(Scope.preferences, XModuleStudentPrefsField.objects.chunked_filter(
+                    'module_type__in',
+                    _all_block_types(descriptors, aside_types),
+                    student__in=user_ids,
+                    field_name__in=set(field.name for field in fields_to_cache[Scope.preferences]),
+                ))
+
+            if Scope.user_info in fields_to_cache:
+                self._cache_field_objects(Scope.user_info, XModuleStudentInfoField.objects.filter(
+                    student__in=user_ids,
+                    field_name__in=set(field.name for field in fields_to_cache[Scope.user_info]),
+                ))
+
+    def _cache_user_states(self, user_ids, usage_keys):
+        """
+        Load the Scope.user_state data of the given users for the given
+        usage keys into their caches.
+        """
+        block_states = defaultdict(dict)
+        student_modules = StudentModule.objects.chunked_filter(
+            'module_state_key__in',
+            usage_keys,
+            student__in=user_ids,
+            course_id=self.course_id,
+        )
+        for student_module in student_modules:
+            if student_module.state is None:
+                continue
+
+            # As in DjangoXBlockUserStateClient.get_many, a state of the empty
+            # dict has been deleted, and is treated as if it doesn't exist.
+            state = json.loads(student_module.state)
+            if state == {}:
+                continue
+
+            usage_key = student_module.module_state_key.map_into_course(self.course_id)
+            block_states[student_module.student_id][usage_key] = state
+
+        for user_id, user_block_states in block_states.iteritems():
+            self._field_data_caches[user_id].cache[Scope.user_state].cache_states(user_block_states)
+
+    def _cache_field_objects(self, scope, field_objects):
+        """
+        Add the given field objects of the given scope to the caches of
+        the users they belong to.
+        """
+        by_user = defaultdict(list)
+        for field_object in field_objects:
+            by_user[field_object.student_id].append(field_object)
+
+        for user_id, user_field_objects in by_user.iteritems():
+            self._field_data_caches[user_id].cache[scope].cache_field_objects(user_field_objects)
+
+
 class ScoresClient(object):
     """
     Basic client interface for retrieving Score information.
@@ -988,6 +1136,30 @@ class ScoresClient(object):
         client.fetch_scores(scorable_locations)
         return client
 
+    @classmethod
+    def create_for_users(cls, course_id, user_ids, scorable_locations):
+        """
+        Create a ScoresClient for each of the given users, with data for
+        the given locations pre-fetched in a single query.
+
+        Returns a dict mapping each user id to its ScoresClient.
+        """
+        clients = {user_id: cls(course_id, user_id) for user_id in user_ids}
+        scores_qset = StudentModule.objects.filter(
+            student_id__in=list(clients),
+            course_id=course_id,
+            module_state_key__in=set(scorable_locations),
+        )
+        for user_id, location, correct, total in scores_qset.values_list(
+                'student_id', 'module_state_key', 'grade', 'max_grade'
+        ):
+            # See fetch_scores for why the course key info is added back.
+            usage_key = UsageKey.from_string(location).map_into_course(course_id)
+            clients[user_id]._locations_to_scores[usage_key] = cls.Score(correct, total)  # pylint: disable=protected-access
+        for client in clients.itervalues():
+            client._has_fetched = True  # pylint: disable=protected-access
+        return clients
+
 
 # @contract(user_id=int, usage_key=UsageKey, score="number|None", max_score="number|None")
 def set_score(user_id, usage_key, score, max_score):
@@ -11,6 +11,7 @@ from functools import partial
 import dogstats_wrapper as dog_stats_api
 import newrelic.agent
 from capa.xqueue_interface import XQueueInterface
+from ccx_keys.locator import CCXLocator
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.cache import cache
@@ -45,6 +46,10 @@ from courseware.masquerade import (
     setup_masquerade,
 )
 from courseware.model_data import DjangoKeyValueStore, FieldDataCache, set_score
+from courseware.student_field_overrides import IndividualStudentOverrideProvider, get_overrides_for_user_in_course
+from courseware.transformer import TableOfContentsTransformer
+from courseware.user_state_client import DjangoXBlockUserStateClient
+from lms.djangoapps.course_blocks.api import COURSE_BLOCK_ACCESS_TRANSFORMERS, get_course_blocks
 from lms.djangoapps.grades.signals import SCORE_CHANGED
 from edxmako.shortcuts import render_to_string
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
@@ -54,10 +59,9 @@ from lms.djangoapps.lms_xblock.runtime import LmsModuleSystem, unquote_slashes,
 from lms.djangoapps.verify_student.services import ReverificationService
 from openedx.core.djangoapps.credit.services import CreditService
 from openedx.core.djangoapps.util.user_utils import SystemUser
+from openedx.core.lib.block_structure.transformers import BlockStructureTransformers
 from openedx.core.lib.xblock_utils import (
-    replace_course_urls,
-    replace_jump_to_id_urls,
-    replace_static_urls,
+    replace_urls,
     add_staff_markup,
     wrap_xblock,
     request_token as xblock_request_token,
@@ -70,6 +74,7 @@ from util.model_utils import slugify
 from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
 from xblock.runtime import KvsFieldData
 from xblock_django.user_service import DjangoXBlockUserService
+from xmodule.block_metadata_utils import display_name_with_default_escaped
 from xmodule.contentstore.django import contentstore
 from xmodule.error_module import ErrorDescriptor, NonStaffErrorDescriptor
 from xmodule.exceptions import NotFoundError, ProcessingError
@@ -77,6 +82,7 @@ from xmodule.lti_module import LTIModule
 from xmodule.mixin import wrap_with_license
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
+from xmodule.modulestore.inheritance import InheritanceMixin
 from xmodule.x_module import XModuleDescriptor
 from .field_overrides import OverrideFieldData
 
@@ -147,7 +153,17 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
     None if this is not the case.
 
     field_data_cache must include data from the course module and 2 levels of its descendants
+
+    If the COURSEWARE_TOC_FROM_BLOCK_STRUCTURE setting is enabled, the table
+    of contents is built from the course's collected block structure instead,
+    without binding the chapters and sections to the user, and
+    field_data_cache is unused.  See `_toc_chapters_from_blocks`.
     '''
+    if _can_build_toc_from_blocks(course):
+        chapters = _toc_chapters_from_blocks(user, course)
+        if chapters is None:
+            return None, None, None
+        return _toc_for_chapters(user, request, course, chapters, active_chapter, active_section)
 
     with modulestore().bulk_operations(course.id):
         course_module = get_module_for_descriptor(
@@ -156,78 +172,170 @@ def toc_for_course(user, request, course, active_chapter, active_section, field_
         if course_module is None:
             return None, None, None
 
-        toc_chapters = list()
-        chapters = course_module.get_display_items()
-
-        # Check for content which needs to be completed
-        # before the rest of the content is made available
-        required_content = milestones_helpers.get_required_content(course, user)
-
-        # The user may not actually have to complete the entrance exam, if one is required
-        if not user_must_complete_entrance_exam(request, user, course):
-            required_content = [content for content in required_content if not content == course.entrance_exam_id]
-
-        previous_of_active_section, next_of_active_section = None, None
-        last_processed_section, last_processed_chapter = None, None
-        found_active_section = False
-        for chapter in chapters:
-            # Only show required content, if there is required content
-            # chapter.hide_from_toc is read-only (bool)
-            display_id = slugify(chapter.display_name_with_default_escaped)
-            local_hide_from_toc = False
-            if required_content:
-                if unicode(chapter.location) not in required_content:
-                    local_hide_from_toc = True
-
-            # Skip the current chapter if a hide flag is tripped
-            if chapter.hide_from_toc or local_hide_from_toc:
+        return _toc_for_chapters(
+            user, request, course, course_module.get_display_items(), active_chapter, active_section
+        )
+
+
+def _toc_for_chapters(user, request, course, chapters, active_chapter, active_section):
+    '''
+    Create the table of contents returned by toc_for_course, from the given
+    chapters of the course.
+    '''
+    toc_chapters = list()
+
+    # Check for content which needs to be completed
+    # before the rest of the content is made available
+    required_content = milestones_helpers.get_required_content(course, user)
+
+    # The user may not actually have to complete the entrance exam, if one is required
+    if not user_must_complete_entrance_exam(request, user, course):
+        required_content = [content for content in required_content if not content == course.entrance_exam_id]
+
+    previous_of_active_section, next_of_active_section = None, None
+    last_processed_section, last_processed_chapter = None, None
+    found_active_section = False
+    for chapter in chapters:
+        # Only show required content, if there is required content
+        # chapter.hide_from_toc is read-only (bool)
+        display_id = slugify(chapter.display_name_with_default_escaped)
+        local_hide_from_toc = False
+        if required_content:
+            if unicode(chapter.location) not in required_content:
+                local_hide_from_toc = True
+
+        # Skip the current chapter if a hide flag is tripped
+        if chapter.hide_from_toc or local_hide_from_toc:
+            continue
+
+        sections = list()
+        for section in chapter.get_display_items():
+            # skip the section if it is hidden from the user
+            if section.hide_from_toc:
                 continue
 
-            sections = list()
-            for section in chapter.get_display_items():
-                # skip the section if it is hidden from the user
-                if section.hide_from_toc:
-                    continue
-
-                is_section_active = (chapter.url_name == active_chapter and section.url_name == active_section)
-                if is_section_active:
-                    found_active_section = True
-
-                section_context = {
-                    'display_name': section.display_name_with_default_escaped,
-                    'url_name': section.url_name,
-                    'format': section.format if section.format is not None else '',
-                    'due': section.due,
-                    'active': is_section_active,
-                    'graded': section.graded,
-                }
-                _add_timed_exam_info(user, course, section, section_context)
-
-                # update next and previous of active section, if applicable
-                if is_section_active:
-                    if last_processed_section:
-                        previous_of_active_section = last_processed_section.copy()
-                        previous_of_active_section['chapter_url_name'] = last_processed_chapter.url_name
-                elif found_active_section and not next_of_active_section:
-                    next_of_active_section = section_context.copy()
-                    next_of_active_section['chapter_url_name'] = chapter.url_name
-
-                sections.append(section_context)
-                last_processed_section = section_context
-                last_processed_chapter = chapter
-
-            toc_chapters.append({
-                'display_name': chapter.display_name_with_default_escaped,
-                'display_id': display_id,
-                'url_name': chapter.url_name,
-                'sections': sections,
-                'active': chapter.url_name == active_chapter
-            })
-        return {
-            'chapters': toc_chapters,
-            'previous_of_active_section': previous_of_active_section,
-            'next_of_active_section': next_of_active_section,
-        }
+            is_section_active = (chapter.url_name == active_chapter and section.url_name == active_section)
+            if is_section_active:
+                found_active_section = True
+
+            section_context = {
+                'display_name': section.display_name_with_default_escaped,
+                'url_name': section.url_name,
+                'format': section.format if section.format is not None else '',
+                'due': section.due,
+                'active': is_section_active,
+                'graded': section.graded,
+            }
+            _add_timed_exam_info(user, course, section, section_context)
+
+            # update next and previous of active section, if applicable
+            if is_section_active:
+                if last_processed_section:
+                    previous_of_active_section = last_processed_section.copy()
+                    previous_of_active_section['chapter_url_name'] = last_processed_chapter.url_name
+            elif found_active_section and not next_of_active_section:
+                next_of_active_section = section_context.copy()
+                next_of_active_section['chapter_url_name'] = chapter.url_name
+
+            sections.append(section_context)
+            last_processed_section = section_context
+            last_processed_chapter = chapter
+
+        toc_chapters.append({
+            'display_name': chapter.display_name_with_default_escaped,
+            'display_id': display_id,
+            'url_name': chapter.url_name,
+            'sections': sections,
+            'active': chapter.url_name == active_chapter
+        })
+    return {
+        'chapters': toc_chapters,
+        'previous_of_active_section': previous_of_active_section,
+        'next_of_active_section': next_of_active_section,
+    }
+
+
+def _can_build_toc_from_blocks(course):
+    """
+    Returns whether the table of contents of the course can be built from its
+    block structure: the COURSEWARE_TOC_FROM_BLOCK_STRUCTURE setting is
+    enabled, and the only per-user field overrides of the course are
+    individual due dates, which `_toc_chapters_from_blocks` applies.  The
+    overrides of CCXs aren't reflected in block structures.
+    """
+    if not getattr(settings, 'COURSEWARE_TOC_FROM_BLOCK_STRUCTURE', False):
+        return False
+    if isinstance(course.id, CCXLocator):
+        return False
+    return all(
+        provider_class is IndividualStudentOverrideProvider
+        for provider_class in OverrideFieldData.enabled_providers(course)
+    )
+
+
+def _toc_chapters_from_blocks(user, course):
+    """
+    Returns the chapters of the course shown to the user, with the attributes
+    of their XModules `_toc_for_chapters` uses, or None if the user can't
+    access the course.
+
+    The chapters are those of the course's collected block structure, filtered
+    by the access transformers, so that neither they nor their sections are
+    bound to the user.  Only due dates overridden for the user are looked up
+    at request time.
+    """
+    course_blocks = get_course_blocks(
+        user,
+        course.location,
+        BlockStructureTransformers(COURSE_BLOCK_ACCESS_TRANSFORMERS + [TableOfContentsTransformer()]),
+    )
+    if course.location not in course_blocks:
+        return None
+
+    due_overrides = {}
+    if OverrideFieldData.enabled_providers(course):
+        due_overrides = get_overrides_for_user_in_course(user, course.id, 'due', InheritanceMixin.fields['due'])
+
+    return _TocBlock(course_blocks, course.location, due_overrides).get_display_items()
+
+
+class _TocBlock(object):
+    """
+    A chapter or section of a course block structure, with the attributes of
+    its XModule which `_toc_for_chapters` uses.
+    """
+    def __init__(self, block_structure, usage_key, due_overrides, parent=None):
+        self.location = usage_key
+        self.url_name = usage_key.name
+        self.display_name = block_structure.get_xblock_field(usage_key, 'display_name')
+        self.display_name_with_default_escaped = display_name_with_default_escaped(self)
+        self.hide_from_toc = block_structure.get_xblock_field(usage_key, 'hide_from_toc', False)
+        self.format = block_structure.get_xblock_field(usage_key, 'format')
+        self.graded = block_structure.get_xblock_field(usage_key, 'graded', False)
+        self.is_time_limited = block_structure.get_xblock_field(usage_key, 'is_time_limited', False)
+
+        # A due date overridden for the block, or for one of its ancestors,
+        # takes precedence over the block's own, as with OverrideFieldData.
+        if usage_key in due_overrides:
+            self._due_override = (due_overrides[usage_key],)
+        else:
+            self._due_override = parent._due_override if parent else None
+        if self._due_override:
+            self.due = self._due_override[0]
+        else:
+            self.due = block_structure.get_xblock_field(usage_key, 'due')
+
+        self._block_structure = block_structure
+        self._due_overrides = due_overrides
+
+    def get_display_items(self):
+        """
+        Returns the children of the block shown to the user.
+        """
+        return [
+            _TocBlock(self._block_structure, child_key, self._due_overrides, self)
+            for child_key in self._block_structure.get_children(self.location)
+        ]
 
 
 def _add_timed_exam_info(user, course, section, section_context):
@@ -643,27 +751,23 @@ def get_module_system_for_user(user, student_data,  # TODO  # pylint: disable=to
     # prefix is going to have to be specific to the module, not the directory
     # that the xml was loaded from
 
-    # Rewrite urls beginning in /static to point to course-specific content
-    block_wrappers.append(partial(
-        replace_static_urls,
-        getattr(descriptor, 'data_dir', None),
-        course_id=course_id,
-        static_asset_path=static_asset_path or descriptor.static_asset_path
-    ))
-
-    # Allow URLs of the form '/course/' refer to the root of multicourse directory
+    # Rewrite, in a single pass:
+    # - urls beginning in /static to point to course-specific content
+    # - urls of the form '/course/', to refer to the root of multicourse directory
     #   hierarchy of this course
-    block_wrappers.append(partial(replace_course_urls, course_id))
-
-    # this will rewrite intra-courseware links (/jump_to_id/<id>). This format
-    # is an improvement over the /course/... format for studio authored courses,
-    # because it is agnostic to course-hierarchy.
+    # - intra-courseware links (/jump_to_id/<id>). This format
+    #   is an improvement over the /course/... format for studio authored courses,
+    #   because it is agnostic to course-hierarchy.
     # NOTE: module_id is empty string here. The 'module_id' will get assigned in the replacement
     # function, we just need to specify something to get the reverse() to work.
     block_wrappers.append(partial(
-        replace_jump_to_id_urls,
-        course_id,
-        reverse('jump_to_id', kwargs={'course_id': course_id.to_deprecated_string(), 'module_id': ''}),
+        replace_urls,
+        getattr(descriptor, 'data_dir', None),
+        course_id=course_id,
+        static_asset_path=static_asset_path or descriptor.static_asset_path,
+        jump_to_id_base_url=reverse(
+            'jump_to_id', kwargs={'course_id': course_id.to_deprecated_string(), 'module_id': ''}
+        ),
     ))
 
     if settings.FEATURES.get('DISPLAY_DEBUG_INFO_TO_STAFF'):
@@ -1052,7 +1156,9 @@ def _invoke_xblock_handler(request, course_id, usage_id, handler, suffix, course
         req = django_to_webob_request(request)
         try:
             with tracker.get_tracker().context(tracking_context_name, tracking_context):
-                resp = instance.handle(handler, req, suffix)
+                batch_writes = settings.FEATURES.get('ENABLE_BATCHED_USER_STATE_WRITES', False)
+                with DjangoXBlockUserStateClient.batched_writes(batch_writes):
+                    resp = instance.handle(handler, req, suffix)
                 if suffix == 'problem_check' \
                         and course \
                         and getattr(course, 'entrance_exam_enabled', False) \
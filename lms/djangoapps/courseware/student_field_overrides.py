@@ -4,7 +4,7 @@ by the individual due dates feature.
 """
 import json
 
-from .field_overrides import FieldOverrideProvider
+from .field_overrides import FieldOverrideProvider, clear_override_cache
 from .models import StudentFieldOverride
 
 
@@ -17,6 +17,9 @@ class IndividualStudentOverrideProvider(FieldOverrideProvider):
     def get(self, block, name, default):
         return get_override_for_user(self.user, block, name, default)
 
+    def has_overrides(self, block):
+        return bool(_get_cached_overrides_for_user(self.user, block))
+
     @classmethod
     def enabled_for(cls, course):
         """This simple override provider is always enabled"""
@@ -29,13 +32,39 @@ def get_override_for_user(user, block, name, default=None):
     specify the block and the name of the field.  If the field is not
     overridden for the given user, returns `default`.
     """
+    return _get_cached_overrides_for_user(user, block).get(name, default)
+
+
+def get_overrides_for_user_in_course(user, course_key, name, field):
+    """
+    Gets the values of the field named `name` overridden for the `user` in all
+    blocks of the course, in a single query.  `field` is the field, used to
+    deserialize the values.  Returns a dictionary of the values keyed by the
+    usage keys of the blocks.
+    """
+    query = StudentFieldOverride.objects.filter(
+        course_id=course_key,
+        student_id=user.id,
+        field=name,
+    )
+    return {
+        override.location.map_into_course(course_key): field.from_json(json.loads(override.value))
+        for override in query
+    }
+
+
+def _get_cached_overrides_for_user(user, block):
+    """
+    Gets the individual student overrides for given user and block, caching
+    them on the block.
+    """
     if not hasattr(block, '_student_overrides'):
         block._student_overrides = {}  # pylint: disable=protected-access
     overrides = block._student_overrides.get(user.id)  # pylint: disable=protected-access
     if overrides is None:
         overrides = _get_overrides_for_user(user, block)
         block._student_overrides[user.id] = overrides  # pylint: disable=protected-access
-    return overrides.get(name, default)
+    return overrides
 
 
 def _get_overrides_for_user(user, block):
@@ -70,6 +99,7 @@ def override_field_for_user(user, block, name, value):
     field = block.fields[name]
     override.value = json.dumps(field.to_json(value))
     override.save()
+    clear_override_cache()
 
 
 def clear_override_for_user(user, block, name):
@@ -87,3 +117,4 @@ def clear_override_for_user(user, block, name):
             field=name).delete()
     except StudentFieldOverride.DoesNotExist:
         pass
+    clear_override_cache()
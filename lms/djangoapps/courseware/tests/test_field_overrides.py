@@ -6,12 +6,14 @@ import unittest
 from nose.plugins.attrib import attr
 
 from django.test.utils import override_settings
+from request_cache.middleware import RequestCache
 from xblock.field_data import DictFieldData
 from xmodule.modulestore.tests.factories import CourseFactory
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 
 from ..field_overrides import (
     resolve_dotted,
+    clear_override_cache,
     disable_overrides,
     FieldOverrideProvider,
     OverrideFieldData,
@@ -40,6 +42,9 @@ class TestOverrideProvider(FieldOverrideProvider):
 
         return default
 
+    def has_overrides(self, block):
+        return block != 'other'
+
     @classmethod
     def enabled_for(cls, course):
         return True
@@ -64,6 +69,7 @@ class OverrideFieldDataTests(SharedModuleStoreTestCase):
     def setUp(self):
         super(OverrideFieldDataTests, self).setUp()
         OverrideFieldData.provider_classes = None
+        clear_override_cache()
 
     def tearDown(self):
         super(OverrideFieldDataTests, self).tearDown()
@@ -119,6 +125,44 @@ class OverrideFieldDataTests(SharedModuleStoreTestCase):
         with disable_overrides():
             self.assertEqual(data.get('block', 'foo'), 'baz')
 
+    def test_overrides_looked_up_once(self):
+        data = self.make_one()
+        self.assertEqual(data.get('block', 'foo'), 'fu')
+        self.assertEqual(data.get('block', 'foo'), 'fu')
+        self.assertEqual(data.get('block', 'bees'), 'knees')
+        self.assertEqual(data.get('block', 'bees'), 'knees')
+        self.assertEqual(data.provider_lookups, 2)
+        self.assertEqual(data.cache_hits, 2)
+
+    def test_clear_override_cache(self):
+        data = self.make_one()
+        data.get('block', 'foo')
+        clear_override_cache()
+        self.assertEqual(data.get('block', 'foo'), 'fu')
+        self.assertEqual(data.provider_lookups, 2)
+        self.assertEqual(data.cache_hits, 0)
+
+    def test_overrides_looked_up_once_per_request(self):
+        data = self.make_one()
+        data.get('block', 'foo')
+        RequestCache.clear_request_cache()
+        self.assertEqual(data.get('block', 'foo'), 'fu')
+        self.assertEqual(data.get('block', 'foo'), 'fu')
+        self.assertEqual(data.provider_lookups, 2)
+        self.assertEqual(data.cache_hits, 1)
+
+    def test_block_without_overrides(self):
+        data = self.make_one()
+        self.assertEqual(data.get('other', 'foo'), 'bar')
+        self.assertEqual(data.provider_lookups, 0)
+
+    def test_overrides_disabled_not_cached(self):
+        data = self.make_one()
+        with disable_overrides():
+            self.assertEqual(data.get('block', 'foo'), 'bar')
+        self.assertEqual(data.get('block', 'foo'), 'fu')
+        self.assertEqual(data.cache_hits, 0)
+
     @override_settings(FIELD_OVERRIDE_PROVIDERS=())
     def test_no_overrides_configured(self):
         data = self.make_one()
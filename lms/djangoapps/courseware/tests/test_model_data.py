@@ -6,7 +6,7 @@ from mock import Mock, patch
 from nose.plugins.attrib import attr
 from functools import partial
 
-from courseware.model_data import DjangoKeyValueStore, FieldDataCache, InvalidScopeError
+from courseware.model_data import DjangoKeyValueStore, FieldDataCache, InvalidScopeError, MultiUserFieldDataCache
 from courseware.models import StudentModule, XModuleUserStateSummaryField
 from courseware.models import XModuleStudentInfoField, XModuleStudentPrefsField
 
@@ -426,3 +426,66 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+@attr(shard=1)
+class TestMultiUserFieldDataCache(TestCase):
+    """Tests for MultiUserFieldDataCache"""
+
+    def setUp(self):
+        super(TestMultiUserFieldDataCache, self).setUp()
+        self.users = [UserFactory.create() for _ in range(3)]
+        for index, user in enumerate(self.users):
+            StudentModuleFactory(student=user, state=json.dumps({'a_field': 'a_value{}'.format(index)}))
+            StudentPrefsFactory(student=user, value=json.dumps('pref{}'.format(index)))
+            StudentInfoFactory(student=user, value=json.dumps('info{}'.format(index)))
+        UserStateSummaryFactory()
+        self.descriptor = mock_descriptor([
+            mock_field(Scope.user_state, 'a_field'),
+            mock_field(Scope.preferences, 'existing_field'),
+            mock_field(Scope.user_info, 'existing_field'),
+            mock_field(Scope.user_state_summary, 'existing_field'),
+        ])
+
+    def test_prefetch(self):
+        # One query per scope, no matter the number of users
+        with self.assertNumQueries(4):
+            multi_user_cache = MultiUserFieldDataCache([self.descriptor], course_id, self.users)
+
+        with self.assertNumQueries(0):
+            for index, user in enumerate(self.users):
+                kvs = DjangoKeyValueStore(multi_user_cache.for_user(user))
+                key = partial(DjangoKeyValueStore.Key, user_id=user.id)
+                self.assertEquals(
+                    'a_value{}'.format(index),
+                    kvs.get(key(Scope.user_state, block_scope_id=location('usage_id'), field_name='a_field'))
+                )
+                self.assertEquals(
+                    'pref{}'.format(index),
+                    kvs.get(key(Scope.preferences, block_scope_id='mock_problem', field_name='existing_field'))
+                )
+                self.assertEquals(
+                    'info{}'.format(index),
+                    kvs.get(key(Scope.user_info, block_scope_id=None, field_name='existing_field'))
+                )
+                self.assertEquals('old_value', kvs.get(user_state_summary_key('existing_field')))
+
+    def test_user_chunks(self):
+        with patch.object(MultiUserFieldDataCache, 'USER_CHUNK_SIZE', 2):
+            # The user_state_summary query, and a query per scope for each chunk of users
+            with self.assertNumQueries(7):
+                multi_user_cache = MultiUserFieldDataCache([self.descriptor], course_id, self.users)
+
+        kvs = DjangoKeyValueStore(multi_user_cache.for_user(self.users[2]))
+        with self.assertNumQueries(0):
+            self.assertEquals('a_value2', kvs.get(
+                DjangoKeyValueStore.Key(Scope.user_state, self.users[2].id, location('usage_id'), 'a_field')
+            ))
+
+    def test_set_for_user(self):
+        multi_user_cache = MultiUserFieldDataCache([self.descriptor], course_id, self.users)
+        user = self.users[1]
+        kvs = DjangoKeyValueStore(multi_user_cache.for_user(user))
+        kvs.set(DjangoKeyValueStore.Key(Scope.user_state, user.id, location('usage_id'), 'a_field'), 'new_value')
+        student_module = StudentModule.objects.get(student=user)
+        self.assertEquals(json.loads(student_module.state), {'a_field': 'new_value'})
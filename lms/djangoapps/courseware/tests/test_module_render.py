@@ -5,6 +5,7 @@ Test for lms courseware app, module render unit
 import ddt
 import itertools
 import json
+from datetime import datetime
 from nose.plugins.attrib import attr
 from functools import partial
 
@@ -16,6 +17,7 @@ from django.test.client import RequestFactory
 from django.test.utils import override_settings
 from django.contrib.auth.models import AnonymousUser
 from mock import MagicMock, patch, Mock
+from pytz import UTC
 from opaque_keys.edx.keys import UsageKey, CourseKey
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from pyquery import PyQuery
@@ -33,6 +35,7 @@ from courseware.field_overrides import OverrideFieldData
 from courseware.model_data import FieldDataCache
 from courseware.module_render import hash_resource, get_module_for_descriptor
 from courseware.models import StudentModule
+from courseware.student_field_overrides import override_field_for_user
 from courseware.tests.factories import StudentModuleFactory, UserFactory, GlobalStaffFactory
 from courseware.tests.tests import LoginEnrollmentTestCase
 from courseware.tests.test_submitting_problems import TestSubmittingProblems
@@ -718,6 +721,21 @@ class TestTOC(ModuleStoreTestCase):
             self.assertEquals(actual['previous_of_active_section']['url_name'], 'Toy_Videos')
             self.assertEquals(actual['next_of_active_section']['url_name'], 'video_123456789012')
 
+    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0), (ModuleStoreEnum.Type.split, 6, 0))
+    @ddt.unpack
+    def test_toc_toy_from_block_structure(self, default_ms, setup_finds, setup_sends):
+        with self.store.default_store(default_ms):
+            self.setup_request_and_course(setup_finds, setup_sends)
+            section = 'Welcome'
+            expected = render.toc_for_course(
+                self.request.user, self.request, self.toy_course, self.chapter, section, self.field_data_cache
+            )
+            with override_settings(COURSEWARE_TOC_FROM_BLOCK_STRUCTURE=True):
+                actual = render.toc_for_course(
+                    self.request.user, self.request, self.toy_course, self.chapter, section, self.field_data_cache
+                )
+        self.assertEqual(actual, expected)
+
 
 @attr(shard=1)
 @ddt.ddt
@@ -1048,6 +1066,7 @@ class TestProctoringRendering(SharedModuleStoreTestCase):
 
 
 @attr(shard=1)
+@ddt.ddt
 class TestGatedSubsectionRendering(SharedModuleStoreTestCase, MilestonesTestCaseMixin):
     @classmethod
     def setUpClass(cls):
@@ -1111,18 +1130,20 @@ class TestGatedSubsectionRendering(SharedModuleStoreTestCase, MilestonesTestCase
 
         return None
 
-    def test_toc_with_gated_sequential(self):
+    @ddt.data(False, True)
+    def test_toc_with_gated_sequential(self, from_block_structure):
         """
         Test generation of TOC for a course with a gated subsection
         """
-        actual = render.toc_for_course(
-            self.request.user,
-            self.request,
-            self.course,
-            self.chapter.display_name,
-            self.open_seq.display_name,
-            self.field_data_cache
-        )
+        with override_settings(COURSEWARE_TOC_FROM_BLOCK_STRUCTURE=from_block_structure):
+            actual = render.toc_for_course(
+                self.request.user,
+                self.request,
+                self.course,
+                self.chapter.display_name,
+                self.open_seq.display_name,
+                self.field_data_cache
+            )
         self.assertIsNotNone(self._find_sequential(actual['chapters'], 'Chapter', 'Open_Sequential'))
         self.assertIsNone(self._find_sequential(actual['chapters'], 'Chapter', 'Gated_Sequential'))
         self.assertIsNone(self._find_sequential(actual['chapters'], 'Non-existent_Chapter', 'Non-existent_Sequential'))
@@ -1130,6 +1151,54 @@ class TestGatedSubsectionRendering(SharedModuleStoreTestCase, MilestonesTestCase
         self.assertIsNone(actual['next_of_active_section'])
 
 
+@attr(shard=1)
+@override_settings(
+    COURSEWARE_TOC_FROM_BLOCK_STRUCTURE=True,
+    FIELD_OVERRIDE_PROVIDERS=('courseware.student_field_overrides.IndividualStudentOverrideProvider',),
+)
+class TestTOCFromBlockStructure(ModuleStoreTestCase):
+    """
+    Test the due dates of the toc built from the course's block structure
+    """
+    def setUp(self):
+        super(TestTOCFromBlockStructure, self).setUp()
+        OverrideFieldData.provider_classes = None
+        self.addCleanup(setattr, OverrideFieldData, 'provider_classes', None)
+
+        self.due = datetime(2016, 5, 1, tzinfo=UTC)
+        self.course = CourseFactory.create()
+        self.chapter = ItemFactory.create(parent=self.course, category='chapter', display_name='Chapter')
+        self.sequential = ItemFactory.create(
+            parent=self.chapter, category='sequential', display_name='Sequential', due=self.due
+        )
+        self.request = RequestFactory().get('/')
+        self.request.user = UserFactory()
+
+    def _get_due(self):
+        """
+        Returns the due date of the sequential in the toc.
+        """
+        toc = render.toc_for_course(self.request.user, self.request, self.course, 'Chapter', 'Sequential', None)
+        return toc['chapters'][0]['sections'][0]['due']
+
+    def test_due_date(self):
+        self.assertEqual(self._get_due(), self.due)
+
+    def test_individual_due_date(self):
+        extended_due = datetime(2016, 6, 1, tzinfo=UTC)
+        override_field_for_user(self.request.user, self.sequential, 'due', extended_due)
+        self.assertEqual(self._get_due(), extended_due)
+
+    def test_individual_due_date_of_chapter(self):
+        extended_due = datetime(2016, 6, 1, tzinfo=UTC)
+        override_field_for_user(self.request.user, self.chapter, 'due', extended_due)
+        self.assertEqual(self._get_due(), extended_due)
+
+    def test_individual_due_date_of_other_user(self):
+        override_field_for_user(UserFactory(), self.sequential, 'due', datetime(2016, 6, 1, tzinfo=UTC))
+        self.assertEqual(self._get_due(), self.due)
+
+
 @attr(shard=1)
 @ddt.ddt
 class TestHtmlModifiers(ModuleStoreTestCase):
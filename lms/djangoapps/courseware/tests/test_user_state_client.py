@@ -7,8 +7,10 @@ from collections import defaultdict
 from unittest import skip
 
 from django.test import TestCase
+from opaque_keys.edx.locator import CourseLocator
 
 from edx_user_state_client.tests import UserStateClientTestBase
+from courseware.models import StudentModule, StudentModuleHistory
 from courseware.user_state_client import DjangoXBlockUserStateClient
 from courseware.tests.factories import UserFactory
 
@@ -67,3 +69,65 @@ class TestDjangoUserStateClient(UserStateClientTestBase, TestCase):
     @skip("Not supported by DjangoXBlockUserStateClient")
     def test_iter_course_many_users(self):
         pass
+
+
+class TestBatchedWrites(TestCase):
+    """
+    Tests of DjangoXBlockUserStateClient.batched_writes.
+    """
+    # Tell Django to clean out all databases, not just default
+    multi_db = True
+
+    def setUp(self):
+        super(TestBatchedWrites, self).setUp()
+        self.client = DjangoXBlockUserStateClient()
+        self.user = UserFactory.create()
+        course_key = CourseLocator('org', 'course', 'run')
+        self.existing = course_key.make_usage_key('problem', 'existing')
+        self.new = course_key.make_usage_key('problem', 'new')
+        self.client.set(self.user.username, self.existing, {'a': 1, 'b': 1})
+
+    def test_writes_deferred_and_coalesced(self):
+        with DjangoXBlockUserStateClient.batched_writes():
+            self.client.set(self.user.username, self.existing, {'b': 2})
+            self.client.set(self.user.username, self.new, {'c': 3})
+            self.client.set(self.user.username, self.new, {'d': 4})
+            self.assertFalse(StudentModule.objects.filter(module_state_key=self.new).exists())
+
+            # Reads see the deferred writes.
+            self.assertEqual(self.client.get(self.user.username, self.existing).state, {'a': 1, 'b': 2})
+            self.assertEqual(self.client.get(self.user.username, self.new).state, {'c': 3, 'd': 4})
+            self.assertEqual(self.client.get(self.user.username, self.new, fields=['d']).state, {'d': 4})
+
+        self.assertEqual(self.client.get(self.user.username, self.existing).state, {'a': 1, 'b': 2})
+        self.assertEqual(self.client.get(self.user.username, self.new).state, {'c': 3, 'd': 4})
+
+        # The coalesced writes each saved a single history entry.
+        self.assertEqual(StudentModuleHistory.objects.filter(student_module__module_state_key=self.existing).count(), 2)
+        self.assertEqual(StudentModuleHistory.objects.filter(student_module__module_state_key=self.new).count(), 1)
+
+    def test_deferred_writes_read_as_copies(self):
+        with DjangoXBlockUserStateClient.batched_writes():
+            self.client.set(self.user.username, self.new, {'c': 3})
+            self.client.get(self.user.username, self.new).state['c'] = 4
+            self.assertEqual(self.client.get(self.user.username, self.new).state, {'c': 3})
+
+        self.assertEqual(self.client.get(self.user.username, self.new).state, {'c': 3})
+
+    def test_empty_deferred_write_not_read(self):
+        with DjangoXBlockUserStateClient.batched_writes():
+            self.client.set(self.user.username, self.new, {})
+            self.assertEqual(list(self.client.get_many(self.user.username, [self.new])), [])
+
+    def test_writes_made_on_exception(self):
+        with self.assertRaises(ValueError):
+            with DjangoXBlockUserStateClient.batched_writes():
+                self.client.set(self.user.username, self.new, {'c': 3})
+                raise ValueError()
+
+        self.assertEqual(self.client.get(self.user.username, self.new).state, {'c': 3})
+
+    def test_disabled(self):
+        with DjangoXBlockUserStateClient.batched_writes(enabled=False):
+            self.client.set(self.user.username, self.new, {'c': 3})
+            self.assertTrue(StudentModule.objects.filter(module_state_key=self.new).exists())
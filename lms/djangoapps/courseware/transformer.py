@@ -0,0 +1,79 @@
+"""
+Table of Contents Transformer
+"""
+from openedx.core.lib.block_structure.transformer import BlockStructureTransformer, FilteringTransformerMixin
+from util import milestones_helpers
+
+
+class TableOfContentsTransformer(FilteringTransformerMixin, BlockStructureTransformer):
+    """
+    The TableOfContentsTransformer collects the fields of the chapters and
+    sections shown in the courseware's table of contents, so that it can be
+    built from the course's block structure rather than its XModules.  See
+    `courseware.module_render.toc_for_course`.
+
+    Chapters and sections which the user can't access before fulfilling
+    milestones, such as gated sections, are removed, as they are by the access
+    checks of XModules; other access checks are left to the course blocks
+    access transformers.
+
+    The following values are stored as xblock_fields on their respective blocks in the
+    block structure:
+
+        display_name: (string)
+        hide_from_toc: (boolean)
+        format: (string) the section's assignment type
+        due: (datetime) when the section is due, before per-user overrides
+        graded: (boolean)
+        is_time_limited: (boolean) whether the section is a timed exam
+    """
+    VERSION = 1
+    SUPPORTS_INCREMENTAL_COLLECT = True
+    FIELDS_TO_COLLECT = [u'display_name', u'hide_from_toc', u'format', u'due', u'graded', u'is_time_limited']
+
+    @classmethod
+    def name(cls):
+        """
+        Unique identifier for the transformer's class;
+        same identifier used in setup.py.
+        """
+        return u'table_of_contents'
+
+    @classmethod
+    def collect(cls, block_structure):
+        """
+        Collects any information that's necessary to execute this
+        transformer's transform method.
+        """
+        block_structure.request_xblock_fields(*cls.FIELDS_TO_COLLECT)
+
+    @classmethod
+    def collect_incremental(cls, block_structure, block_keys):
+        """
+        Collects the same information as collect, for the blocks
+        identified by the given block_keys.
+        """
+        block_structure.request_xblock_fields(*cls.FIELDS_TO_COLLECT)
+
+    def transform_block_filters(self, usage_info, block_structure):
+        if usage_info.has_staff_access:
+            return [block_structure.create_universal_filter()]
+
+        chapter_keys = block_structure.get_children(block_structure.root_block_usage_key)
+        toc_block_keys = set(chapter_keys)
+        for chapter_key in chapter_keys:
+            toc_block_keys.update(block_structure.get_children(chapter_key))
+
+        def has_pending_milestones(block_key):
+            """
+            Test whether the block is a chapter or section which the user has
+            unfulfilled milestones for.
+            """
+            return block_key in toc_block_keys and bool(milestones_helpers.get_course_content_milestones(
+                unicode(block_key.course_key),
+                unicode(block_key),
+                'requires',
+                usage_info.user.id
+            ))
+
+        return [block_structure.create_removal_filter(has_pending_milestones)]
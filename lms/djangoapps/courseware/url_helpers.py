@@ -6,6 +6,8 @@ from xmodule.modulestore.search import path_to_location, navigation_index
 from xmodule.modulestore.django import modulestore
 from django.core.urlresolvers import reverse
 
+from openedx.core.djangoapps.content.block_structure.api import get_course_path_index
+
 
 def get_redirect_url(course_key, usage_key):
     """ Returns the redirect url back to courseware
@@ -24,7 +26,7 @@ def get_redirect_url(course_key, usage_key):
     (
         course_key, chapter, section, vertical_unused,
         position, final_target_id
-    ) = path_to_location(modulestore(), usage_key)
+    ) = path_to_location(modulestore(), usage_key, path_index=get_course_path_index(usage_key.course_key))
 
     # choose the appropriate view (and provide the necessary args) based on the
     # args provided by the redirect.
@@ -4,6 +4,11 @@ data in a Django ORM model.
 """
 
 import itertools
+import logging
+import sys
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
 from operator import attrgetter
 from time import time
 
@@ -13,12 +18,159 @@ except ImportError:
     import json
 
 import dogstats_wrapper as dog_stats_api
+import six
+from django.apps import apps
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.utils import timezone
 from xblock.fields import Scope
-from courseware.models import StudentModule, BaseStudentModuleHistory
+from courseware.models import StudentModule, BaseStudentModuleHistory, StudentModuleHistory
 from edx_user_state_client.interface import XBlockUserStateClient, XBlockUserState
 
 
+log = logging.getLogger(__name__)
+
+
+class _WriteBatch(threading.local):
+    """
+    The user state writes of the current thread that have been deferred
+    by :meth:`DjangoXBlockUserStateClient.batched_writes`.
+    """
+    def __init__(self):
+        super(_WriteBatch, self).__init__()
+        self.active = False
+        self.clear()
+
+    def clear(self):
+        """
+        Forget all pending writes.
+        """
+        # Map of username to a map of usage key to the state to overlay
+        # over the stored state of that block.
+        self.pending = defaultdict(dict)
+        # Map of username to user id.
+        self.user_ids = {}
+
+    def add(self, user, block_keys_to_state):
+        """
+        Add the given writes of the given user to the batch, coalescing
+        them with any pending writes to the same blocks.
+        """
+        self.user_ids[user.username] = user.id
+        pending = self.pending[user.username]
+        for usage_key, state in block_keys_to_state.iteritems():
+            pending.setdefault(usage_key, {}).update(state)
+
+    def flush(self):
+        """
+        Write all pending writes, and the history of the StudentModules
+        they modify, in as few statements as possible.
+        """
+        pending, user_ids = self.pending, self.user_ids
+        self.clear()
+
+        now = timezone.now()
+        modified_modules = []
+        for username, block_keys_to_state in pending.iteritems():
+            user_id = user_ids[username]
+            course_key_func = attrgetter('course_key')
+            by_course = itertools.groupby(sorted(block_keys_to_state, key=course_key_func), course_key_func)
+            for course_key, usage_keys in by_course:
+                usage_keys = list(usage_keys)
+                existing_modules = {
+                    student_module.module_state_key.map_into_course(course_key): student_module
+                    for student_module in StudentModule.objects.chunked_filter(
+                        'module_state_key__in',
+                        usage_keys,
+                        student_id=user_id,
+                        course_id=course_key,
+                    )
+                }
+
+                new_modules = []
+                for usage_key in usage_keys:
+                    state = block_keys_to_state[usage_key]
+                    student_module = existing_modules.get(usage_key)
+                    if student_module is None:
+                        new_modules.append(StudentModule(
+                            student_id=user_id,
+                            course_id=course_key,
+                            module_state_key=usage_key,
+                            module_type=usage_key.block_type,
+                            state=json.dumps(state),
+                            created=now,
+                            modified=now,
+                        ))
+                    else:
+                        current_state = {} if student_module.state is None else json.loads(student_module.state)
+                        current_state.update(state)
+                        student_module.state = json.dumps(current_state)
+                        student_module.modified = now
+                        # Updating with a queryset doesn't send the post_save
+                        # signal; history is saved below for all modules at once.
+                        StudentModule.objects.filter(pk=student_module.pk).update(
+                            state=student_module.state,
+                            modified=now,
+                        )
+                        modified_modules.append(student_module)
+
+                if new_modules:
+                    StudentModule.objects.bulk_create(new_modules)
+                    # Read back the created modules, since bulk_create doesn't
+                    # set their primary keys on all databases.
+                    modified_modules.extend(StudentModule.objects.chunked_filter(
+                        'module_state_key__in',
+                        [student_module.module_state_key for student_module in new_modules],
+                        student_id=user_id,
+                        course_id=course_key,
+                    ))
+
+        _save_history(modified_modules)
+
+
+def _history_models():
+    """
+    Returns the models that the history of StudentModules is saved to by
+    the post_save handlers of those models.
+    """
+    history_models = []
+    if not settings.FEATURES.get('ENABLE_CSMH_EXTENDED'):
+        history_models.append(StudentModuleHistory)
+    if apps.is_installed('coursewarehistoryextended'):
+        history_models.append(apps.get_model('coursewarehistoryextended', 'StudentModuleHistoryExtended'))
+    return history_models
+
+
+def _save_history(student_modules):
+    """
+    Saves the history of the given StudentModules, in the same way as
+    the post_save handlers of the history models, with a statement for
+    each history model.
+    """
+    student_modules = [
+        student_module for student_module in student_modules
+        if student_module.module_type in BaseStudentModuleHistory.HISTORY_SAVING_TYPES
+    ]
+    if not student_modules:
+        return
+
+    for history_model in _history_models():
+        history_model.objects.bulk_create([
+            history_model(
+                student_module=student_module,
+                version=None,
+                created=student_module.modified,
+                state=student_module.state,
+                grade=student_module.grade,
+                max_grade=student_module.max_grade,
+            )
+            for student_module in student_modules
+        ])
+
+
+_WRITE_BATCH = _WriteBatch()
+
+
 class DjangoXBlockUserStateClient(XBlockUserStateClient):
     """
     An interface that uses the Django ORM StudentModule as a backend.
@@ -69,6 +221,42 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         """
         self.user = user
 
+    @staticmethod
+    @contextmanager
+    def batched_writes(enabled=True):
+        """
+        Context manager which defers the writes made by `set_many` in the
+        current thread until it exits, when they are coalesced and written,
+        along with their history, in bulk statements.
+
+        Reads made through this client within the context see the deferred
+        writes; `delete_many` and `get_history` write them first. The
+        writes are made even if the context exits with an exception, as
+        they would have been if they weren't deferred.
+
+        If `enabled` is False, or writes are already being deferred by
+        an enclosing context, this does nothing.
+        """
+        if not enabled or _WRITE_BATCH.active:
+            yield
+            return
+
+        _WRITE_BATCH.active = True
+        try:
+            yield
+        except Exception:  # pylint: disable=broad-except
+            exc_info = sys.exc_info()
+            try:
+                _WRITE_BATCH.flush()
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Writing deferred user state failed")
+            six.reraise(*exc_info)
+        else:
+            _WRITE_BATCH.flush()
+        finally:
+            _WRITE_BATCH.active = False
+            _WRITE_BATCH.clear()
+
     def _get_student_modules(self, username, block_keys):
         """
         Retrieve the :class:`~StudentModule`s for the supplied ``username`` and ``block_keys``.
@@ -138,16 +326,22 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
 
         self._ddog_histogram(evt_time, 'get_many.blks_requested', len(block_keys))
 
+        # Writes of this user that are being deferred by batched_writes.
+        pending = dict(_WRITE_BATCH.pending.get(username, {}))
+
         modules = self._get_student_modules(username, block_keys)
         for module, usage_key in modules:
-            if module.state is None:
+            if module.state is None and usage_key not in pending:
                 self._ddog_increment(evt_time, 'get_many.empty_state')
                 continue
 
-            state = json.loads(module.state)
-            state_length += len(module.state)
-
-            self._ddog_histogram(evt_time, 'get_many.block_size', len(module.state))
+            if module.state is None:
+                state = {}
+            else:
+                state = json.loads(module.state)
+                state_length += len(module.state)
+                self._ddog_histogram(evt_time, 'get_many.block_size', len(module.state))
+            state.update(pending.pop(usage_key, {}))
 
             # If the state is the empty dict, then it has been deleted, and so
             # conformant UserStateClients should treat it as if it doesn't exist.
@@ -163,6 +357,17 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
             block_count += 1
             yield XBlockUserState(username, usage_key, state, module.modified, scope)
 
+        # Deferred writes to blocks that don't have a StudentModule yet.
+        for usage_key in block_keys:
+            if usage_key in pending:
+                # Copied, so that the deferred write can't be changed through the yielded state.
+                state = dict(pending.pop(usage_key))
+                if state == {}:
+                    continue
+                if fields is not None:
+                    state = {field: state[field] for field in fields if field in state}
+                yield XBlockUserState(username, usage_key, state, None, scope)
+
         # The rest of this method exists only to submit DataDog events.
         # Remove it once we're no longer interested in the data.
         finish_time = time()
@@ -200,6 +405,11 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
 
         evt_time = time()
 
+        if _WRITE_BATCH.active:
+            _WRITE_BATCH.add(user, block_keys_to_state)
+            self._ddog_histogram(evt_time, 'set_many.blks_batched', len(block_keys_to_state))
+            return
+
         for usage_key, state in block_keys_to_state.items():
             student_module, created = StudentModule.objects.get_or_create(
                 student=user,
@@ -271,6 +481,9 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
 
         self._ddog_histogram(evt_time, 'delete_many.block_count', len(block_keys))
 
+        if _WRITE_BATCH.active:
+            _WRITE_BATCH.flush()
+
         student_modules = self._get_student_modules(username, block_keys)
         for student_module, _ in student_modules:
             if fields is None:
@@ -309,6 +522,10 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
 
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
+
+        if _WRITE_BATCH.active:
+            _WRITE_BATCH.flush()
+
         student_modules = list(
             student_module
             for student_module, usage_id
@@ -8,7 +8,7 @@ import dogstats_wrapper as dog_stats_api
 
 from opaque_keys.edx.keys import CourseKey
 from courseware.courses import get_course_by_id
-from .new.course_grade import CourseGradeFactory
+from .new.course_grade import BulkCourseGradeFactory, CourseGradeFactory
 
 
 log = getLogger(__name__)
@@ -17,7 +17,7 @@ log = getLogger(__name__)
 GradeResult = namedtuple('StudentGrade', ['student', 'gradeset', 'err_msg'])
 
 
-def iterate_grades_for(course_or_id, students):
+def iterate_grades_for(course_or_id, students, chunk_size=None):
     """
     Given a course_id and an iterable of students (User), yield a GradeResult
     for every student enrolled in the course.  GradeResult is a named tuple of:
@@ -36,12 +36,23 @@ def iterate_grades_for(course_or_id, students):
     - grade_breakdown : A breakdown of the major components that
         make up the final grade. (For display)
     - raw_scores: contains scores for every graded module
+
+    If chunk_size is given, the students are graded in bulk, fetching
+    the scores of chunk_size students at a time.
     """
     if isinstance(course_or_id, (basestring, CourseKey)):
         course = get_course_by_id(course_or_id)
     else:
         course = course_or_id
 
+    if chunk_size:
+        for student, course_grade, exc in BulkCourseGradeFactory(students, chunk_size).iter_create(course):
+            if exc is None:
+                yield GradeResult(student, course_grade.summary, "")
+            else:
+                yield GradeResult(student, {}, exc.message)
+        return
+
     for student in students:
         with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
             try:
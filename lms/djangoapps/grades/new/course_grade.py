@@ -3,11 +3,17 @@ CourseGrade Class
 """
 
 from collections import defaultdict
+from itertools import islice
 from django.conf import settings
 from lazy import lazy
 from logging import getLogger
+from courseware.model_data import ScoresClient
 from lms.djangoapps.course_blocks.api import get_course_blocks
+from lms.djangoapps.grades.scores import possibly_scored
+from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
 from openedx.core.djangoapps.signals.signals import GRADES_UPDATED
+from student.models import anonymous_id_for_user
+from submissions.models import ScoreSummary
 from xmodule import block_metadata_utils
 
 from .subsection_grade import SubsectionGradeFactory
@@ -81,11 +87,14 @@ class CourseGrade(object):
 
         return grade_summary
 
-    def compute(self):
+    def compute(self, subsection_grade_factory=None):
         """
         Computes the grade for the given student and course.
+
+        A subsection_grade_factory with the student's prefetched scores
+        may be given; otherwise, one is created.
         """
-        subsection_grade_factory = SubsectionGradeFactory(self.student)
+        subsection_grade_factory = subsection_grade_factory or SubsectionGradeFactory(self.student)
         for chapter_key in self.course_structure.get_children(self.course.location):
             chapter = self.course_structure[chapter_key]
             subsection_grades = []
@@ -175,22 +184,27 @@ class CourseGradeFactory(object):
     def __init__(self, student):
         self.student = student
 
-    def create(self, course):
+    def create(self, course, course_structure=None, subsection_grade_factory=None):
         """
         Returns the CourseGrade object for the given student and course.
+
+        The student's course_structure and a subsection_grade_factory
+        with the student's prefetched scores may be given if already
+        available; see BulkCourseGradeFactory.
         """
-        course_structure = get_course_blocks(self.student, course.location)
+        if course_structure is None:
+            course_structure = get_course_blocks(self.student, course.location)
         return (
             self._get_saved_grade(course, course_structure) or
-            self._compute_and_update_grade(course, course_structure)
+            self._compute_and_update_grade(course, course_structure, subsection_grade_factory)
         )
 
-    def _compute_and_update_grade(self, course, course_structure):
+    def _compute_and_update_grade(self, course, course_structure, subsection_grade_factory=None):
         """
         Freshly computes and updates the grade for the student and course.
         """
         course_grade = CourseGrade(self.student, course, course_structure)
-        course_grade.compute()
+        course_grade.compute(subsection_grade_factory)
         return course_grade
 
     def _get_saved_grade(self, course, course_structure):  # pylint: disable=unused-argument
@@ -202,6 +216,92 @@ class CourseGradeFactory(object):
             _pretend_to_save_course_grades()
 
 
+class BulkCourseGradeFactory(object):
+    """
+    Factory class to create Course Grade objects for many students.
+
+    The collected course structure is retrieved once for all students,
+    and the scores of each chunk of students are fetched with a few
+    queries before their grades are computed together.
+    """
+    DEFAULT_CHUNK_SIZE = 100
+
+    def __init__(self, students, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.students = students
+        self.chunk_size = chunk_size
+
+    def iter_create(self, course):
+        """
+        Yields a (student, CourseGrade, exception) tuple for each student
+        and the given course.  If the student's grade could not be
+        computed, CourseGrade is None and exception is the exception
+        that was raised; otherwise, exception is None.
+        """
+        collected_block_structure = get_course_in_cache(course.id)
+        scorable_locations = [
+            block_key for block_key in collected_block_structure if possibly_scored(block_key)
+        ]
+
+        students_iter = iter(self.students)
+        students = list(islice(students_iter, self.chunk_size))
+        while students:
+            scores_clients = ScoresClient.create_for_users(
+                course.id, [student.id for student in students], scorable_locations
+            )
+            submissions_scores = _get_submissions_scores(course.id, students)
+
+            for student in students:
+                try:
+                    course_structure = get_course_blocks(
+                        student,
+                        course.location,
+                        collected_block_structure=collected_block_structure,
+                    )
+                    subsection_grade_factory = SubsectionGradeFactory(
+                        student, scores_clients[student.id], submissions_scores[student.id]
+                    )
+                    course_grade = CourseGradeFactory(student).create(
+                        course, course_structure, subsection_grade_factory
+                    )
+                except Exception as exc:  # pylint: disable=broad-except
+                    log.exception(
+                        'Cannot grade student %s (%s) in course %s because of exception: %s',
+                        student.username,
+                        student.id,
+                        course.id,
+                        exc.message
+                    )
+                    yield student, None, exc
+                    continue
+                yield student, course_grade, None
+
+            students = list(islice(students_iter, self.chunk_size))
+
+
+def _get_submissions_scores(course_key, students):
+    """
+    Returns a dict mapping the id of each of the given students to the
+    student's scores in the given course, in the form returned by
+    submissions.api.get_scores, fetched for all students in one query.
+    """
+    students_by_anonymous_id = {
+        anonymous_id_for_user(student, course_key, save=False): student for student in students
+    }
+    submissions_scores = {student.id: {} for student in students}
+    score_summaries = ScoreSummary.objects.filter(
+        student_item__course_id=unicode(course_key),
+        student_item__student_id__in=list(students_by_anonymous_id),
+    ).select_related('latest', 'student_item')
+    for summary in score_summaries:
+        if not summary.latest.is_hidden():
+            student = students_by_anonymous_id[summary.student_item.student_id]
+            submissions_scores[student.id][summary.student_item.item_id] = (
+                summary.latest.points_earned,
+                summary.latest.points_possible,
+            )
+    return submissions_scores
+
+
 def _pretend_to_save_course_grades():
     """
     Stub to facilitate testing feature flag until robust grade work lands.
@@ -80,11 +80,16 @@ class SubsectionGradeFactory(object):
     """
     Factory for Subsection Grades.
     """
-    def __init__(self, student):
+    def __init__(self, student, scores_client=None, submissions_scores=None):
+        """
+        The scores_client and submissions_scores may be given if the
+        student's scores were already fetched; for example, when grading
+        students in bulk.  Otherwise, they are fetched when first needed.
+        """
         self.student = student
 
-        self._scores_client = None
-        self._submissions_scores = None
+        self._scores_client = scores_client
+        self._submissions_scores = submissions_scores
 
     def create(self, subsection, course_structure, course):
         """
@@ -19,10 +19,15 @@ from courseware.tests.helpers import (
     get_request_for_user
 )
 from lms.djangoapps.course_blocks.api import get_course_blocks
+from openedx.core.djangoapps.course_groups.partition_scheme import CohortPartitionScheme
+from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory, config_course_cohorts
+from openedx.core.djangoapps.course_groups.views import link_cohort_to_partition_group
+from openedx.core.djangoapps.user_api.tests.factories import UserCourseTagFactory
 from student.tests.factories import UserFactory
 from student.models import CourseEnrollment
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
+from xmodule.partitions.partitions import Group, UserPartition
 
 from .. import course_grades
 from ..course_grades import summary as grades_summary
@@ -129,8 +134,16 @@ class TestGradeIteration(SharedModuleStoreTestCase):
         self.assertTrue(all_gradesets[student2])
         self.assertTrue(all_gradesets[student5])
 
+    def test_bulk_grades_match(self):
+        """Grading students in bulk gives the same gradesets as grading
+        them one by one."""
+        all_gradesets, _ = self._gradesets_and_errors_for(self.course.id, self.students)
+        bulk_gradesets, bulk_errors = self._gradesets_and_errors_for(self.course.id, self.students, chunk_size=2)
+        self.assertEqual(bulk_errors, {})
+        self.assertEqual(bulk_gradesets, all_gradesets)
+
     ################################# Helpers #################################
-    def _gradesets_and_errors_for(self, course_id, students):
+    def _gradesets_and_errors_for(self, course_id, students, chunk_size=None):
         """Simple helper method to iterate through student grades and give us
         two dictionaries -- one that has all students and their respective
         gradesets, and one that has only students that could not be graded and
@@ -138,7 +151,7 @@ class TestGradeIteration(SharedModuleStoreTestCase):
         students_to_gradesets = {}
         students_to_errors = {}
 
-        for student, gradeset, err_msg in course_grades.iterate_grades_for(course_id, students):
+        for student, gradeset, err_msg in course_grades.iterate_grades_for(course_id, students, chunk_size):
             students_to_gradesets[student] = gradeset
             if err_msg:
                 students_to_errors[student] = err_msg
@@ -146,6 +159,104 @@ class TestGradeIteration(SharedModuleStoreTestCase):
         return students_to_gradesets, students_to_errors
 
 
+@attr(shard=1)
+class TestBulkGradesWithGroups(SharedModuleStoreTestCase):
+    """
+    Test that grading students in bulk gives the same gradesets as grading
+    them one by one, in a course with split_test and content group content.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(TestBulkGradesWithGroups, cls).setUpClass()
+        cls.split_partition = UserPartition(
+            0, 'Experiment', 'An experiment', [Group(0, 'alpha'), Group(1, 'beta')]
+        )
+        cls.content_partition = UserPartition(
+            1, 'Content Groups', 'Content groups', [Group(1, 'first'), Group(2, 'second')],
+            scheme=CohortPartitionScheme,
+        )
+        cls.content_partition.scheme.name = "cohort"
+        cls.course = CourseFactory.create(user_partitions=[cls.split_partition, cls.content_partition])
+        chapter = ItemFactory.create(parent=cls.course, category='chapter')
+        sequence = ItemFactory.create(parent=chapter, category='sequential', graded=True, format='Homework')
+        vertical = ItemFactory.create(parent=sequence, category='vertical')
+
+        # A problem in each group of the experiment.
+        split_verticals = [
+            cls.course.id.make_usage_key('vertical', 'split_vertical_{}'.format(group.id))
+            for group in cls.split_partition.groups
+        ]
+        split_test = ItemFactory.create(
+            parent=vertical,
+            category='split_test',
+            user_partition_id=cls.split_partition.id,
+            group_id_to_child={str(index): location for index, location in enumerate(split_verticals)},
+        )
+        cls.problems = []
+        for location in split_verticals:
+            split_vertical = ItemFactory.create(parent=split_test, category='vertical', location=location)
+            cls.problems.append(cls._create_problem(split_vertical))
+
+        # A problem visible to each content group.
+        for group in cls.content_partition.groups:
+            cls.problems.append(cls._create_problem(
+                vertical, metadata={'group_access': {cls.content_partition.id: [group.id]}}
+            ))
+
+    @classmethod
+    def _create_problem(cls, parent, **kwargs):
+        """
+        Creates a problem worth a point in the given parent.
+        """
+        problem_xml = MultipleChoiceResponseXMLFactory().build_xml(
+            question_text='The correct answer is Choice 1',
+            choices=[False, True],
+            choice_names=['choice_0', 'choice_1']
+        )
+        return ItemFactory.create(parent=parent, category='problem', data=problem_xml, **kwargs)
+
+    def setUp(self):
+        """
+        Creates a student in each combination of experiment group and
+        content group, who got the first problem of each partition right.
+        """
+        super(TestBulkGradesWithGroups, self).setUp()
+        config_course_cohorts(self.course, is_cohorted=True)
+        cohorts = {}
+        for group in self.content_partition.groups:
+            cohorts[group.id] = CohortFactory(course_id=self.course.id)
+            link_cohort_to_partition_group(cohorts[group.id], self.content_partition.id, group.id)
+
+        self.students = []
+        for split_group in self.split_partition.groups:
+            for content_group in self.content_partition.groups:
+                student = UserFactory.create()
+                CourseEnrollment.enroll(student, self.course.id)
+                UserCourseTagFactory(
+                    user=student,
+                    course_id=self.course.id,
+                    key='xblock.partition_service.partition_{0}'.format(self.split_partition.id),
+                    value=str(split_group.id),
+                )
+                cohorts[content_group.id].users.add(student)
+                for index, problem in enumerate(self.problems):
+                    set_score(student.id, problem.location, 1 if index % 2 == 0 else 0, 1)
+                self.students.append(student)
+
+    def test_bulk_grades_match(self):
+        all_gradesets = {
+            student: CourseGradeFactory(student).create(self.course).summary for student in self.students
+        }
+        bulk_gradesets = {}
+        for student, gradeset, err_msg in course_grades.iterate_grades_for(self.course, self.students, 2):
+            self.assertEqual(err_msg, "")
+            bulk_gradesets[student] = gradeset
+        self.assertEqual(bulk_gradesets, all_gradesets)
+
+        # The students see different problems, and so have different grades.
+        self.assertNotEqual(all_gradesets[self.students[0]], all_gradesets[self.students[-1]])
+
+
 class TestProgressSummary(TestCase):
     """
     Test the method that calculates the score for a given block based on the
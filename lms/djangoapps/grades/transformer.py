@@ -31,6 +31,7 @@ class GradesTransformer(BlockStructureTransformer):
         max_score: (numeric)
     """
     VERSION = 2
+    SUPPORTS_INCREMENTAL_COLLECT = True
     FIELDS_TO_COLLECT = [u'due', u'format', u'graded', u'has_score', u'weight', u'course_version', u'subtree_edited_on']
 
     @classmethod
@@ -50,6 +51,15 @@ class GradesTransformer(BlockStructureTransformer):
         block_structure.request_xblock_fields(*cls.FIELDS_TO_COLLECT)
         cls._collect_max_scores(block_structure)
 
+    @classmethod
+    def collect_incremental(cls, block_structure, block_keys):
+        """
+        Collects the same information as collect, but only for the
+        blocks identified by the given block_keys.
+        """
+        block_structure.request_xblock_fields(*cls.FIELDS_TO_COLLECT)
+        cls._collect_max_scores(block_structure, block_keys)
+
     def transform(self, block_structure, usage_context):
         """
         Perform no transformations.
@@ -57,11 +67,12 @@ class GradesTransformer(BlockStructureTransformer):
         pass
 
     @classmethod
-    def _collect_max_scores(cls, block_structure):
+    def _collect_max_scores(cls, block_structure, block_keys=None):
         """
-        Collect the `max_score` for every block in the provided `block_structure`.
+        Collect the `max_score` for every block in the provided `block_structure`,
+        or only for the blocks in `block_keys` if given.
         """
-        for module in cls._iter_scorable_xmodules(block_structure):
+        for module in cls._iter_scorable_xmodules(block_structure, block_keys):
             cls._collect_max_score(block_structure, module)
 
     @classmethod
@@ -74,10 +85,11 @@ class GradesTransformer(BlockStructureTransformer):
         block_structure.set_transformer_block_field(module.location, cls, 'max_score', score)
 
     @staticmethod
-    def _iter_scorable_xmodules(block_structure):
+    def _iter_scorable_xmodules(block_structure, block_keys=None):
         """
-        Loop through all the blocks locators in the block structure, and retrieve
-        the module (XModule or XBlock) associated with that locator.
+        Loop through all the blocks locators in the block structure, or only
+        those in `block_keys` if given, and retrieve the module (XModule or
+        XBlock) associated with that locator.
 
         For implementation reasons, we need to pull the max_score from the
         XModule, even though the data is not user specific.  Here we bind the
@@ -93,9 +105,13 @@ class GradesTransformer(BlockStructureTransformer):
             course_id=course_key,
             user=request.user,
             descriptor=root_block,
-            descriptor_filter=lambda descriptor: descriptor.has_score,
+            descriptor_filter=lambda descriptor: descriptor.has_score and (
+                block_keys is None or descriptor.location in block_keys
+            ),
         )
         for block_locator in block_structure.post_order_traversal():
+            if block_keys is not None and block_locator not in block_keys:
+                continue
             block = block_structure.get_xblock(block_locator)
             if getattr(block, 'has_score', False):
                 module = get_module_for_descriptor(user, request, block, cache, course_key)
@@ -12,6 +12,7 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
+from tempfile import SpooledTemporaryFile
 from uuid import uuid4
 import csv
 import json
@@ -20,7 +21,7 @@ import os.path
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.files.base import ContentFile
+from django.core.files.base import File
 from django.db import models, transaction
 
 from openedx.core.storage import get_storage
@@ -31,6 +32,9 @@ from xmodule_django.models import CourseKeyField
 QUEUING = 'QUEUING'
 PROGRESS = 'PROGRESS'
 
+# Reports larger than this many bytes are spooled to disk while they are written.
+REPORT_SPOOL_MAX_SIZE = 10 * 1024 * 1024
+
 
 class InstructorTask(models.Model):
     """
@@ -178,9 +182,9 @@ class InstructorTask(models.Model):
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. Rows may be passed to `store_rows` as a generator, so that large
+    reports are written as they are computed instead of being built up in
+    memory.
     """
     @classmethod
     def from_config(cls, config_name):
@@ -263,12 +267,18 @@ class DjangoStorageReportStore(ReportStore):
         """
         Given a course_id, filename, and rows (each row is an iterable of
         strings), write the rows to the storage backend in csv format.
+
+        `rows` may be any iterable, such as a generator, and is consumed
+        as it is written. The rows are written to a temporary file, which
+        is spooled to disk once it grows past REPORT_SPOOL_MAX_SIZE bytes,
+        and the file is only stored once all rows have been written, so
+        any files that are visible in the ReportStore are complete ones.
         """
-        output_buffer = ContentFile('')
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        output_buffer.seek(0)
-        self.store(course_id, filename, output_buffer)
+        with SpooledTemporaryFile(max_size=REPORT_SPOOL_MAX_SIZE) as output_buffer:
+            csvwriter = csv.writer(output_buffer)
+            csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+            output_buffer.seek(0)
+            self.store(course_id, filename, File(output_buffer))
 
     def links_for(self, course_id):
         """
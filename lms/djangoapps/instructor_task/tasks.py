@@ -12,6 +12,9 @@ objects, and adds additional filter clauses.
 A task also passes through "xmodule_instance_args", that are used to provide
 information to our code that instantiates xmodule instances.
 
+A task may also specify a "subtask" that performs its update on a chunk of the
+StudentModule objects, so that large updates are spread across workers.
+
 The task definition then calls the traversal function, passing in the three arguments
 above, along with the id value for an InstructorTask object.  The InstructorTask
 object contains a 'task_input' row which is a JSON-encoded dict containing
@@ -30,7 +33,9 @@ from bulk_email.tasks import perform_delegate_email_batches
 from instructor_task.tasks_helper import (
     run_main_task,
     BaseInstructorTask,
+    create_module_state_update_subtask,
     perform_module_state_update,
+    perform_module_state_update_subtask,
     rescore_problem_module_state,
     reset_attempts_module_state,
     delete_problem_module_state,
@@ -79,10 +84,25 @@ def rescore_problem(entry_id, xmodule_instance_args):
         """Filter that matches problems which are marked as being done"""
         return modules_to_update.filter(state__contains='"done": true')
 
-    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn)
+    create_subtask_fcn = partial(
+        create_module_state_update_subtask, rescore_problem_subtask, entry_id, xmodule_instance_args
+    )
+    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn, create_subtask_fcn=create_subtask_fcn)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
+@task  # pylint: disable=not-callable
+def rescore_problem_subtask(entry_id, xmodule_instance_args, module_ids, subtask_status_dict):
+    """
+    Rescores a problem for the StudentModule objects with the given `module_ids`,
+    as a subtask of `rescore_problem`.
+    """
+    # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
+    action_name = ugettext_noop('rescored')
+    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+    return perform_module_state_update_subtask(update_fcn, entry_id, module_ids, action_name, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask)  # pylint: disable=not-callable
 def reset_problem_attempts(entry_id, xmodule_instance_args):
     """Resets problem attempts to zero for a particular problem for all students in a course.
@@ -101,10 +121,25 @@ def reset_problem_attempts(entry_id, xmodule_instance_args):
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('reset')
     update_fcn = partial(reset_attempts_module_state, xmodule_instance_args)
-    visit_fcn = partial(perform_module_state_update, update_fcn, None)
+    create_subtask_fcn = partial(
+        create_module_state_update_subtask, reset_problem_attempts_subtask, entry_id, xmodule_instance_args
+    )
+    visit_fcn = partial(perform_module_state_update, update_fcn, None, create_subtask_fcn=create_subtask_fcn)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
+@task  # pylint: disable=not-callable
+def reset_problem_attempts_subtask(entry_id, xmodule_instance_args, module_ids, subtask_status_dict):
+    """
+    Resets problem attempts to zero for the StudentModule objects with the given
+    `module_ids`, as a subtask of `reset_problem_attempts`.
+    """
+    # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
+    action_name = ugettext_noop('reset')
+    update_fcn = partial(reset_attempts_module_state, xmodule_instance_args)
+    return perform_module_state_update_subtask(update_fcn, entry_id, module_ids, action_name, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask)  # pylint: disable=not-callable
 def delete_problem_state(entry_id, xmodule_instance_args):
     """Deletes problem state entirely for all students on a particular problem in a course.
@@ -123,10 +158,25 @@ def delete_problem_state(entry_id, xmodule_instance_args):
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('deleted')
     update_fcn = partial(delete_problem_module_state, xmodule_instance_args)
-    visit_fcn = partial(perform_module_state_update, update_fcn, None)
+    create_subtask_fcn = partial(
+        create_module_state_update_subtask, delete_problem_state_subtask, entry_id, xmodule_instance_args
+    )
+    visit_fcn = partial(perform_module_state_update, update_fcn, None, create_subtask_fcn=create_subtask_fcn)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
+@task  # pylint: disable=not-callable
+def delete_problem_state_subtask(entry_id, xmodule_instance_args, module_ids, subtask_status_dict):
+    """
+    Deletes problem state for the StudentModule objects with the given `module_ids`,
+    as a subtask of `delete_problem_state`.
+    """
+    # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
+    action_name = ugettext_noop('deleted')
+    update_fcn = partial(delete_problem_module_state, xmodule_instance_args)
+    return perform_module_state_update_subtask(update_fcn, entry_id, module_ids, action_name, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask)  # pylint: disable=not-callable
 def send_bulk_course_email(entry_id, _xmodule_instance_args):
     """Sends emails to recipients enrolled in a course.
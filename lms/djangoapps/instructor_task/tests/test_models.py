@@ -49,6 +49,22 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    @patch('instructor_task.models.REPORT_SPOOL_MAX_SIZE', 16)
+    def test_store_rows_from_generator(self):
+        """
+        Test that ReportStore.store_rows() writes rows from a generator,
+        spooling them to disk as needed.
+        """
+        report_store = self.create_report_store()
+        rows = ([u'row {}'.format(index), u'\u2603'] for index in range(100))
+        report_store.store_rows(self.course_id, 'report.csv', rows)
+
+        with report_store.storage.open(report_store.path_to(self.course_id, 'report.csv')) as csv_file:
+            self.assertEqual(
+                csv_file.read().splitlines(),
+                ['row {},\xe2\x98\x83'.format(index) for index in range(100)]
+            )
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, SimpleTestCase):
     """
@@ -12,6 +12,7 @@ from mock import Mock, MagicMock, patch
 from nose.plugins.attrib import attr
 
 from celery.states import SUCCESS, FAILURE
+from django.test.utils import override_settings
 from django.utils.translation import ugettext_noop
 from functools import partial
 
@@ -366,6 +367,27 @@ class TestResetAttemptsInstructorTask(TestInstructorTasks):
         # check that entries were reset
         self._assert_num_attempts(students, 0)
 
+    @override_settings(INSTRUCTOR_TASK_MODULES_PER_SUBTASK=3)
+    def test_reset_with_subtasks(self):
+        initial_attempts = 3
+        input_state = json.dumps({'attempts': initial_attempts})
+        num_students = 10
+        students = self._create_students_with_state(num_students, input_state)
+        task_entry = self._create_input_entry()
+        self._run_task_with_mock_celery(reset_problem_attempts, task_entry.id, task_entry.task_id)
+
+        # the subtasks are run eagerly in tests, and update the entry as they complete
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEquals(entry.task_state, SUCCESS)
+        subtasks = json.loads(entry.subtasks)
+        self.assertEquals(subtasks['total'], 4)
+        self.assertEquals(subtasks['succeeded'], 4)
+        task_output = json.loads(entry.task_output)
+        self.assertEquals(task_output['attempted'], num_students)
+        self.assertEquals(task_output['succeeded'], num_students)
+        self.assertEquals(task_output['total'], num_students)
+        self._assert_num_attempts(students, 0)
+
     def _test_reset_with_student(self, use_email):
         """Run a reset task for one student, with several StudentModules for the problem defined."""
         num_students = 10
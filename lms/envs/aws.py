@@ -230,6 +230,9 @@ if 'loc_cache' not in CACHES:
         'LOCATION': 'edx_location_mem_cache',
     }
 
+COURSE_ASSETS_FILE_CACHE.update(ENV_TOKENS.get('COURSE_ASSETS_FILE_CACHE', {}))
+COURSE_STRUCTURE_CACHE_CODEC = ENV_TOKENS.get('COURSE_STRUCTURE_CACHE_CODEC', COURSE_STRUCTURE_CACHE_CODEC)
+
 # Email overrides
 DEFAULT_FROM_EMAIL = ENV_TOKENS.get('DEFAULT_FROM_EMAIL', DEFAULT_FROM_EMAIL)
 DEFAULT_FEEDBACK_EMAIL = ENV_TOKENS.get('DEFAULT_FEEDBACK_EMAIL', DEFAULT_FEEDBACK_EMAIL)
@@ -574,6 +577,7 @@ STUDENT_FILEUPLOAD_MAX_SIZE = ENV_TOKENS.get("STUDENT_FILEUPLOAD_MAX_SIZE", STUD
 
 # Event tracking
 TRACKING_BACKENDS.update(AUTH_TOKENS.get("TRACKING_BACKENDS", {}))
+TRACKING_ASYNC.update(ENV_TOKENS.get("TRACKING_ASYNC", {}))
 EVENT_TRACKING_BACKENDS['tracking_logs']['OPTIONS']['backends'].update(AUTH_TOKENS.get("EVENT_TRACKING_BACKENDS", {}))
 EVENT_TRACKING_BACKENDS['segmentio']['OPTIONS']['processors'][0]['OPTIONS']['whitelist'].extend(
     AUTH_TOKENS.get("EVENT_TRACKING_SEGMENTIO_EMIT_WHITELIST", []))
@@ -599,6 +603,11 @@ GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
 # financial reports
 FINANCIAL_REPORTS = ENV_TOKENS.get("FINANCIAL_REPORTS", FINANCIAL_REPORTS)
 
+# Instructor tasks
+INSTRUCTOR_TASK_MODULES_PER_SUBTASK = ENV_TOKENS.get(
+    'INSTRUCTOR_TASK_MODULES_PER_SUBTASK', INSTRUCTOR_TASK_MODULES_PER_SUBTASK
+)
+
 ##### ORA2 ######
 # Prefix for uploads of example-based assessment AI classifiers
 # This can be used to separate uploads for different environments
@@ -863,3 +872,15 @@ API_ACCESS_FROM_EMAIL = ENV_TOKENS.get('API_ACCESS_FROM_EMAIL')
 APP_UPGRADE_CACHE_TIMEOUT = ENV_TOKENS.get('APP_UPGRADE_CACHE_TIMEOUT', APP_UPGRADE_CACHE_TIMEOUT)
 
 AFFILIATE_COOKIE_NAME = ENV_TOKENS.get('AFFILIATE_COOKIE_NAME', AFFILIATE_COOKIE_NAME)
+
+BLOCK_STRUCTURE_LOCAL_CACHE_MAX_SIZE = ENV_TOKENS.get(
+    'BLOCK_STRUCTURE_LOCAL_CACHE_MAX_SIZE', BLOCK_STRUCTURE_LOCAL_CACHE_MAX_SIZE
+)
+BLOCK_STRUCTURE_INCREMENTAL_COLLECT = ENV_TOKENS.get(
+    'BLOCK_STRUCTURE_INCREMENTAL_COLLECT', BLOCK_STRUCTURE_INCREMENTAL_COLLECT
+)
+BLOCK_STRUCTURE_COMPACT_STORAGE = ENV_TOKENS.get('BLOCK_STRUCTURE_COMPACT_STORAGE', BLOCK_STRUCTURE_COMPACT_STORAGE)
+BLOCK_STRUCTURE_PATH_INDEX = ENV_TOKENS.get('BLOCK_STRUCTURE_PATH_INDEX', BLOCK_STRUCTURE_PATH_INDEX)
+COURSEWARE_TOC_FROM_BLOCK_STRUCTURE = ENV_TOKENS.get(
+    'COURSEWARE_TOC_FROM_BLOCK_STRUCTURE', COURSEWARE_TOC_FROM_BLOCK_STRUCTURE
+)
@@ -357,6 +357,10 @@ FEATURES = {
     # making multiple queries.
     'ENABLE_READING_FROM_MULTIPLE_HISTORY_TABLES': True,
 
+    # Defer the user state writes made while handling an XBlock handler
+    # request, and write them in bulk once the handler has returned.
+    'ENABLE_BATCHED_USER_STATE_WRITES': False,
+
     # Temporary feature flag for disabling saving of subsection grades.
     # There is also an advanced setting in the course module.  The
     # feature flag and the advanced setting must both be true for
@@ -604,6 +608,18 @@ TRACKING_BACKENDS = {
     }
 }
 
+# Send the events of the TRACKING_BACKENDS from a background thread, in
+# batches, rather than while handling requests.
+TRACKING_ASYNC = {
+    'ENABLED': False,
+    # Maximum number of events waiting to be sent, per backend.
+    'QUEUE_SIZE': 10000,
+    # Maximum number of events sent to a backend at once.
+    'BATCH_SIZE': 100,
+    # Seconds to wait for room in a full queue before dropping an event.
+    'PUT_TIMEOUT': 0.1,
+}
+
 # We're already logging events, and we don't want to capture user
 # names/passwords.  Heartbeat events are likely not interesting.
 TRACKING_IGNORE_URL_PATTERNS = [r'^/event', r'^/login', r'^/heartbeat', r'^/segmentio/event', r'^/performance']
@@ -744,6 +760,29 @@ MODULESTORE = {
     }
 }
 
+#################### Course structures ########################################
+
+# Codec used to serialize split course structures into the
+# "course_structure_cache": 'pickle' or 'marshal'.  Structures written by
+# either codec are read whichever is configured, so 'marshal' can be used once
+# every server sharing the cache can decode it.
+COURSE_STRUCTURE_CACHE_CODEC = 'pickle'
+
+#################### Course assets ############################################
+
+# On-disk cache of course assets too large for the "course_assets" cache.
+COURSE_ASSETS_FILE_CACHE = {
+    # Directory to store the files in.  None disables the cache.
+    'DIR': None,
+    # Maximum total size of the files, in bytes.
+    'MAX_SIZE': 1024 * 1024 * 1024,
+    # Header telling the web server to send the file itself: 'X-Sendfile'
+    # (Apache) or 'X-Accel-Redirect' (nginx).  None sends it from Django.
+    'SENDFILE_HEADER': None,
+    # For X-Accel-Redirect: the internal URL at which the web server serves DIR.
+    'SENDFILE_URL_PREFIX': None,
+}
+
 #################### Python sandbox ############################################
 
 CODE_JAIL = {
@@ -757,6 +796,17 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Pool of warm sandbox processes with the common modules already
+    # imported, used instead of starting a new sandbox for each execution.
+    'pool': {
+        # How many idle sandbox processes to keep?  0 disables the pool.
+        'size': 0,
+        # Replace a sandbox process after this many executions...
+        'max_executions': 100,
+        # ...or once it uses more than this many bytes of memory.
+        'max_memory': 256 * 1024 * 1024,
+    },
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -1147,6 +1197,7 @@ MIDDLEWARE_CLASSES = (
 
     'django_comment_client.utils.ViewNameMiddleware',
     'codejail.django_integration.ConfigureCodeJailMiddleware',
+    'util.sandboxing.ConfigureSandboxPoolMiddleware',
 
     # catches any uncaught RateLimitExceptions and returns a 403 instead of a 500
     'ratelimitbackend.middleware.RateLimitMiddleware',
@@ -2351,6 +2402,12 @@ FINANCIAL_REPORTS = {
     'ROOT_PATH': '/tmp/edx-s3/financial_reports',
 }
 
+###################### Instructor Tasks ######################
+# Problem rescores, resets and deletions of more student modules than this
+# are split into subtasks of this many student modules, which can run on
+# different workers.  0 disables splitting.
+INSTRUCTOR_TASK_MODULES_PER_SUBTASK = 0
+
 #### PASSWORD POLICY SETTINGS #####
 PASSWORD_MIN_LENGTH = 8
 PASSWORD_MAX_LENGTH = None
@@ -2947,3 +3004,27 @@ AFFILIATE_COOKIE_NAME = 'affiliate_id'
 # The cache is cleared when Redirect models are saved/deleted
 REDIRECT_CACHE_TIMEOUT = None  # The length of time we cache Redirect model data
 REDIRECT_CACHE_KEY_PREFIX = 'redirects'
+
+############## Settings for the Block Structure framework ###############
+
+# Maximum total size, in bytes, of the per-process cache of block
+# structures kept in front of the shared cache.  Set to 0 to disable
+# the per-process cache.
+BLOCK_STRUCTURE_LOCAL_CACHE_MAX_SIZE = 0
+
+# Whether Block Structures are updated incrementally when a course is
+# published, recollecting data only for the blocks that changed.
+BLOCK_STRUCTURE_INCREMENTAL_COLLECT = False
+
+# Whether Block Structures are stored in the cache in their compact
+# form, with usage keys interned into integer indices.
+BLOCK_STRUCTURE_COMPACT_STORAGE = False
+
+# Whether the paths to the blocks of courses are indexed when they are
+# published, so that jump_to links and bookmarks find them without
+# searching the modulestore.
+BLOCK_STRUCTURE_PATH_INDEX = False
+
+# Whether the courseware's table of contents is built from the course's
+# block structure, rather than by binding its chapters and sections.
+COURSEWARE_TOC_FROM_BLOCK_STRUCTURE = False
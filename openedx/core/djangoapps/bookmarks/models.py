@@ -10,6 +10,7 @@ from jsonfield.fields import JSONField
 from model_utils.models import TimeStampedModel
 
 from opaque_keys.edx.keys import UsageKey
+from openedx.core.djangoapps.content.block_structure.api import get_course_path_index
 from xmodule.modulestore import search
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError, NoPathToItem
@@ -162,7 +163,9 @@ class Bookmark(TimeStampedModel):
         """
         with modulestore().bulk_operations(usage_key.course_key):
             try:
-                path = search.path_to_location(modulestore(), usage_key, full_path=True)
+                path = search.path_to_location(
+                    modulestore(), usage_key, full_path=True, path_index=get_course_path_index(usage_key.course_key)
+                )
             except ItemNotFoundError:
                 log.error(u'Block with usage_key: %s not found.', usage_key)
                 return []
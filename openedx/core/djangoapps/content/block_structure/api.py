@@ -1,10 +1,19 @@
 """
 Higher order functions built on the BlockStructureManager to interact with a django cache.
 """
+from django.conf import settings
 from django.core.cache import cache
+from openedx.core.lib.block_structure.cache import BlockStructureLocalCache
 from openedx.core.lib.block_structure.manager import BlockStructureManager
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
 
+from .path_index import CoursePathIndex
+
+
+# Per-process cache of Block Structures, created on first use.
+_LOCAL_CACHE = None
+
 
 def get_course_in_cache(course_key):
     """
@@ -24,8 +33,13 @@ def update_course_in_cache(course_key):
     A higher order function implemented on top of the
     block_structure.updated_collected function that updates the block
     structure in the cache for the given course_key.
+
+    The update is incremental if enabled by the
+    BLOCK_STRUCTURE_INCREMENTAL_COLLECT setting.
     """
-    return get_block_structure_manager(course_key).update_collected()
+    return get_block_structure_manager(course_key).update_collected(
+        incremental=is_incremental_collect_enabled(),
+    )
 
 
 def clear_course_from_cache(course_key):
@@ -42,13 +56,62 @@ def clear_course_from_cache(course_key):
     get_block_structure_manager(course_key).clear()
 
 
+def get_course_path_index(course_key):
+    """
+    Returns the persisted index of the paths to the blocks of the given
+    course, to be given to path_to_location, or None if the index is
+    disabled by the BLOCK_STRUCTURE_PATH_INDEX setting or can't be used
+    with the current branch of the modulestore.
+
+    The index is built from the published branch of the course.
+    """
+    if not is_path_index_enabled():
+        return None
+    if modulestore().get_branch_setting() != ModuleStoreEnum.Branch.published_only:
+        return None
+    return CoursePathIndex(course_key, get_cache(), rebuild=_queue_course_path_index_update)
+
+
+def _queue_course_path_index_update(course_key):
+    """
+    Queues the rebuilding of the persisted index of the paths to the
+    blocks of the given course.
+    """
+    from .tasks import update_course_path_index  # avoids a circular import
+    update_course_path_index.apply_async([unicode(course_key)], countdown=0)
+
+
+def update_course_path_index(course_key):
+    """
+    Rebuilds the persisted index of the paths to the blocks of the
+    given course from its published branch.
+    """
+    store = modulestore()
+    with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+        CoursePathIndex(course_key, get_cache()).update(store)
+
+
+def clear_course_path_index(course_key):
+    """
+    Removes the persisted index of the paths to the blocks of the
+    given course, so that paths are searched for until it's rebuilt.
+    """
+    CoursePathIndex(course_key, get_cache()).clear()
+
+
 def get_block_structure_manager(course_key):
     """
     Returns the manager for managing Block Structures for the given course.
     """
     store = modulestore()
     course_usage_key = store.make_course_usage_key(course_key)
-    return BlockStructureManager(course_usage_key, store, get_cache())
+    return BlockStructureManager(
+        course_usage_key,
+        store,
+        get_cache(),
+        get_local_cache(),
+        compact=getattr(settings, 'BLOCK_STRUCTURE_COMPACT_STORAGE', False),
+    )
 
 
 def get_cache():
@@ -56,3 +119,34 @@ def get_cache():
     Returns the storage for caching Block Structures.
     """
     return cache
+
+
+def get_local_cache():
+    """
+    Returns the per-process storage for caching Block Structures, or
+    None if it is disabled by the BLOCK_STRUCTURE_LOCAL_CACHE_MAX_SIZE
+    setting.
+    """
+    global _LOCAL_CACHE  # pylint: disable=global-statement
+    max_size = getattr(settings, 'BLOCK_STRUCTURE_LOCAL_CACHE_MAX_SIZE', 0)
+    if not max_size:
+        return None
+    if _LOCAL_CACHE is None or _LOCAL_CACHE.max_size != max_size:
+        _LOCAL_CACHE = BlockStructureLocalCache(max_size)
+    return _LOCAL_CACHE
+
+
+def is_incremental_collect_enabled():
+    """
+    Returns whether Block Structures are to be updated incrementally
+    when their course is published.
+    """
+    return getattr(settings, 'BLOCK_STRUCTURE_INCREMENTAL_COLLECT', False)
+
+
+def is_path_index_enabled():
+    """
+    Returns whether the index of the paths to the blocks of courses is
+    built when they are published, and used by path_to_location.
+    """
+    return getattr(settings, 'BLOCK_STRUCTURE_PATH_INDEX', False)
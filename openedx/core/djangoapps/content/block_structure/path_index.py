@@ -0,0 +1,131 @@
+"""
+Persisted index of the paths from the root of a course to each of its
+blocks, answering path_to_location without searching the modulestore.
+"""
+from logging import getLogger
+from uuid import uuid4
+
+from xmodule.modulestore.search import build_path_index
+
+
+logger = getLogger(__name__)  # pylint: disable=C0103
+
+
+class CoursePathIndex(object):
+    """
+    The paths from the root of a course to each of its blocks, as found
+    by `build_path_index`, stored in a cache with an entry per block, so
+    that looking up the path to a block reads a single, small entry.
+
+    Each update of the index stores its entries under a new version,
+    which is then made current, so that lookups never see a partially
+    written index.  Entries of former versions are left to be evicted.
+
+    The index doesn't expire, as it's cleared whenever the course is
+    published.  Should it be missing, the first lookup asks for it to be
+    rebuilt.
+
+    Instances can be given to path_to_location as its `path_index`.
+    """
+    # The index is versioned and cleared on publish, so it's stored
+    # without expiry.
+    TIMEOUT = None
+
+    # The number of seconds during which a missing index isn't asked to
+    # be rebuilt again, while it's being rebuilt.
+    REBUILD_TIMEOUT = 60 * 5
+
+    def __init__(self, course_key, cache, rebuild=None):
+        """
+        Arguments:
+            course_key (CourseKey) - The course whose blocks are indexed.
+
+            cache (django.core.cache.backends.base.BaseCache) - The
+                cache in which the index is stored.
+
+            rebuild (function) - Optional function, called with the
+                course key, to have the index rebuilt when it's missing.
+        """
+        self.course_key = course_key
+        self._cache = cache
+        self._rebuild = rebuild
+        self._version = None
+
+    def get(self, usage_key, default=None):
+        """
+        Returns the (path, position) tuple of the block with the given
+        usage key, as returned by `build_path_index`, or `default` if
+        the block isn't in the index.
+        """
+        if self._version is None:
+            self._version = self._cache.get(self._encode_version_cache_key())
+            if self._version is None:
+                self._request_rebuild()
+                return default
+
+        entry = self._cache.get(self._encode_entry_cache_key(self._version, usage_key))
+        if entry is None:
+            return default
+        path, position = entry
+        return tuple(self.course_key.make_usage_key(*block) for block in path), position
+
+    def update(self, store):
+        """
+        Rebuilds the index from the course in the given modulestore.
+        """
+        version = uuid4().hex
+        index = build_path_index(store, self.course_key)
+        self._cache.set_many(
+            {
+                self._encode_entry_cache_key(version, usage_key): (
+                    tuple((block.block_type, block.block_id) for block in path),
+                    position,
+                )
+                for usage_key, (path, position) in index.iteritems()
+            },
+            timeout=self.TIMEOUT,
+        )
+        self._cache.set(self._encode_version_cache_key(), version, timeout=self.TIMEOUT)
+        self._version = version
+        logger.info("Wrote path index of %s to cache, blocks: %s", self.course_key, len(index))
+
+    def _request_rebuild(self):
+        """
+        Asks for the missing index to be rebuilt, unless it already was
+        in the last REBUILD_TIMEOUT seconds.
+        """
+        if self._rebuild is None:
+            return
+        if self._cache.add(self._encode_rebuild_cache_key(), True, timeout=self.REBUILD_TIMEOUT):
+            logger.info("Path index of %s is missing, rebuilding it", self.course_key)
+            self._rebuild(self.course_key)
+        # Don't ask again for this instance's lookups.
+        self._rebuild = None
+
+    def clear(self):
+        """
+        Removes the index, so that no path is found in it until it's
+        updated.
+        """
+        self._cache.delete(self._encode_version_cache_key())
+        self._version = None
+
+    def _encode_version_cache_key(self):
+        """
+        Returns the cache key of the current version of the index.
+        """
+        return u"path_index.version.{}".format(self.course_key)
+
+    def _encode_rebuild_cache_key(self):
+        """
+        Returns the cache key marking that the index is being rebuilt.
+        """
+        return u"path_index.rebuild.{}".format(self.course_key)
+
+    @staticmethod
+    def _encode_entry_cache_key(version, usage_key):
+        """
+        Returns the cache key of the entry of the block with the given
+        usage key in the given version of the index.
+        """
+        return u"path_index.{}.{}.{}".format(version, usage_key.block_type, usage_key.block_id)
@@ -5,7 +5,7 @@ from django.dispatch.dispatcher import receiver
 
 from xmodule.modulestore.django import SignalHandler
 
-from .api import clear_course_from_cache
+from .api import clear_course_from_cache, clear_course_path_index, is_incremental_collect_enabled
 from .tasks import update_course_in_cache
 
 
@@ -14,8 +14,20 @@ def _listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable
     """
     Catches the signal that a course has been published in the module
     store and creates/updates the corresponding cache entry.
+
+    Clearing the cache entry also evicts the structure from this
+    process's local cache; other processes detect the new version
+    when the entry is recreated.
+
+    When incremental collection is enabled, the cache entry is kept
+    until it is updated, since the update reuses its data.
+
+    The index of the paths to the course's blocks is always cleared,
+    since paths found in it must be those of the published course.
     """
-    clear_course_from_cache(course_key)
+    if not is_incremental_collect_enabled():
+        clear_course_from_cache(course_key)
+    clear_course_path_index(course_key)
 
     # The countdown=0 kwarg ensures the call occurs after the signal emitter
     # has finished all operations.
@@ -30,3 +42,4 @@ def _listen_for_course_delete(sender, course_key, **kwargs):  # pylint: disable=
     exists.
     """
     clear_course_from_cache(course_key)
+    clear_course_path_index(course_key)
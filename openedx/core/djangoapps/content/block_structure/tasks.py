@@ -13,7 +13,18 @@ log = logging.getLogger('edx.celery.task')
 @task
 def update_course_in_cache(course_key):
     """
-    Updates the course blocks (in the database) for the specified course.
+    Updates the course blocks (in the database) for the specified course,
+    and the index of the paths to them if it's enabled.
     """
     course_key = CourseKey.from_string(course_key)
     api.update_course_in_cache(course_key)
+    if api.is_path_index_enabled():
+        api.update_course_path_index(course_key)
+
+
+@task
+def update_course_path_index(course_key):
+    """
+    Rebuilds the index of the paths to the blocks of the specified course.
+    """
+    api.update_course_path_index(CourseKey.from_string(course_key))
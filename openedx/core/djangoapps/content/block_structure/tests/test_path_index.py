@@ -0,0 +1,71 @@
+"""
+Unit tests for the persisted index of the paths to course blocks
+"""
+from django.test.utils import override_settings
+
+from xmodule.modulestore.search import build_path_index, path_to_location
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory, check_mongo_calls
+
+from ..api import get_cache, get_course_path_index
+from ..path_index import CoursePathIndex
+
+
+class CoursePathIndexTest(ModuleStoreTestCase):
+    """
+    Tests for CoursePathIndex
+    """
+    def setUp(self):
+        super(CoursePathIndexTest, self).setUp()
+        self.course = CourseFactory.create()
+        self.chapter = ItemFactory.create(parent=self.course, category='chapter')
+        self.sequential = ItemFactory.create(parent=self.chapter, category='sequential')
+        ItemFactory.create(parent=self.sequential, category='vertical')
+        self.vertical = ItemFactory.create(parent=self.sequential, category='vertical')
+        self.problem = ItemFactory.create(parent=self.vertical, category='problem')
+        self.path_index = CoursePathIndex(self.course.id, get_cache())
+
+    def test_update(self):
+        self.assertIsNone(self.path_index.get(self.problem.location))
+
+        self.path_index.update(self.store)
+        expected_index = build_path_index(self.store, self.course.id)
+        path_index = CoursePathIndex(self.course.id, get_cache())
+        for block in (self.course, self.chapter, self.sequential, self.vertical, self.problem):
+            self.assertEqual(path_index.get(block.location), expected_index[block.location])
+        self.assertEqual(path_index.get(self.problem.location)[1], '2')
+
+    def test_path_to_location(self):
+        expected = path_to_location(self.store, self.problem.location)
+        self.path_index.update(self.store)
+        with check_mongo_calls(0):
+            self.assertEqual(path_to_location(self.store, self.problem.location, path_index=self.path_index), expected)
+
+    def test_clear(self):
+        self.path_index.update(self.store)
+        CoursePathIndex(self.course.id, get_cache()).clear()
+        self.assertIsNone(CoursePathIndex(self.course.id, get_cache()).get(self.problem.location))
+
+    def test_cleared_on_publish(self):
+        self.path_index.update(self.store)
+        self.store.publish(self.problem.location, self.user.id)
+        self.assertIsNone(CoursePathIndex(self.course.id, get_cache()).get(self.problem.location))
+
+    @override_settings(BLOCK_STRUCTURE_PATH_INDEX=True)
+    def test_updated_on_publish(self):
+        self.store.publish(self.problem.location, self.user.id)
+        self.assertEqual(
+            get_course_path_index(self.course.id).get(self.problem.location),
+            build_path_index(self.store, self.course.id)[self.problem.location],
+        )
+
+    @override_settings(BLOCK_STRUCTURE_PATH_INDEX=True)
+    def test_rebuilt_when_missing(self):
+        self.assertIsNone(get_course_path_index(self.course.id).get(self.problem.location))
+        self.assertEqual(
+            get_course_path_index(self.course.id).get(self.problem.location),
+            build_path_index(self.store, self.course.id)[self.problem.location],
+        )
+
+    def test_disabled(self):
+        self.assertIsNone(get_course_path_index(self.course.id))
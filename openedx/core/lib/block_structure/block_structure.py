@@ -7,7 +7,13 @@ Module with family of classes for block structures.
 The following internal data structures are implemented:
     _BlockRelations - Data structure for a single block's relations.
     _BlockData - Data structure for a single block's data.
+    _CompactBlockRelations - Read-only data structure for all blocks'
+        relations, with usage keys interned into integer indices.
+    _CompactBlockDataMap - Read-only data structure for all blocks'
+        data, stored in per-field columns.
 """
+from array import array
+from copy import deepcopy
 from functools import partial
 from logging import getLogger
 
@@ -22,6 +28,10 @@ logger = getLogger(__name__)  # pylint: disable=invalid-name
 # A dictionary key value for storing a transformer's version number.
 TRANSFORMER_VERSION_KEY = '_version'
 
+# The name of the xBlock field that is collected for every block in
+# order to detect which blocks changed since a previous collection.
+EDITED_ON_XBLOCK_FIELD = 'edited_on'
+
 
 class _BlockRelations(object):
     """
@@ -39,6 +49,99 @@ class _BlockRelations(object):
         self.children = []
 
 
+class _CompactBlockRelations(object):
+    """
+    Read-only data structure to encapsulate the relationships of all
+    blocks in a block structure.  Usage keys are interned into integer
+    indices and each block's parents and children are stored as slices
+    of integer arrays, in compressed sparse row form.
+    """
+    # Typecode of the arrays storing offsets and indices.
+    TYPECODE = 'i'
+
+    def __init__(self, block_relations):
+        """
+        Arguments:
+            block_relations (dict({UsageKey: _BlockRelations})) -
+                Map of a block's usage key to its relations.
+        """
+        # List of usage keys of all blocks, by index.
+        # list [UsageKey]
+        self.keys = list(block_relations)
+
+        # Map of a block's usage key to its index.
+        # dict {UsageKey: int}
+        self.index = {usage_key: index for index, usage_key in enumerate(self.keys)}
+
+        # The parents of the block at index i are the indices in
+        # parents[parent_offsets[i]:parent_offsets[i + 1]]; and
+        # similarly for children.
+        self.parent_offsets, self.parents = self._to_csr(block_relations, 'parents')
+        self.child_offsets, self.children = self._to_csr(block_relations, 'children')
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, usage_key):
+        return usage_key in self.index
+
+    def get_parents(self, index):
+        """
+        Returns the indices of the parents of the block at the given
+        index.
+        """
+        return self.parents[self.parent_offsets[index]:self.parent_offsets[index + 1]]
+
+    def get_children(self, index):
+        """
+        Returns the indices of the children of the block at the given
+        index.
+        """
+        return self.children[self.child_offsets[index]:self.child_offsets[index + 1]]
+
+    def expand(self):
+        """
+        Returns the relations as a map of a block's usage key to its
+        _BlockRelations.
+        """
+        block_relations = {}
+        for index, usage_key in enumerate(self.keys):
+            relations = _BlockRelations()
+            relations.parents = [self.keys[parent] for parent in self.get_parents(index)]
+            relations.children = [self.keys[child] for child in self.get_children(index)]
+            block_relations[usage_key] = relations
+        return block_relations
+
+    def __getstate__(self):
+        return (
+            self.keys,
+            self.parent_offsets.tostring(),
+            self.parents.tostring(),
+            self.child_offsets.tostring(),
+            self.children.tostring(),
+        )
+
+    def __setstate__(self, state):
+        self.keys = state[0]
+        self.index = {usage_key: index for index, usage_key in enumerate(self.keys)}
+        self.parent_offsets, self.parents, self.child_offsets, self.children = [
+            array(self.TYPECODE, data) for data in state[1:]
+        ]
+
+    def _to_csr(self, block_relations, relation_name):
+        """
+        Returns the offsets and indices arrays for the given relation
+        ('parents' or 'children') of all blocks.
+        """
+        offsets = array(self.TYPECODE, [0])
+        indices = array(self.TYPECODE)
+        for usage_key in self.keys:
+            related_keys = getattr(block_relations[usage_key], relation_name)
+            indices.extend(self.index[related_key] for related_key in related_keys)
+            offsets.append(len(indices))
+        return offsets, indices
+
+
 class BlockStructure(object):
     """
     Base class for a block structure.  BlockStructures are constructed
@@ -57,7 +160,8 @@ class BlockStructure(object):
 
         # Map of a block's usage key to its block relations. The
         # existence of a block in the structure is determined by its
-        # presence in this map.
+        # presence in this map.  While the structure is compact, this
+        # is a _CompactBlockRelations instead.
         # dict {UsageKey: _BlockRelations}
         self._block_relations = {}
 
@@ -90,7 +194,12 @@ class BlockStructure(object):
         Returns:
             [UsageKey] - A list of usage keys of the block's parents.
         """
-        return self._block_relations[usage_key].parents if usage_key in self else []
+        if usage_key not in self:
+            return []
+        if self.is_compact:
+            relations = self._block_relations
+            return [relations.keys[parent] for parent in relations.get_parents(relations.index[usage_key])]
+        return self._block_relations[usage_key].parents
 
     def get_children(self, usage_key):
         """
@@ -104,7 +213,12 @@ class BlockStructure(object):
         Returns:
             [UsageKey] - A list of usage keys of the block's children.
         """
-        return self._block_relations[usage_key].children if usage_key in self else []
+        if usage_key not in self:
+            return []
+        if self.is_compact:
+            relations = self._block_relations
+            return [relations.keys[child] for child in relations.get_children(relations.index[usage_key])]
+        return self._block_relations[usage_key].children
 
     def set_root_block(self, usage_key):
         """
@@ -118,6 +232,7 @@ class BlockStructure(object):
             usage_key - The usage key of the block that is to be set as the
                 new root of the block structure.
         """
+        self._expand()
         self.root_block_usage_key = usage_key
         self._block_relations[usage_key].parents = []
 
@@ -144,8 +259,18 @@ class BlockStructure(object):
             iterator(UsageKey) - An iterator of the usage
             keys of all the blocks in the block structure.
         """
+        if self.is_compact:
+            return iter(self._block_relations.keys)
         return self._block_relations.iterkeys()
 
+    @property
+    def is_compact(self):
+        """
+        Returns whether the block structure is currently stored in its
+        compact form.
+        """
+        return isinstance(self._block_relations, _CompactBlockRelations)
+
     #--- Block structure traversal methods ---#
 
     def topological_traversal(
@@ -166,6 +291,15 @@ class BlockStructure(object):
             generator - A generator object created from the
                 traverse_topologically method.
         """
+        if self.is_compact:
+            relations = self._block_relations
+            return self._keys_from_indices(traverse_topologically(
+                start_node=relations.index[start_node or self.root_block_usage_key],
+                get_parents=relations.get_parents,
+                get_children=relations.get_children,
+                filter_func=self._filter_func_for_indices(filter_func),
+                yield_descendants_of_unyielded=yield_descendants_of_unyielded,
+            ))
         return traverse_topologically(
             start_node=start_node or self.root_block_usage_key,
             get_parents=self.get_parents,
@@ -191,6 +325,13 @@ class BlockStructure(object):
             generator - A generator object created from the
                 traverse_post_order method.
         """
+        if self.is_compact:
+            relations = self._block_relations
+            return self._keys_from_indices(traverse_post_order(
+                start_node=relations.index[start_node or self.root_block_usage_key],
+                get_children=relations.get_children,
+                filter_func=self._filter_func_for_indices(filter_func),
+            ))
         return traverse_post_order(
             start_node=start_node or self.root_block_usage_key,
             get_children=self.get_children,
@@ -200,10 +341,49 @@ class BlockStructure(object):
     #--- Internal methods ---#
     # To be used within the block_structure framework or by tests.
 
+    def _compact(self):
+        """
+        Converts the block structure into its compact form, in which
+        usage keys are interned into integer indices.  The compact form
+        uses less memory and is smaller when pickled.  It is read-only,
+        so the block structure is converted back into its regular form
+        when it is next modified.
+        """
+        if not self.is_compact:
+            self._block_relations = _CompactBlockRelations(self._block_relations)
+
+    def _expand(self):
+        """
+        Converts the block structure from its compact form back into
+        its regular, mutable, form.
+        """
+        if self.is_compact:
+            self._block_relations = self._block_relations.expand()
+
+    def _keys_from_indices(self, indices):
+        """
+        Generator that maps the given block indices of the compact
+        block relations to their usage keys.
+        """
+        keys = self._block_relations.keys
+        for index in indices:
+            yield keys[index]
+
+    def _filter_func_for_indices(self, filter_func):
+        """
+        Returns a filter function on block indices of the compact block
+        relations for the given filter function on usage keys.
+        """
+        if filter_func is None:
+            return None
+        keys = self._block_relations.keys
+        return lambda index: filter_func(keys[index])
+
     def _prune_unreachable(self):
         """
         Mutates this block structure by removing any unreachable blocks.
         """
+        self._expand()
 
         # Create a new block relations map to store only those blocks
         # that are still linked
@@ -236,6 +416,7 @@ class BlockStructure(object):
             parent_key (UsageKey) - Usage key of the parent block.
             child_key (UsageKey) - Usage key of the child block.
         """
+        self._expand()
         self._add_to_relations(self._block_relations, parent_key, child_key)
 
     @staticmethod
@@ -359,7 +540,8 @@ class TransformerDataMap(dict):
             self[key] = new_transformer_data
             return new_transformer_data
 
-    def _translate_key(self, key):
+    @staticmethod
+    def _translate_key(key):
         """
         Allows the given key to be either the transformer's class or name,
         always returning the transformer's name.  This allows
@@ -391,6 +573,122 @@ class BlockData(FieldData):
         self.transformer_data = TransformerDataMap()
 
 
+class _Missing(object):
+    """
+    Marker for the absence of a value in a column of a
+    _CompactBlockDataMap.  The class itself is used as the marker so
+    its identity is preserved across pickling.
+    """
+    pass
+
+
+class _CompactBlockDataMap(object):
+    """
+    Read-only data structure to encapsulate the collected data of all
+    blocks in a block structure.  Instead of a BlockData object per
+    block, the value of each field is stored in a column that is
+    indexed by the blocks' indices in the _CompactBlockRelations.
+    """
+    def __init__(self, block_data_map, index):
+        """
+        Arguments:
+            block_data_map (dict({UsageKey: BlockData})) - Map of a
+                block's usage key to its collected data.
+
+            index (dict({UsageKey: int})) - Map of a block's usage key
+                to its index.  Must contain all keys of block_data_map.
+        """
+        num_blocks = len(index)
+
+        # Whether each block has collected data.
+        # array [int]
+        self.has_data = array('b', [0] * num_blocks)
+
+        # Map of an xBlock field name to its column of values.
+        # dict {string: [any picklable type]}
+        self.xblock_fields = {}
+
+        # Map of a transformer's name to its map of a field name to
+        # the field's column of values.
+        # dict {string: {string: [any picklable type]}}
+        self.transformer_fields = {}
+
+        def _set_column_value(columns, field_name, block_index, value):
+            """
+            Sets the value for the given block in the given field's
+            column, creating the column if needed.
+            """
+            if field_name not in columns:
+                columns[field_name] = [_Missing] * num_blocks
+            columns[field_name][block_index] = value
+
+        for usage_key, block_data in block_data_map.iteritems():
+            block_index = index[usage_key]
+            self.has_data[block_index] = 1
+            for field_name, value in block_data.fields.iteritems():
+                _set_column_value(self.xblock_fields, field_name, block_index, value)
+            for transformer_name, transformer_data in block_data.transformer_data.iteritems():
+                columns = self.transformer_fields.setdefault(transformer_name, {})
+                for field_name, value in transformer_data.fields.iteritems():
+                    _set_column_value(columns, field_name, block_index, value)
+
+    def get_xblock_field(self, block_index, field_name, default=None):
+        """
+        Returns the value of the given xBlock field for the block at the
+        given index; returns default if not found.
+        """
+        column = self.xblock_fields.get(field_name)
+        if column is None:
+            return default
+        value = column[block_index]
+        return default if value is _Missing else value
+
+    def get_transformer_block_field(self, block_index, transformer, field_name, default=None):
+        """
+        Returns the value of the given field of the given transformer
+        for the block at the given index; returns default if not found.
+        """
+        columns = self.transformer_fields.get(TransformerDataMap._translate_key(transformer))
+        if columns is None or field_name not in columns:
+            return default
+        value = columns[field_name][block_index]
+        return default if value is _Missing else value
+
+    def expand(self, keys):
+        """
+        Returns the collected data as a map of a block's usage key to
+        its BlockData.
+
+        Arguments:
+            keys ([UsageKey]) - The usage keys of the blocks, by index.
+        """
+        block_data_map = {}
+        for block_index, usage_key in enumerate(keys):
+            if self.has_data[block_index]:
+                block_data_map[usage_key] = BlockData(usage_key)
+
+        for field_name, column in self.xblock_fields.iteritems():
+            for block_index, value in enumerate(column):
+                if value is not _Missing:
+                    block_data_map[keys[block_index]].fields[field_name] = value
+
+        for transformer_name, columns in self.transformer_fields.iteritems():
+            for field_name, column in columns.iteritems():
+                for block_index, value in enumerate(column):
+                    if value is not _Missing:
+                        block_data = block_data_map[keys[block_index]]
+                        block_data.transformer_data.get_or_create(transformer_name).fields[field_name] = value
+
+        return block_data_map
+
+    def __getstate__(self):
+        return (self.has_data.tostring(), self.xblock_fields, self.transformer_fields)
+
+    def __setstate__(self, state):
+        self.has_data = array('b', state[0])
+        self.xblock_fields, self.transformer_fields = state[1:]
+
+
 class BlockStructureBlockData(BlockStructure):
     """
     Subclass of BlockStructure that is responsible for managing block
@@ -406,18 +704,41 @@ class BlockStructureBlockData(BlockStructure):
         super(BlockStructureBlockData, self).__init__(root_block_usage_key)
 
         # Map of a block's usage key to its collected data, including
-        # its xBlock fields and block-specific transformer data.
+        # its xBlock fields and block-specific transformer data.  While
+        # the structure is compact, this is a _CompactBlockDataMap
+        # instead.
         # dict {UsageKey: BlockData}
         self._block_data_map = {}
 
         # Map of a transformer's name to its non-block-specific data.
         self.transformer_data = TransformerDataMap()
 
+    def copy(self):
+        """
+        Returns a copy of this block structure that can be modified,
+        for example transformed, without affecting this block
+        structure.
+
+        Copying a block structure in its compact form is cheap since
+        its read-only relations and block data are shared with the
+        copy.
+        """
+        block_structure = self.__class__(self.root_block_usage_key)
+        if self.is_compact:
+            block_structure._block_relations = self._block_relations
+            block_structure._block_data_map = self._block_data_map
+        else:
+            block_structure._block_relations = deepcopy(self._block_relations)
+            block_structure._block_data_map = deepcopy(self._block_data_map)
+        block_structure.transformer_data = deepcopy(self.transformer_data)
+        return block_structure
+
     def iteritems(self):
         """
         Returns iterator of (UsageKey, BlockData) pairs for all
         blocks in the BlockStructure.
         """
+        self._expand()
         return self._block_data_map.iteritems()
 
     def itervalues(self):
@@ -425,12 +746,14 @@ class BlockStructureBlockData(BlockStructure):
         Returns iterator of BlockData for all blocks in the
         BlockStructure.
         """
+        self._expand()
         return self._block_data_map.itervalues()
 
     def __getitem__(self, usage_key):
         """
         Returns the BlockData associated with the given key.
         """
+        self._expand()
         return self._block_data_map.get(usage_key)
 
     def get_xblock_field(self, usage_key, field_name, default=None):
@@ -449,6 +772,11 @@ class BlockStructureBlockData(BlockStructure):
             default (any type) - The value to return if a field value is
                 not found.
         """
+        if self.is_compact:
+            block_index = self._block_relations.index.get(usage_key)
+            if block_index is None:
+                return default
+            return self._block_data_map.get_xblock_field(block_index, field_name, default)
         block_data = self._block_data_map.get(usage_key)
         return getattr(block_data, field_name, default) if block_data else default
 
@@ -499,6 +827,7 @@ class BlockStructureBlockData(BlockStructure):
             transformer (BlockStructureTransformer) - The transformer
                 whose dictionary data is requested.
         """
+        self._expand()
         return self._block_data_map[usage_key].transformer_data[transformer]
 
     def get_transformer_block_field(self, usage_key, transformer, key, default=None):
@@ -520,6 +849,11 @@ class BlockStructureBlockData(BlockStructure):
             default (any type) - The value to return if a dictionary
                 entry is not found.
         """
+        if self.is_compact:
+            block_index = self._block_relations.index.get(usage_key)
+            if block_index is None:
+                return default
+            return self._block_data_map.get_transformer_block_field(block_index, transformer, key, default)
         try:
             transformer_data = self.get_transformer_block_data(usage_key, transformer)
         except KeyError:
@@ -544,6 +878,7 @@ class BlockStructureBlockData(BlockStructure):
                 given key for the given transformer's data for the
                 requested block.
         """
+        self._expand()
         setattr(
             self._get_or_create_block(usage_key).transformer_data.get_or_create(transformer),
             key,
@@ -562,6 +897,7 @@ class BlockStructureBlockData(BlockStructure):
             transformer (BlockStructureTransformer) - The transformer
                 whose data entry is to be deleted.
         """
+        self._expand()
         try:
             transformer_block_data = self.get_transformer_block_data(usage_key, transformer)
             delattr(transformer_block_data, key)
@@ -588,6 +924,7 @@ class BlockStructureBlockData(BlockStructure):
                 removed block's children become children of the
                 removed block's parents.
         """
+        self._expand()
         children = self._block_relations[usage_key].children
         parents = self._block_relations[usage_key].parents
 
@@ -694,12 +1031,52 @@ class BlockStructureBlockData(BlockStructure):
         # descendants that are unyielded.  However, note that the
         # optimization is not currently present because of DAGs,
         # but it will be as soon as we remove support for DAGs.
+        #
+        # Filters may remove blocks, which converts the block structure
+        # from its compact form, so it's converted before the traversal
+        # starts: a traversal of the compact form wouldn't see the
+        # relations changed by a removal.
+        self._expand()
         for _ in self.topological_traversal(filter_func=filter_func, **kwargs):
             pass
 
     #--- Internal methods ---#
     # To be used within the block_structure framework or by tests.
 
+    def _compact(self):
+        """
+        Converts the block structure, including its collected block
+        data, into its compact form.  See BlockStructure._compact.
+
+        Note: The block structure is left in its regular form if it
+        has data for blocks that are not in the structure.
+        """
+        self._block_relations, self._block_data_map = self._compact_form()
+
+    def _compact_form(self):
+        """
+        Returns the block relations and block data map of the block
+        structure in their compact form, without converting the block
+        structure itself.  They're returned in their current form if
+        the block structure is already compact, or can't be compacted.
+        See _compact.
+        """
+        if self.is_compact:
+            return self._block_relations, self._block_data_map
+        if any(usage_key not in self._block_relations for usage_key in self._block_data_map):
+            return self._block_relations, self._block_data_map
+        block_relations = _CompactBlockRelations(self._block_relations)
+        return block_relations, _CompactBlockDataMap(self._block_data_map, block_relations.index)
+
+    def _expand(self):
+        """
+        Converts the block structure, including its collected block
+        data, from its compact form back into its regular form.
+        """
+        if self.is_compact:
+            self._block_data_map = self._block_data_map.expand(self._block_relations.keys)
+            super(BlockStructureBlockData, self)._expand()
+
     def _get_transformer_data_version(self, transformer):
         """
         Returns the version number stored for the given transformer.
@@ -726,6 +1103,7 @@ class BlockStructureBlockData(BlockStructure):
         If not found, creates and returns a new BlockData and
         maps it to the given key.
         """
+        self._expand()
         try:
             return self._block_data_map[usage_key]
         except KeyError:
@@ -800,12 +1178,18 @@ class BlockStructureModulestoreData(BlockStructureBlockData):
         """
         self._xblock_map[usage_key] = xblock
 
-    def _collect_requested_xblock_fields(self):
+    def _collect_requested_xblock_fields(self, block_keys=None):
         """
         Iterates through all instantiated xBlocks that were added and
         collects all xBlock fields that were requested.
+
+        Arguments:
+            block_keys (set(UsageKey)) - If given, fields are collected
+                only for the blocks with these usage keys.
         """
         for xblock_usage_key, xblock in self._xblock_map.iteritems():
+            if block_keys is not None and xblock_usage_key not in block_keys:
+                continue
             block_data = self._get_or_create_block(xblock_usage_key)
             for field_name in self._requested_xblock_fields:
                 self._set_xblock_field(block_data, xblock, field_name)
@@ -828,3 +1212,71 @@ class BlockStructureModulestoreData(BlockStructureBlockData):
         """
         if hasattr(xblock, field_name):
             setattr(block_data, field_name, getattr(xblock, field_name))
+
+    def _get_affected_blocks(self, collected_block_structure):
+        """
+        Returns the usage keys of the blocks in this block structure
+        whose collected data may differ from the data in the given,
+        previously collected, block structure.
+
+        A block is changed if it is new, if its edit time differs or
+        if its parents or children differ.  The affected blocks are
+        the changed blocks, their descendants, since these may inherit
+        changed field values, and the ancestors of all of these.
+
+        Returns None if the changed blocks cannot be determined since
+        an xBlock does not provide its edit time.
+
+        Arguments:
+            collected_block_structure (BlockStructureBlockData) - A
+                previously collected block structure for the same root
+                block.
+        """
+        changed_block_keys = set()
+        for block_key in self:
+            edited_on = getattr(self._xblock_map.get(block_key), EDITED_ON_XBLOCK_FIELD, None)
+            if edited_on is None:
+                return None
+            if (
+                    block_key not in collected_block_structure or
+                    collected_block_structure.get_xblock_field(block_key, EDITED_ON_XBLOCK_FIELD) != edited_on or
+                    collected_block_structure.get_children(block_key) != self.get_children(block_key) or
+                    set(collected_block_structure.get_parents(block_key)) != set(self.get_parents(block_key))
+            ):
+                changed_block_keys.add(block_key)
+
+        affected_block_keys = set()
+        for block_key in changed_block_keys:
+            if block_key not in affected_block_keys:
+                affected_block_keys.update(self.post_order_traversal(start_node=block_key))
+
+        ancestors_to_visit = list(affected_block_keys)
+        while ancestors_to_visit:
+            for parent_key in self.get_parents(ancestors_to_visit.pop()):
+                if parent_key not in affected_block_keys:
+                    affected_block_keys.add(parent_key)
+                    ancestors_to_visit.append(parent_key)
+
+        return affected_block_keys
+
+    def _copy_collected_data(self, collected_block_structure, excluded_block_keys):
+        """
+        Copies the collected block and transformer data from the given,
+        previously collected, block structure into this block structure
+        for all blocks that are in this structure and are not excluded.
+
+        Arguments:
+            collected_block_structure (BlockStructureBlockData) - A
+                previously collected block structure for the same root
+                block.
+
+            excluded_block_keys (set(UsageKey)) - Usage keys of blocks
+                whose data is not to be copied.
+        """
+        self.transformer_data = collected_block_structure.transformer_data
+        for block_key in self:
+            if block_key in excluded_block_keys:
+                continue
+            block_data = collected_block_structure[block_key]
+            if block_data is not None:
+                self._block_data_map[block_key] = block_data
@@ -2,9 +2,14 @@
 Module for the Cache class for BlockStructure objects.
 """
 # pylint: disable=protected-access
+from collections import OrderedDict
+import cPickle as pickle
+from hashlib import md5
 from logging import getLogger
+from threading import RLock
+import zlib
 
-from openedx.core.lib.cache_utils import zpickle, zunpickle
+from openedx.core.lib.cache_utils import zunpickle
 
 from .block_structure import BlockStructureModulestoreData, BlockStructureBlockData
 
@@ -12,18 +17,125 @@ from .block_structure import BlockStructureModulestoreData, BlockStructureBlockD
 logger = getLogger(__name__)  # pylint: disable=C0103
 
 
+class BlockStructureLocalCache(object):
+    """
+    Process-wide LRU cache of uncompressed, pickled block structure
+    data, used as a tier in front of the shared (memcached) cache.
+
+    Entries are keyed by the root block usage key together with the
+    digest of the compressed data stored in the shared cache, so an
+    entry can only be served while the shared cache still holds the
+    same version of the structure.  Pickled bytes (and not
+    BlockStructure objects) are stored since transformers mutate the
+    structures they are given.
+
+    The cache is bounded by the total number of bytes stored in it;
+    least recently used entries are evicted first.
+    """
+    def __init__(self, max_size):
+        """
+        Arguments:
+            max_size (int) - The maximum total size, in bytes, of the
+                data stored in this cache.
+        """
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # Map of (root_block_usage_key, version) to pickled data,
+        # ordered from least to most recently used.
+        # OrderedDict {(UsageKey, string): string}
+        self._entries = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, root_block_usage_key, version):
+        """
+        Returns the pickled data stored for the given root block usage
+        key and version, or None if not found.
+        """
+        key = (root_block_usage_key, version)
+        with self._lock:
+            data = self._entries.pop(key, None)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries[key] = data
+            self.hits += 1
+            return data
+
+    def set(self, root_block_usage_key, version, data):
+        """
+        Stores the given pickled data for the given root block usage
+        key and version, replacing any other version stored for the
+        same root block usage key.  Data larger than max_size is not
+        stored.
+        """
+        with self._lock:
+            self._delete(root_block_usage_key)
+            if len(data) > self.max_size:
+                return
+            self._entries[(root_block_usage_key, version)] = data
+            self.size += len(data)
+            while self.size > self.max_size:
+                _, evicted_data = self._entries.popitem(last=False)
+                self.size -= len(evicted_data)
+                self.evictions += 1
+
+    def delete(self, root_block_usage_key):
+        """
+        Removes all versions stored for the given root block usage key.
+        """
+        with self._lock:
+            self._delete(root_block_usage_key)
+
+    def clear(self):
+        """
+        Removes all entries from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _delete(self, root_block_usage_key):
+        """
+        Removes all versions stored for the given root block usage key.
+        The caller must hold the lock.
+        """
+        for key in [key for key in self._entries if key[0] == root_block_usage_key]:
+            self.size -= len(self._entries.pop(key))
+
+
 class BlockStructureCache(object):
     """
     Cache for BlockStructure objects.
     """
-    def __init__(self, cache):
+    # The timeout value for the cache is 1 day as a fail-safe in
+    # case the signal to invalidate the cache doesn't come through.
+    TIMEOUT = 60 * 60 * 24
+
+    def __init__(self, cache, local_cache=None, compact=False):
         """
         Arguments:
             cache (django.core.cache.backends.base.BaseCache) - The
                 cache into which cacheable data of the block structure
                 is to be serialized.
+
+            local_cache (BlockStructureLocalCache) - An optional
+                in-process cache that is checked before the given
+                cache, avoiding the network round trip and the
+                decompression of the data.
+
+            compact (bool) - Whether block structures are converted
+                into their compact form before they are serialized.
         """
         self._cache = cache
+        self._local_cache = local_cache
+        self._compact = compact
 
     def add(self, block_structure):
         """
@@ -38,22 +150,34 @@ class BlockStructureCache(object):
             block_structure (BlockStructure) - The block structure
                 that is to be serialized to the given cache.
         """
+        if self._compact:
+            # The given block structure is left in its current form.
+            block_relations, block_data_map = block_structure._compact_form()
+        else:
+            block_relations, block_data_map = block_structure._block_relations, block_structure._block_data_map
         data_to_cache = (
-            block_structure._block_relations,
+            block_relations,
             block_structure.transformer_data,
-            block_structure._block_data_map,
+            block_data_map,
         )
-        zp_data_to_cache = zpickle(data_to_cache)
+        p_data_to_cache = pickle.dumps(data_to_cache, pickle.HIGHEST_PROTOCOL)
+        zp_data_to_cache = zlib.compress(p_data_to_cache)
 
-        # Set the timeout value for the cache to 1 day as a fail-safe
-        # in case the signal to invalidate the cache doesn't come through.
-        timeout_in_seconds = 60 * 60 * 24
         self._cache.set(
             self._encode_root_cache_key(block_structure.root_block_usage_key),
             zp_data_to_cache,
-            timeout=timeout_in_seconds,
+            timeout=self.TIMEOUT,
         )
 
+        if self._local_cache is not None:
+            version = self._get_version(zp_data_to_cache)
+            self._cache.set(
+                self._encode_version_cache_key(block_structure.root_block_usage_key),
+                version,
+                timeout=self.TIMEOUT,
+            )
+            self._local_cache.set(block_structure.root_block_usage_key, version, p_data_to_cache)
+
         logger.info(
             "Wrote BlockStructure %s to cache, size: %s",
             block_structure.root_block_usage_key,
@@ -79,6 +203,14 @@ class BlockStructureCache(object):
 
             NoneType - If the root_block_usage_key is not found in the cache.
         """
+        p_data_from_cache = self._get_from_local_cache(root_block_usage_key)
+        if p_data_from_cache is not None:
+            logger.debug(
+                "Read BlockStructure %r from local cache, size: %s",
+                root_block_usage_key,
+                len(p_data_from_cache),
+            )
+            return self._deserialize(root_block_usage_key, pickle.loads(p_data_from_cache))
 
         # Find root_block_usage_key in the cache.
         zp_data_from_cache = self._cache.get(self._encode_root_cache_key(root_block_usage_key))
@@ -95,14 +227,16 @@ class BlockStructureCache(object):
                 len(zp_data_from_cache),
             )
 
-        # Deserialize and construct the block structure.
-        block_relations, transformer_data, block_data_map = zunpickle(zp_data_from_cache)
-        block_structure = BlockStructureModulestoreData(root_block_usage_key)
-        block_structure._block_relations = block_relations
-        block_structure.transformer_data = transformer_data
-        block_structure._block_data_map = block_data_map
+        if self._local_cache is None:
+            return self._deserialize(root_block_usage_key, zunpickle(zp_data_from_cache))
 
-        return block_structure
+        p_data_from_cache = zlib.decompress(zp_data_from_cache)
+        version = self._get_version(zp_data_from_cache)
+        # The version is missing if the data was cached without one, or
+        # if it was evicted; without it, the local cache is never read.
+        self._cache.add(self._encode_version_cache_key(root_block_usage_key), version, timeout=self.TIMEOUT)
+        self._local_cache.set(root_block_usage_key, version, p_data_from_cache)
+        return self._deserialize(root_block_usage_key, pickle.loads(p_data_from_cache))
 
     def delete(self, root_block_usage_key):
         """
@@ -115,11 +249,41 @@ class BlockStructureCache(object):
                 the cache.
         """
         self._cache.delete(self._encode_root_cache_key(root_block_usage_key))
+        if self._local_cache is not None:
+            self._cache.delete(self._encode_version_cache_key(root_block_usage_key))
+            self._local_cache.delete(root_block_usage_key)
         logger.info(
             "Deleted BlockStructure %r from the cache.",
             root_block_usage_key,
         )
 
+    def _get_from_local_cache(self, root_block_usage_key):
+        """
+        Returns the pickled data for the given root_block_usage_key
+        from the local cache if it holds the version currently stored
+        in the shared cache; returns None otherwise.
+        """
+        if self._local_cache is None:
+            return None
+        version = self._cache.get(self._encode_version_cache_key(root_block_usage_key))
+        if not version:
+            return None
+        return self._local_cache.get(root_block_usage_key, version)
+
+    @staticmethod
+    def _deserialize(root_block_usage_key, data_from_cache):
+        """
+        Constructs and returns a block structure from the given
+        deserialized cache data.
+        """
+        block_relations, transformer_data, block_data_map = data_from_cache
+        block_structure = BlockStructureModulestoreData(root_block_usage_key)
+        block_structure._block_relations = block_relations
+        block_structure.transformer_data = transformer_data
+        block_structure._block_data_map = block_data_map
+
+        return block_structure
+
     @classmethod
     def _encode_root_cache_key(cls, root_block_usage_key):
         """
@@ -130,3 +294,22 @@ class BlockStructureCache(object):
             version=unicode(BlockStructureBlockData.VERSION),
             root_usage_key=unicode(root_block_usage_key),
         )
+
+    @classmethod
+    def _encode_version_cache_key(cls, root_block_usage_key):
+        """
+        Returns the cache key to use for storing the version of the
+        block structure for the given root_block_usage_key.
+        """
+        return "v{version}.root.version.{root_usage_key}".format(
+            version=unicode(BlockStructureBlockData.VERSION),
+            root_usage_key=unicode(root_block_usage_key),
+        )
+
+    @staticmethod
+    def _get_version(zp_data):
+        """
+        Returns the version identifier for the given compressed
+        block structure data.
+        """
+        return md5(zp_data).hexdigest()
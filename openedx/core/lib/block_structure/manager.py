@@ -15,7 +15,7 @@ class BlockStructureManager(object):
     Top-level class for managing Block Structures.
     """
 
-    def __init__(self, root_block_usage_key, modulestore, cache):
+    def __init__(self, root_block_usage_key, modulestore, cache, local_cache=None, compact=False):
         """
         Arguments:
             root_block_usage_key (UsageKey) - The usage_key for the root
@@ -28,12 +28,18 @@ class BlockStructureManager(object):
             cache (django.core.cache.backends.base.BaseCache) - The
                 cache to use for storing/retrieving the block structure's
                 collected data.
+
+            local_cache (BlockStructureLocalCache) - Optional in-process
+                cache to check before the given cache.
+
+            compact (bool) - Whether block structures are stored in
+                the cache in their compact form.
         """
         self.root_block_usage_key = root_block_usage_key
         self.modulestore = modulestore
-        self.block_structure_cache = BlockStructureCache(cache)
+        self.block_structure_cache = BlockStructureCache(cache, local_cache, compact)
 
-    def get_transformed(self, transformers, starting_block_usage_key=None):
+    def get_transformed(self, transformers, starting_block_usage_key=None, collected_block_structure=None):
         """
         Returns the transformed Block Structure for the root_block_usage_key,
         starting at starting_block_usage_key, getting block data from the cache
@@ -50,11 +56,21 @@ class BlockStructureManager(object):
                 in the block structure that is to be transformed.
                 If None, root_block_usage_key is used.
 
+            collected_block_structure (BlockStructureBlockData) - A
+                previously collected block structure, as returned by
+                get_collected, a copy of which is to be transformed.
+                Used when transforming the same structure for many
+                usages.  If None, the collected block structure is
+                retrieved from the cache.
+
         Returns:
             BlockStructureBlockData - A transformed block structure,
                 starting at starting_block_usage_key.
         """
-        block_structure = self.get_collected()
+        if collected_block_structure is not None:
+            block_structure = collected_block_structure.copy()
+        else:
+            block_structure = self.get_collected()
         if starting_block_usage_key:
             # Override the root_block_usage_key so traversals start at the
             # requested location.  The rest of the structure will be pruned
@@ -98,15 +114,34 @@ class BlockStructureManager(object):
                 self.block_structure_cache.add(block_structure)
         return block_structure
 
-    def update_collected(self):
+    def update_collected(self, incremental=False):
         """
         Updates the collected Block Structure for the root_block_usage_key.
 
         Details: The cache is cleared and updated by collecting transformers
         data from the modulestore.
+
+        Arguments:
+            incremental (bool) - If True and an up-to-date collected
+                block structure is found in the cache, its data is
+                reused for blocks that were not affected by changes
+                made since it was collected.  Transformers that support
+                incremental collection then collect data only for the
+                affected blocks.
         """
+        collected_block_structure = self._get_up_to_date_from_cache() if incremental else None
         self.clear()
-        self.get_collected()
+        with self._bulk_operations():
+            block_structure = BlockStructureFactory.create_from_modulestore(
+                self.root_block_usage_key,
+                self.modulestore
+            )
+            if not (
+                    collected_block_structure and
+                    BlockStructureTransformers.collect_incremental(block_structure, collected_block_structure)
+            ):
+                BlockStructureTransformers.collect(block_structure)
+            self.block_structure_cache.add(block_structure)
 
     def clear(self):
         """
@@ -115,6 +150,19 @@ class BlockStructureManager(object):
         """
         self.block_structure_cache.delete(self.root_block_usage_key)
 
+    def _get_up_to_date_from_cache(self):
+        """
+        Returns the collected block structure from the cache if it is
+        found and is not outdated; returns None otherwise.
+        """
+        block_structure = BlockStructureFactory.create_from_cache(
+            self.root_block_usage_key,
+            self.block_structure_cache
+        )
+        if block_structure is None or BlockStructureTransformers.is_collected_outdated(block_structure):
+            return None
+        return block_structure
+
     @contextmanager
     def _bulk_operations(self):
         """
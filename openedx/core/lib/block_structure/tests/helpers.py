@@ -95,6 +95,14 @@ class MockCache(object):
         self.map[key] = val
         self.timeout_from_last_call = timeout
 
+    def add(self, key, val, timeout):
+        """
+        Associates the given key with the given value in the cache,
+        unless the key is already in the cache.
+        """
+        if key not in self.map:
+            self.set(key, val, timeout)
+
     def get(self, key, default=None):
         """
         Returns the value associated with the given key in the cache;
@@ -106,7 +114,7 @@ class MockCache(object):
         """
         Deletes the given key from the cache.
         """
-        del self.map[key]
+        self.map.pop(key, None)
 
 
 class MockModulestoreFactory(object):
@@ -4,6 +4,7 @@ Tests for block_structure.py
 # pylint: disable=protected-access
 from collections import namedtuple
 from copy import deepcopy
+import cPickle as pickle
 import ddt
 import itertools
 from nose.plugins.attrib import attr
@@ -11,7 +12,7 @@ from unittest import TestCase
 
 from openedx.core.lib.graph_traversals import traverse_post_order
 
-from ..block_structure import BlockStructure, BlockStructureModulestoreData
+from ..block_structure import BlockStructure, BlockStructureBlockData, BlockStructureModulestoreData
 from ..exceptions import TransformerException
 from .helpers import MockXBlock, MockTransformer, ChildrenMapTestMixin
 
@@ -221,3 +222,140 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
         block_structure = self.create_block_structure(ChildrenMapTestMixin.LINEAR_CHILDREN_MAP)
         block_structure.remove_block_traversal(lambda block: block == 2)
         self.assert_block_structure(block_structure, [[1], [], [], []], missing_blocks=[2])
+
+
+@attr(shard=2)
+@ddt.ddt
+class TestCompactBlockStructure(TestCase, ChildrenMapTestMixin):
+    """
+    Tests for the compact form of BlockStructureBlockData
+    """
+    def create_compact_block_structure(self, children_map):
+        """
+        Creates a block structure for the given children_map, with
+        collected data, in its compact form.
+        """
+        block_structure = self.create_block_structure(children_map)
+        for block_key in range(len(children_map)):
+            block_structure._get_or_create_block(block_key).field1 = 'val{}'.format(block_key)
+            block_structure.set_transformer_block_field(block_key, MockTransformer, 'key1', block_key % 2 == 0)
+        block_structure._get_or_create_block(0).field2 = None
+        block_structure._compact()
+        self.assertTrue(block_structure.is_compact)
+        return block_structure
+
+    def assert_block_data(self, block_structure, children_map):
+        """
+        Verifies the collected data of a block structure created by
+        create_compact_block_structure.
+        """
+        for block_key in range(len(children_map)):
+            self.assertEquals(block_structure.get_xblock_field(block_key, 'field1'), 'val{}'.format(block_key))
+            self.assertEquals(
+                block_structure.get_transformer_block_field(block_key, MockTransformer, 'key1'),
+                block_key % 2 == 0,
+            )
+            self.assertEquals(
+                block_structure.get_transformer_block_field(block_key, MockTransformer, 'key2', 'default'),
+                'default',
+            )
+        self.assertIsNone(block_structure.get_xblock_field(0, 'field2', 'default'))
+        self.assertEquals(block_structure.get_xblock_field(1, 'field2', 'default'), 'default')
+        self.assertEquals(block_structure.get_xblock_field(100, 'field1', 'default'), 'default')
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_compact(self, children_map):
+        expanded_block_structure = self.create_block_structure(children_map)
+        block_structure = self.create_compact_block_structure(children_map)
+
+        self.assert_block_structure(block_structure, children_map)
+        self.assert_block_data(block_structure, children_map)
+        self.assertEquals(len(block_structure), len(children_map))
+        self.assertEquals(
+            list(block_structure.topological_traversal()),
+            list(expanded_block_structure.topological_traversal()),
+        )
+        self.assertEquals(
+            list(block_structure.post_order_traversal(filter_func=lambda block_key: block_key != 1)),
+            list(expanded_block_structure.post_order_traversal(filter_func=lambda block_key: block_key != 1)),
+        )
+        self.assertTrue(block_structure.is_compact)
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_pickle(self, children_map):
+        block_structure = self.create_compact_block_structure(children_map)
+        unpickled_block_structure = BlockStructureBlockData(root_block_usage_key=0)
+        unpickled_block_structure._block_relations, unpickled_block_structure._block_data_map = pickle.loads(
+            pickle.dumps((block_structure._block_relations, block_structure._block_data_map), pickle.HIGHEST_PROTOCOL)
+        )
+        self.assertTrue(unpickled_block_structure.is_compact)
+        self.assert_block_structure(unpickled_block_structure, children_map)
+        self.assert_block_data(unpickled_block_structure, children_map)
+
+    def test_pickled_size(self):
+        children_map = [[child for child in range(1, 100)]] + [[] for _ in range(1, 100)]
+        block_structure = self.create_compact_block_structure(children_map)
+        compact_size = len(pickle.dumps(
+            (block_structure._block_relations, block_structure._block_data_map), pickle.HIGHEST_PROTOCOL
+        ))
+        block_structure._expand()
+        expanded_size = len(pickle.dumps(
+            (block_structure._block_relations, block_structure._block_data_map), pickle.HIGHEST_PROTOCOL
+        ))
+        self.assertLess(compact_size, expanded_size)
+
+    def test_expand_on_modification(self):
+        children_map = ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP
+        block_structure = self.create_compact_block_structure(children_map)
+        block_structure.remove_block(1, keep_descendants=False)
+        self.assertFalse(block_structure.is_compact)
+        self.assert_block_structure(block_structure, [[2], [], [], [], []], missing_blocks=[1])
+        self.assertEquals(block_structure.get_xblock_field(3, 'field1'), 'val3')
+        self.assertEquals(block_structure[0].field2, None)
+
+    def test_remove_block_traversal_keep_descendants(self):
+        block_structure = self.create_compact_block_structure(ChildrenMapTestMixin.LINEAR_CHILDREN_MAP)
+        filtered_blocks = []
+
+        def removal_condition(block_key):
+            filtered_blocks.append(block_key)
+            return block_key == 1
+
+        block_structure.remove_block_traversal(removal_condition, keep_descendants=True)
+        self.assertEquals(filtered_blocks, [0, 1, 2, 3])
+        self.assert_block_structure(block_structure, [[2], [], [3], []], missing_blocks=[1])
+
+    def test_prune_compact(self):
+        block_structure = self.create_compact_block_structure(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        block_structure._prune_unreachable()
+        self.assert_block_structure(block_structure, ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        self.assert_block_data(block_structure, ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+
+    def test_data_for_blocks_not_in_structure(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        block_structure.set_transformer_block_field(100, MockTransformer, 'key1', 'val')
+        block_structure._compact()
+        self.assertFalse(block_structure.is_compact)
+
+    @ddt.data(True, False)
+    def test_copy(self, compact):
+        children_map = ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP
+        block_structure = self.create_compact_block_structure(children_map)
+        if not compact:
+            block_structure._expand()
+        block_structure_copy = block_structure.copy()
+        self.assertEquals(block_structure_copy.is_compact, compact)
+
+        block_structure_copy.remove_block(1, keep_descendants=False)
+        block_structure_copy.set_transformer_block_field(2, MockTransformer, 'key1', 'new_val')
+        self.assertFalse(block_structure_copy.is_compact)
+        self.assertEquals(block_structure_copy.get_transformer_block_field(2, MockTransformer, 'key1'), 'new_val')
+        self.assert_block_structure(block_structure, children_map)
+        self.assert_block_data(block_structure, children_map)
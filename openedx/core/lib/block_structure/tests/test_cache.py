@@ -4,7 +4,7 @@ Tests for block_structure/cache.py
 from nose.plugins.attrib import attr
 from unittest import TestCase
 
-from ..cache import BlockStructureCache
+from ..cache import BlockStructureCache, BlockStructureLocalCache
 from .helpers import ChildrenMapTestMixin, MockCache, MockTransformer
 
 
@@ -54,3 +54,133 @@ class TestBlockStructureCache(ChildrenMapTestMixin, TestCase):
         self.assertIsNone(
             self.block_structure_cache.get(self.block_structure.root_block_usage_key)
         )
+
+
+@attr(shard=2)
+class TestBlockStructureCacheWithLocalCache(TestBlockStructureCache):
+    """
+    Tests for BlockStructureCache with an in-process cache tier.
+    """
+    def setUp(self):
+        super(TestBlockStructureCacheWithLocalCache, self).setUp()
+        self.local_cache = BlockStructureLocalCache(max_size=10 * 1024 * 1024)
+        self.block_structure_cache = BlockStructureCache(self.mock_cache, self.local_cache)
+
+    def test_get_from_local_cache(self):
+        self.add_transformers()
+        self.block_structure_cache.add(self.block_structure)
+
+        # Remove the data from the shared cache, leaving only its version.
+        self.mock_cache.delete(self.block_structure_cache._encode_root_cache_key(0))  # pylint: disable=protected-access
+
+        cached_value = self.block_structure_cache.get(self.block_structure.root_block_usage_key)
+        self.assertIsNotNone(cached_value)
+        self.assert_block_structure(cached_value, self.children_map)
+        self.assertEquals(self.local_cache.hits, 1)
+
+    def test_get_without_version(self):
+        self.add_transformers()
+        self.block_structure_cache.add(self.block_structure)
+
+        # Simulate data cached without a version, or whose version was
+        # evicted, on a process with an empty local cache.
+        version_cache_key = self.block_structure_cache._encode_version_cache_key(0)  # pylint: disable=protected-access
+        self.mock_cache.delete(version_cache_key)
+        self.local_cache.delete(0)
+
+        self.block_structure_cache.get(self.block_structure.root_block_usage_key)
+        cached_value = self.block_structure_cache.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(cached_value, self.children_map)
+        self.assertEquals(self.local_cache.hits, 1)
+
+    def test_local_cache_returns_copies(self):
+        self.block_structure_cache.add(self.block_structure)
+        first_value = self.block_structure_cache.get(self.block_structure.root_block_usage_key)
+        first_value.remove_block(1, keep_descendants=False)
+
+        second_value = self.block_structure_cache.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(second_value, self.children_map)
+
+    def test_outdated_local_cache(self):
+        self.block_structure_cache.add(self.block_structure)
+
+        # Simulate another process updating the shared cache.
+        other_block_structure = self.create_block_structure(self.LINEAR_CHILDREN_MAP)
+        BlockStructureCache(self.mock_cache).add(other_block_structure)
+        self.mock_cache.set(
+            self.block_structure_cache._encode_version_cache_key(0),  # pylint: disable=protected-access
+            'new version',
+            timeout=0,
+        )
+
+        cached_value = self.block_structure_cache.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(cached_value, self.LINEAR_CHILDREN_MAP)
+
+    def test_delete_from_local_cache(self):
+        self.block_structure_cache.add(self.block_structure)
+        self.assertEquals(len(self.local_cache), 1)
+        self.block_structure_cache.delete(self.block_structure.root_block_usage_key)
+        self.assertEquals(len(self.local_cache), 0)
+
+
+@attr(shard=2)
+class TestBlockStructureLocalCache(TestCase):
+    """
+    Tests for BlockStructureLocalCache
+    """
+    def setUp(self):
+        super(TestBlockStructureLocalCache, self).setUp()
+        self.local_cache = BlockStructureLocalCache(max_size=10)
+
+    def test_get_and_set(self):
+        self.assertIsNone(self.local_cache.get('root', 'v1'))
+        self.local_cache.set('root', 'v1', 'data')
+        self.assertEquals(self.local_cache.get('root', 'v1'), 'data')
+        self.assertIsNone(self.local_cache.get('root', 'v2'))
+        self.assertEquals((self.local_cache.hits, self.local_cache.misses), (1, 2))
+
+    def test_set_replaces_other_versions(self):
+        self.local_cache.set('root', 'v1', 'data')
+        self.local_cache.set('root', 'v2', 'new')
+        self.assertIsNone(self.local_cache.get('root', 'v1'))
+        self.assertEquals(self.local_cache.get('root', 'v2'), 'new')
+        self.assertEquals(self.local_cache.size, 3)
+
+    def test_eviction_by_size(self):
+        self.local_cache.set('root1', 'v1', 'data1')
+        self.local_cache.set('root2', 'v1', 'data2')
+        # Access root1 so root2 becomes the least recently used.
+        self.local_cache.get('root1', 'v1')
+        self.local_cache.set('root3', 'v1', 'data3')
+        self.assertEquals(self.local_cache.get('root1', 'v1'), 'data1')
+        self.assertIsNone(self.local_cache.get('root2', 'v1'))
+        self.assertEquals(self.local_cache.get('root3', 'v1'), 'data3')
+        self.assertEquals(self.local_cache.evictions, 1)
+        self.assertEquals(self.local_cache.size, 10)
+
+    def test_data_larger_than_max_size(self):
+        self.local_cache.set('root', 'v1', 'x' * 11)
+        self.assertIsNone(self.local_cache.get('root', 'v1'))
+        self.assertEquals(self.local_cache.size, 0)
+
+
+@attr(shard=2)
+class TestCompactBlockStructureCache(TestBlockStructureCache):
+    """
+    Tests for BlockStructureCache storing block structures in their
+    compact form.
+    """
+    def setUp(self):
+        super(TestCompactBlockStructureCache, self).setUp()
+        self.block_structure_cache = BlockStructureCache(self.mock_cache, compact=True)
+
+    def test_get_compact(self):
+        self.add_transformers()
+        self.block_structure_cache.add(self.block_structure)
+        self.assertFalse(self.block_structure.is_compact)
+        cached_value = self.block_structure_cache.get(self.block_structure.root_block_usage_key)
+        self.assertTrue(cached_value.is_compact)
+        self.assertEquals(
+            cached_value.get_transformer_block_field(0, MockTransformer, 'test'),
+            '{} val'.format(MockTransformer.name()),
+        )
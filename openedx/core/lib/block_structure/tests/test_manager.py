@@ -166,3 +166,128 @@ class TestBlockStructureManager(TestCase, ChildrenMapTestMixin):
         self.bs_manager.clear()
         self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
         self.assertEquals(TestTransformer1.collect_call_count, 2)
+
+
+@attr(shard=2)
+class TestCompactBlockStructureManager(TestBlockStructureManager):
+    """
+    Test class for BlockStructureManager storing block structures in
+    their compact form.
+    """
+    def setUp(self):
+        super(TestCompactBlockStructureManager, self).setUp()
+        self.bs_manager = BlockStructureManager(
+            root_block_usage_key=0,
+            modulestore=self.modulestore,
+            cache=self.cache,
+            compact=True,
+        )
+
+
+class TestIncrementalTransformer(TestTransformer1):
+    """
+    Test Transformer class that supports incremental collection.
+    """
+    SUPPORTS_INCREMENTAL_COLLECT = True
+    incrementally_collected_block_keys = None
+
+    @classmethod
+    def collect_incremental(cls, block_structure, block_keys):
+        """
+        Collects block data for the given blocks of the block structure.
+        """
+        cls.incrementally_collected_block_keys = set(block_keys)
+        for block_key in block_keys:
+            block_structure.set_transformer_block_field(
+                block_key, cls, cls.collect_data_key, cls._create_block_value(block_key, cls.collect_data_key)
+            )
+
+
+@attr(shard=2)
+class TestBlockStructureManagerIncrementalUpdate(TestCase, ChildrenMapTestMixin):
+    """
+    Test class for incremental updates by BlockStructureManager.
+    """
+    def setUp(self):
+        super(TestBlockStructureManagerIncrementalUpdate, self).setUp()
+
+        TestIncrementalTransformer.collect_call_count = 0
+        TestIncrementalTransformer.incrementally_collected_block_keys = None
+        self.registered_transformers = [TestIncrementalTransformer()]
+
+        self.children_map = self.SIMPLE_CHILDREN_MAP
+        self.modulestore = MockModulestoreFactory.create(self.children_map)
+        self.set_edited_on(range(len(self.children_map)), 'initial')
+        self.cache = MockCache()
+        self.bs_manager = BlockStructureManager(
+            root_block_usage_key=0,
+            modulestore=self.modulestore,
+            cache=self.cache,
+        )
+        with mock_registered_transformers(self.registered_transformers):
+            self.bs_manager.get_collected()
+
+    def set_edited_on(self, block_keys, edited_on):
+        """
+        Sets the edit time of the given blocks in the modulestore.
+        """
+        for block_key in block_keys:
+            self.modulestore.blocks[block_key].field_map['edited_on'] = edited_on
+
+    def update_and_verify(self):
+        """
+        Incrementally updates the block structure and verifies the
+        collected result.
+        """
+        with mock_registered_transformers(self.registered_transformers):
+            self.bs_manager.update_collected(incremental=True)
+            block_structure = self.bs_manager.get_collected()
+        self.assert_block_structure(block_structure, self.children_map)
+        TestIncrementalTransformer.assert_collected(block_structure)
+        return block_structure
+
+    def test_changed_leaf(self):
+        self.set_edited_on([3], 'updated')
+        block_structure = self.update_and_verify()
+        self.assertEquals(TestIncrementalTransformer.collect_call_count, 1)
+        self.assertEquals(TestIncrementalTransformer.incrementally_collected_block_keys, {0, 1, 3})
+        self.assertEquals(block_structure.get_xblock_field(3, 'edited_on'), 'updated')
+
+    def test_changed_parent(self):
+        self.set_edited_on([1], 'updated')
+        self.update_and_verify()
+        self.assertEquals(TestIncrementalTransformer.incrementally_collected_block_keys, {0, 1, 3, 4})
+
+    def test_changed_relations(self):
+        self.children_map = [[1, 2], [3], [4], [], []]
+        self.modulestore.blocks[1].children = [3]
+        self.modulestore.blocks[2].children = [4]
+        self.update_and_verify()
+        self.assertEquals(TestIncrementalTransformer.incrementally_collected_block_keys, {0, 1, 2, 3, 4})
+
+    def test_no_changes(self):
+        self.update_and_verify()
+        self.assertEquals(TestIncrementalTransformer.incrementally_collected_block_keys, set())
+
+    def test_edited_on_unavailable(self):
+        del self.modulestore.blocks[2].field_map['edited_on']
+        self.update_and_verify()
+        self.assertEquals(TestIncrementalTransformer.collect_call_count, 2)
+        self.assertIsNone(TestIncrementalTransformer.incrementally_collected_block_keys)
+
+    def test_transformer_without_support(self):
+        self.registered_transformers = [TestTransformer1()]
+        TestTransformer1.collect_call_count = 0
+        with mock_registered_transformers(self.registered_transformers):
+            self.bs_manager.update_collected()
+        self.set_edited_on([3], 'updated')
+        with mock_registered_transformers(self.registered_transformers):
+            self.bs_manager.update_collected(incremental=True)
+        self.assertEquals(TestTransformer1.collect_call_count, 2)
+
+    def test_not_incremental(self):
+        self.set_edited_on([3], 'updated')
+        with mock_registered_transformers(self.registered_transformers):
+            self.bs_manager.update_collected()
+        self.assertEquals(TestIncrementalTransformer.collect_call_count, 2)
+        self.assertIsNone(TestIncrementalTransformer.incrementally_collected_block_keys)
@@ -28,6 +28,14 @@ class BlockStructureTransformer(object):
     #
     VERSION = 0
 
+    # Transformers whose collected data for a block depends only on
+    # that block, its ancestors and its descendants can set this
+    # attribute to True and implement the collect_incremental method.
+    # When a block structure is updated, their data is then collected
+    # only for the blocks that are affected by the changes, while the
+    # data of all other transformers is collected in full.
+    SUPPORTS_INCREMENTAL_COLLECT = False
+
     @classmethod
     def name(cls):
         """
@@ -78,6 +86,31 @@ class BlockStructureTransformer(object):
         """
         pass
 
+    @classmethod
+    def collect_incremental(cls, block_structure, block_keys):
+        """
+        Collects data as the collect method does, but only for the
+        blocks identified by the given block_keys.  Called instead of
+        collect when SUPPORTS_INCREMENTAL_COLLECT is True and the
+        block structure is being updated.
+
+        The transformer's data for all other blocks, along with its
+        non-block-specific data, is already populated in the
+        block_structure from the previous collection.  The given
+        block_keys include all descendants and ancestors of each
+        changed block, so data that is percolated down or up the
+        hierarchy can be recomputed from the data of the other blocks.
+
+        Arguments:
+            block_structure (BlockStructureModulestoreData) - A mutable
+                block structure that is to be modified with collected
+                data to be cached for the transformer.
+
+            block_keys (set(UsageKey)) - Usage keys of the blocks whose
+                data is to be collected.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def transform(self, usage_info, block_structure):
         """
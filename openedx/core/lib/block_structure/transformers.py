@@ -4,6 +4,7 @@ Module for a collection of BlockStructureTransformers.
 import functools
 from logging import getLogger
 
+from .block_structure import EDITED_ON_XBLOCK_FIELD
 from .exceptions import TransformerException
 from .transformer import FilteringTransformerMixin
 from .transformer_registry import TransformerRegistry
@@ -79,9 +80,53 @@ class BlockStructureTransformers(object):
             block_structure._add_transformer(transformer)  # pylint: disable=protected-access
             transformer.collect(block_structure)
 
+        # Collect the edit time of each block so the block structure
+        # can later be updated incrementally.
+        block_structure.request_xblock_fields(EDITED_ON_XBLOCK_FIELD)
+
         # Collect all fields that were requested by the transformers.
         block_structure._collect_requested_xblock_fields()  # pylint: disable=protected-access
 
+    @classmethod
+    def collect_incremental(cls, block_structure, collected_block_structure):
+        """
+        Collects data for each registered transformer, reusing the data
+        in the given, previously collected, block structure for blocks
+        that are not affected by changes made since it was collected.
+
+        Transformers that support incremental collection collect data
+        only for the affected blocks; all other transformers collect
+        data for the entire block structure.
+
+        Returns whether the data was collected.  If False, the affected
+        blocks could not be determined and nothing was collected.
+        """
+        affected_block_keys = block_structure._get_affected_blocks(  # pylint: disable=protected-access
+            collected_block_structure
+        )
+        if affected_block_keys is None:
+            return False
+
+        logger.info(
+            "Incrementally collecting Block Structure %s: %d of %d blocks affected.",
+            block_structure.root_block_usage_key,
+            len(affected_block_keys),
+            len(block_structure),
+        )
+        block_structure._copy_collected_data(  # pylint: disable=protected-access
+            collected_block_structure, affected_block_keys
+        )
+        for transformer in TransformerRegistry.get_registered_transformers():
+            block_structure._add_transformer(transformer)  # pylint: disable=protected-access
+            if transformer.SUPPORTS_INCREMENTAL_COLLECT:
+                transformer.collect_incremental(block_structure, affected_block_keys)
+            else:
+                transformer.collect(block_structure)
+
+        block_structure.request_xblock_fields(EDITED_ON_XBLOCK_FIELD)
+        block_structure._collect_requested_xblock_fields(affected_block_keys)  # pylint: disable=protected-access
+        return True
+
     @classmethod
     def is_collected_outdated(cls, block_structure):
         """
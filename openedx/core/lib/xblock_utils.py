@@ -251,6 +251,24 @@ def replace_static_urls(data_dir, block, view, frag, context, course_id=None, st
     ))
 
 
+def replace_urls(data_dir, block, view, frag, context,  # pylint: disable=unused-argument
+                 course_id=None, static_asset_path='', jump_to_id_base_url=None):
+    """
+    Updates the supplied module with a new get_html function that wraps
+    the old get_html function and substitutes the urls replace_static_urls,
+    replace_course_urls and replace_jump_to_id_urls substitute, in a single
+    pass over the content.
+    """
+    return wrap_fragment(frag, static_replace.replace_urls(
+        frag.content,
+        course_id,
+        data_directory=data_dir,
+        static_asset_path=static_asset_path,
+        course_urls=True,
+        jump_to_id_base_url=jump_to_id_base_url,
+    ))
+
+
 def grade_histogram(module_id):
     '''
     Print out a histogram of grades on a given problem in staff member debug info.
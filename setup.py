@@ -53,6 +53,7 @@ setup(
             "course_blocks_api = lms.djangoapps.course_api.blocks.transformers.blocks_api:BlocksAPITransformer",
             "milestones = lms.djangoapps.course_api.blocks.transformers.milestones:MilestonesTransformer",
             "grades = lms.djangoapps.grades.transformer:GradesTransformer",
+            "table_of_contents = lms.djangoapps.courseware.transformer:TableOfContentsTransformer",
         ],
     }
 )